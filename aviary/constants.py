@@ -1,14 +1,18 @@
 
+import os
+
 # DEFAULTS
 DEFAULT_SECTOR_NAME = "SECTOR"
 DEFAULT_ORIGIN = (-0.1275, 51.5)
 DEFAULT_LOWER_LIMIT = 60
 DEFAULT_UPPER_LIMIT = 460
 FLOAT_PRECISION = 4
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aviary")
 
 # CONSTANTS
 ELLIPSOID = "WGS84"
 GEOJSON_EXTENSION = "geojson"
+METRES_PER_NM = 1852
 
 # JSON keys
 FEATURES_KEY = "features"
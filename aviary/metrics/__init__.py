@@ -1,3 +1,9 @@
 from .separation_metric import pairwise_separation_metric
 from .sector_exit_metric import sector_exit_metric
 from .fuel_efficiency_metric import fuel_efficiency_metric
+from .closest_point_of_approach import predict_conflicts
+from .metrics_engine import MetricsEngine
+from .fuel_efficiency_metric import fuel_efficiency_scores
+from .evaluation_pipeline import EvaluationPipeline
+from .separation_tracker import SeparationTracker
+from .loss_of_separation_events import LossOfSeparationEvents
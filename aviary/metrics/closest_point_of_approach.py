@@ -0,0 +1,190 @@
+"""
+Closest point of approach (CPA) prediction for all aircraft pairs.
+
+Aircraft are assumed to fly straight and level at constant velocity (plus an
+optional constant vertical speed) from their current positions. Positions and
+velocities are expressed in a sector's local projection, in which, for every
+pair of aircraft i < j with relative position dp and relative velocity dv:
+
+- t_cpa := the time in [0, horizon] minimising |dp + dv t|
+- d_cpa := |dp + dv t_cpa|, the horizontal distance at closest approach in nautical miles (nm)
+
+A predicted loss of separation occurs if, at some time within the horizon, the
+pair is simultaneously closer than the horizontal and vertical minimum
+separation distances (see separation_metric).
+
+All pairs are evaluated at once with NumPy, so the cost per call is a handful
+of array operations over n(n-1)/2 pairs.
+"""
+
+import numpy as np
+
+import aviary.metrics.utils as utils
+from aviary.metrics.separation_metric import HOR_MIN_DIST, VERT_MIN_DIST
+
+# DEFAULT PARAMETERS
+HORIZON = 300  # Look-ahead time (s)
+_VELOCITY_TIME_STEP = 60  # Time step (s) used to estimate velocities in the projection.
+
+# Result keys
+I_KEY = "i"
+J_KEY = "j"
+T_CPA_KEY = "t_cpa"
+D_CPA_KEY = "d_cpa"
+VERT_CPA_KEY = "vert_cpa"
+LOSS_KEY = "loss_of_separation"
+T_LOSS_KEY = "t_loss"
+
+
+def projected_state(lon, lat, track, ground_speed, projection):
+    """
+    Projects aircraft positions and velocities into a sector's local projection.
+
+    Velocities are estimated from the displacement along the geodesic over a short time step,
+    which accounts for the difference between true and grid north away from the projection origin.
+
+    :param lon: Array of aircraft longitudes.
+    :param lat: Array of aircraft latitudes.
+    :param track: Array of aircraft ground tracks (degrees clockwise from true north).
+    :param ground_speed: Array of aircraft ground speeds (in metres per second).
+    :param projection: A pyproj Proj instance with units of nautical miles (e.g. a SectorElement's projection attribute).
+    :return: A tuple (x, y, vx, vy) of arrays, of positions in nm and velocities in nm per second.
+    """
+
+    lon, lat, track, ground_speed = np.broadcast_arrays(*[np.asarray(a, dtype = float) for a in [lon, lat, track, ground_speed]])
+
+    lon2, lat2, _ = utils._WGS84.fwd(lon, lat, track, ground_speed * _VELOCITY_TIME_STEP)
+
+    # Note: pyproj returns scalars for single element arrays.
+    x, y = [np.reshape(a, lon.shape) for a in projection(lon, lat)]
+    x2, y2 = [np.reshape(a, lon.shape) for a in projection(lon2, lat2)]
+    return x, y, (x2 - x) / _VELOCITY_TIME_STEP, (y2 - y) / _VELOCITY_TIME_STEP
+
+
+def closest_point_of_approach(x, y, vx, vy, horizon = HORIZON):
+    """
+    Computes the time to and distance at the closest point of approach for every pair of aircraft.
+
+    :param x: Array of aircraft x coordinates.
+    :param y: Array of aircraft y coordinates.
+    :param vx: Array of aircraft velocity x components (in coordinate units per second).
+    :param vy: Array of aircraft velocity y components (in coordinate units per second).
+    :param horizon: Look-ahead time in seconds.
+    :return: A tuple (i, j, t_cpa, d_cpa) of arrays, with one element per pair of aircraft (i < j).
+    """
+
+    i, j = np.triu_indices(len(x), k = 1)
+
+    dx, dy = x[j] - x[i], y[j] - y[i]
+    dvx, dvy = vx[j] - vx[i], vy[j] - vy[i]
+
+    dv2 = dvx * dvx + dvy * dvy
+    t_cpa = np.divide(-(dx * dvx + dy * dvy), dv2, out = np.zeros(len(i)), where = dv2 > 0)
+    t_cpa = np.clip(t_cpa, 0, horizon)
+
+    d_cpa = np.hypot(dx + dvx * t_cpa, dy + dvy * t_cpa)
+    return i, j, t_cpa, d_cpa
+
+
+def _interval_below(p, v, limit):
+    """
+    Computes the time interval during which |p + v t| < limit, for arrays of scalar positions p and velocities v.
+    Returns (start, end) arrays, which are (-inf, inf) if the condition always holds and (inf, -inf) if never.
+    """
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        t1 = (-limit - p) / v
+        t2 = (limit - p) / v
+
+    always = (v == 0) & (np.abs(p) < limit)
+    start = np.where(v == 0, np.where(always, -np.inf, np.inf), np.minimum(t1, t2))
+    end = np.where(v == 0, np.where(always, np.inf, -np.inf), np.maximum(t1, t2))
+    return start, end
+
+
+def _interval_within(dx, dy, dvx, dvy, limit):
+    """
+    Computes the time interval during which |(dx, dy) + (dvx, dvy) t| < limit.
+    Returns (start, end) arrays, which are (-inf, inf) if the condition always holds and (inf, -inf) if never.
+    """
+
+    a = dvx * dvx + dvy * dvy
+    b = dx * dvx + dy * dvy
+    c = dx * dx + dy * dy - limit * limit
+    disc = b * b - a * c
+
+    moving = a > 0
+    root = np.sqrt(np.where(moving & (disc > 0), disc, 0))
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        start = np.where(moving & (disc > 0), (-b - root) / a, np.inf)
+        end = np.where(moving & (disc > 0), (-b + root) / a, -np.inf)
+
+    always = ~moving & (c < 0)
+    return np.where(always, -np.inf, start), np.where(always, np.inf, end)
+
+
+def predict_conflicts(
+    lon,
+    lat,
+    alt,
+    track,
+    ground_speed,
+    projection,
+    vertical_speed=None,
+    horizon=HORIZON,
+    hor_min_dist=HOR_MIN_DIST,
+    vert_min_dist=VERT_MIN_DIST
+):
+    """
+    Predicts the closest point of approach and any loss of separation for every pair of aircraft.
+
+    :param lon: Array of aircraft longitudes.
+    :param lat: Array of aircraft latitudes.
+    :param alt: Array of aircraft altitudes (in metres).
+    :param track: Array of aircraft ground tracks (degrees clockwise from true north).
+    :param ground_speed: Array of aircraft ground speeds (in metres per second).
+    :param projection: A pyproj Proj instance with units of nautical miles (e.g. a SectorElement's projection attribute).
+    :param vertical_speed: (optional) Array of aircraft vertical speeds (in metres per second). Defaults to level flight.
+    :param horizon: Look-ahead time in seconds.
+    :param hor_min_dist: Horizontal separation threshold in nautical miles (nm).
+    :param vert_min_dist: Vertical separation threshold in feet (ft).
+    :return: A dictionary of arrays, with one element per pair of aircraft (i < j):
+        - i, j: the indices of the aircraft in the pair
+        - t_cpa: time to closest (horizontal) approach in seconds
+        - d_cpa: horizontal distance at closest approach in nautical miles
+        - vert_cpa: vertical distance at closest approach in feet
+        - loss_of_separation: True if a loss of separation is predicted within the horizon
+        - t_loss: time to the predicted loss of separation in seconds (NaN if none is predicted)
+    """
+
+    x, y, vx, vy = projected_state(lon, lat, track, ground_speed, projection)
+
+    alt_ft = np.asarray(alt, dtype = float) * utils._SCALE_METRES_TO_FEET
+    alt_ft = np.broadcast_to(alt_ft, x.shape)
+    if vertical_speed is None:
+        vs_ft = np.zeros(x.shape)
+    else:
+        vs_ft = np.broadcast_to(np.asarray(vertical_speed, dtype = float) * utils._SCALE_METRES_TO_FEET, x.shape)
+
+    i, j, t_cpa, d_cpa = closest_point_of_approach(x, y, vx, vy, horizon = horizon)
+
+    dz, dvz = alt_ft[j] - alt_ft[i], vs_ft[j] - vs_ft[i]
+    vert_cpa = np.abs(dz + dvz * t_cpa)
+
+    # Intersect the intervals of horizontal and vertical proximity with the look-ahead window.
+    h_start, h_end = _interval_within(x[j] - x[i], y[j] - y[i], vx[j] - vx[i], vy[j] - vy[i], hor_min_dist)
+    v_start, v_end = _interval_below(dz, dvz, vert_min_dist)
+
+    start = np.maximum(np.maximum(h_start, v_start), 0)
+    end = np.minimum(np.minimum(h_end, v_end), horizon)
+    loss = start <= end
+
+    return {
+        I_KEY: i,
+        J_KEY: j,
+        T_CPA_KEY: t_cpa,
+        D_CPA_KEY: d_cpa,
+        VERT_CPA_KEY: vert_cpa,
+        LOSS_KEY: loss,
+        T_LOSS_KEY: np.where(loss, start, np.nan)
+    }
@@ -0,0 +1,332 @@
+"""
+Offline evaluation of the separation, sector exit and fuel efficiency metrics over recorded episode logs.
+
+An episode log is a table (CSV or Parquet) of aircraft states with one row per
+aircraft per time step and the columns:
+
+- episode: the episode identifier
+- time: the simulation time (any monotonic numeric unit, e.g. seconds)
+- callsign: the aircraft callsign
+- lon, lat: the aircraft position
+- alt: the aircraft altitude in metres
+
+Rows belonging to the same episode must be contiguous (e.g. the log is sorted
+by episode), but episodes may span any number of chunks. Aircraft routes and
+requested and initial flight levels are read from the aviary scenario of each
+episode: either a single scenario JSON file shared by all episodes, or a
+directory holding one <episode>.json file per episode.
+
+The log is read in chunks and complete episodes are sharded across a pool of
+worker processes, each of which loads the sector (and a shared scenario) once.
+A bounded number of episodes is in flight at any time, so memory use does not
+grow with the size of the log. Each episode is summarised by a single row of
+the output table.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from json import load
+
+import numpy as np
+import pandas as pd
+
+import aviary.scenario.scenario_generator as sg
+import aviary.sector.sector_element as se
+import aviary.metrics.metrics_engine as me
+from aviary.metrics.fuel_efficiency_metric import total_fuel_efficiency, mean_fuel_efficiency
+
+# DEFAULT PARAMETERS
+CHUNK_SIZE = 100000  # Rows
+PENDING_PER_WORKER = 4  # Episodes in flight per worker process
+FLUSH_SIZE = 200  # Episode summaries written to CSV output at a time
+
+# Log columns
+EPISODE_COLUMN = "episode"
+TIME_COLUMN = "time"
+CALLSIGN_COLUMN = "callsign"
+LONGITUDE_COLUMN = "lon"
+LATITUDE_COLUMN = "lat"
+ALTITUDE_COLUMN = "alt"
+LOG_COLUMNS = [EPISODE_COLUMN, TIME_COLUMN, CALLSIGN_COLUMN, LONGITUDE_COLUMN, LATITUDE_COLUMN, ALTITUDE_COLUMN]
+
+# Summary columns
+N_AIRCRAFT_KEY = "n_aircraft"
+N_STEPS_KEY = "n_steps"
+MIN_SEPARATION_KEY = "min_separation"
+MEAN_SEPARATION_KEY = "mean_separation"
+LOSS_OF_SEPARATION_PAIRS_KEY = "loss_of_separation_pairs"
+N_SECTOR_EXITS_KEY = "n_sector_exits"
+MEAN_SECTOR_EXIT_KEY = "mean_sector_exit"
+TOTAL_FUEL_EFFICIENCY_KEY = "total_fuel_efficiency"
+MEAN_FUEL_EFFICIENCY_KEY = "mean_fuel_efficiency"
+
+PARQUET_EXTENSION = ".parquet"
+
+# The episode evaluator of a worker process, set by the pool initializer.
+_worker_evaluator = None
+
+
+class EpisodeEvaluator():
+    """
+    Evaluates the metrics over the tracks of a single episode.
+
+    Args:
+        sector (SectorElement): The sector element.
+        scenario (str): Path to a scenario JSON file shared by all episodes, or to a directory of <episode>.json files.
+        **kwargs: Metric thresholds passed to the MetricsEngine constructor.
+
+    Attributes:
+        engine (MetricsEngine): The metrics engine.
+        scenario (str): As Args.
+    """
+
+    def __init__(self, sector, scenario, **kwargs):
+
+        self.engine = me.MetricsEngine(sector, **kwargs)
+        self.scenario = scenario
+        self.__shared_aircraft = None
+
+
+    def aircraft(self, episode):
+        """
+        Returns a dictionary, keyed by callsign, of the scenario aircraft in an episode.
+
+        A scenario shared by all episodes is read only once.
+        """
+
+        if not os.path.isdir(self.scenario):
+            if self.__shared_aircraft is None:
+                self.__shared_aircraft = self.read_aircraft(self.scenario)
+            return self.__shared_aircraft
+
+        return self.read_aircraft(os.path.join(self.scenario, f'{episode}.{sg.JSON_EXTENSION}'))
+
+
+    @staticmethod
+    def read_aircraft(filename):
+        """Reads a scenario JSON file and returns a dictionary of its aircraft, keyed by callsign"""
+
+        with open(filename, 'r') as f:
+            scenario = load(f)
+        return {aircraft[sg.CALLSIGN_KEY]: aircraft for aircraft in scenario[sg.AIRCRAFT_KEY]}
+
+
+    def __call__(self, episode, tracks):
+        """
+        Evaluates the metrics over the tracks of an episode.
+
+        :param episode: The episode identifier.
+        :param tracks: A DataFrame holding the log rows of the episode.
+        :return: A dictionary holding the episode summary.
+        """
+
+        aircraft = self.aircraft(episode)
+
+        callsigns, callsign_index = np.unique(np.asarray(tracks[CALLSIGN_COLUMN], dtype = str),
+                                              return_inverse = True)
+        times, time_index = np.unique(np.asarray(tracks[TIME_COLUMN], dtype = float), return_inverse = True)
+
+        missing = [callsign for callsign in callsigns if callsign not in aircraft]
+        if missing:
+            raise ValueError(f'Episode {episode}: aircraft {missing} not found in the scenario.')
+
+        # Arrays of shape (time steps, aircraft), with NaN where an aircraft is not logged.
+        lon, lat, alt = [np.full((len(times), len(callsigns)), np.nan) for _ in range(3)]
+        lon[time_index, callsign_index] = np.asarray(tracks[LONGITUDE_COLUMN], dtype = float)
+        lat[time_index, callsign_index] = np.asarray(tracks[LATITUDE_COLUMN], dtype = float)
+        alt[time_index, callsign_index] = np.asarray(tracks[ALTITUDE_COLUMN], dtype = float)
+
+        requested_flight_level = np.array([aircraft[c][sg.REQUESTED_FLIGHT_LEVEL_KEY] for c in callsigns], dtype = float)
+        initial_flight_level = np.array([aircraft[c][sg.CURRENT_FLIGHT_LEVEL_KEY] for c in callsigns], dtype = float)
+        routes = [aircraft[c][sg.ROUTE_KEY] for c in callsigns]
+
+        separation = np.full(lon.shape, np.nan)
+        fuel_efficiency = np.full(lon.shape, np.nan)
+        sector_exit = np.full(lon.shape, np.nan)
+        loss = np.zeros((len(callsigns), len(callsigns)), dtype = bool)
+        min_separation = np.nan
+
+        # The previous state at the first time step is unknown.
+        previous_lon, previous_lat, previous_alt = [np.vstack([np.full(len(callsigns), np.nan), a[:-1]])
+                                                    for a in (lon, lat, alt)]
+        for t in range(len(times)):
+            result = self.engine.evaluate(lon[t], lat[t], alt[t], previous_lon[t], previous_lat[t], previous_alt[t],
+                                          requested_flight_level, initial_flight_level, routes)
+
+            separation[t] = result[me.SEPARATION_KEY]
+            fuel_efficiency[t] = result[me.FUEL_EFFICIENCY_KEY]
+            sector_exit[t] = result[me.SECTOR_EXIT_KEY]
+
+            pair_separation = result[me.PAIR_SEPARATION_KEY]
+            if len(pair_separation) > 0:
+                min_separation = np.nanmin([min_separation, pair_separation.min()])
+                lost = pair_separation <= -1
+                loss[result[me.PAIR_I_KEY][lost], result[me.PAIR_J_KEY][lost]] = True
+
+        exits = sector_exit[np.isfinite(sector_exit)]
+        separations = separation[np.isfinite(separation)]
+        return {
+            EPISODE_COLUMN: episode,
+            N_AIRCRAFT_KEY: len(callsigns),
+            N_STEPS_KEY: len(times),
+            MIN_SEPARATION_KEY: min_separation,
+            MEAN_SEPARATION_KEY: separations.mean() if len(separations) > 0 else np.nan,
+            LOSS_OF_SEPARATION_PAIRS_KEY: int(loss.sum()),
+            N_SECTOR_EXITS_KEY: len(exits),
+            MEAN_SECTOR_EXIT_KEY: exits.mean() if len(exits) > 0 else np.nan,
+            TOTAL_FUEL_EFFICIENCY_KEY: float(total_fuel_efficiency(fuel_efficiency.ravel())),
+            MEAN_FUEL_EFFICIENCY_KEY: float(mean_fuel_efficiency(fuel_efficiency.ravel())),
+        }
+
+
+def _init_worker(sector_file, scenario, kwargs):
+    """Process pool initializer: loads the sector once per worker process"""
+
+    global _worker_evaluator
+    with open(sector_file, 'r') as f:
+        sector = se.SectorElement.deserialise(f)
+    _worker_evaluator = EpisodeEvaluator(sector, scenario, **kwargs)
+
+
+def _evaluate_in_worker(episode, tracks):
+    """Evaluates an episode using the worker process's evaluator"""
+
+    return _worker_evaluator(episode, tracks)
+
+
+class EvaluationPipeline():
+    """
+    Evaluates the metrics over every episode in an episode log, in parallel.
+
+    Args:
+        sector_file (str): Path to the sector GeoJSON file.
+        scenario (str): Path to a scenario JSON file shared by all episodes, or to a directory of <episode>.json files.
+        workers (int): The number of worker processes. If 0, episodes are evaluated in the calling process.
+        chunk_size (int): The number of log rows read at a time.
+        **kwargs: Metric thresholds passed to the MetricsEngine constructor.
+
+    Attributes:
+        As Args.
+    """
+
+    def __init__(self, sector_file, scenario, workers = os.cpu_count(), chunk_size = CHUNK_SIZE, **kwargs):
+
+        self.sector_file = sector_file
+        self.scenario = scenario
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.kwargs = kwargs
+
+
+    def read_chunks(self, log_file):
+        """Returns an iterator over the log in DataFrame chunks of at most chunk_size rows"""
+
+        if log_file.endswith(PARQUET_EXTENSION):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError('Reading Parquet episode logs requires the pyarrow package.')
+
+            return (batch.to_pandas() for batch in
+                    pq.ParquetFile(log_file).iter_batches(batch_size = self.chunk_size, columns = LOG_COLUMNS))
+
+        return pd.read_csv(log_file, usecols = LOG_COLUMNS, chunksize = self.chunk_size,
+                           dtype = {EPISODE_COLUMN: str, CALLSIGN_COLUMN: str})
+
+
+    def episodes(self, log_file):
+        """
+        Reads the log in chunks and yields (episode, tracks) pairs, one per episode, where tracks is a DataFrame.
+
+        Raises a ValueError if the rows of an episode are not contiguous.
+        """
+
+        seen = set()
+        current, frames = None, []
+        for chunk in self.read_chunks(log_file):
+            chunk[EPISODE_COLUMN] = chunk[EPISODE_COLUMN].astype(str)
+
+            # Within a chunk, each episode's rows must form a single run (as across chunks).
+            episodes = chunk[EPISODE_COLUMN]
+            if (episodes.ne(episodes.shift())).sum() != episodes.nunique():
+                runs = episodes[episodes.ne(episodes.shift())]
+                episode = runs[runs.duplicated()].iloc[0]
+                raise ValueError(f'The log rows of episode {episode} are not contiguous.')
+
+            for episode, frame in chunk.groupby(EPISODE_COLUMN, sort = False):
+                if episode == current:
+                    frames.append(frame)
+                    continue
+                if current is not None:
+                    yield current, pd.concat(frames)
+                if episode in seen:
+                    raise ValueError(f'The log rows of episode {episode} are not contiguous.')
+                seen.add(episode)
+                current, frames = episode, [frame]
+
+        if current is not None:
+            yield current, pd.concat(frames)
+
+
+    def evaluate(self, log_file):
+        """Yields the summary of each episode in the log, in log order"""
+
+        if not self.workers:
+            with open(self.sector_file, 'r') as f:
+                evaluator = EpisodeEvaluator(se.SectorElement.deserialise(f), self.scenario, **self.kwargs)
+            for episode, tracks in self.episodes(log_file):
+                yield evaluator(episode, tracks)
+            return
+
+        max_pending = self.workers * PENDING_PER_WORKER
+        with ProcessPoolExecutor(max_workers = self.workers, initializer = _init_worker,
+                                 initargs = (self.sector_file, self.scenario, self.kwargs)) as executor:
+            pending = deque()
+            for episode, tracks in self.episodes(log_file):
+                pending.append(executor.submit(_evaluate_in_worker, episode, tracks))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+    def run(self, log_file, output_file):
+        """
+        Evaluates every episode in the log and writes the summary table to a CSV or Parquet file.
+
+        CSV output is written incrementally, FLUSH_SIZE episodes at a time.
+
+        :param log_file: Path to the episode log (.csv, optionally compressed, or .parquet).
+        :param output_file: Path to the output summary table (.csv or .parquet).
+        :return: The number of episodes evaluated.
+        """
+
+        n_episodes = 0
+        if output_file.endswith(PARQUET_EXTENSION):
+            summaries = list(self.evaluate(log_file))
+            pd.DataFrame(summaries, columns = self.summary_columns()).to_parquet(output_file, index = False)
+            return len(summaries)
+
+        batch = []
+        header = True
+        with open(output_file, 'w', newline = '') as f:
+            for summary in self.evaluate(log_file):
+                batch.append(summary)
+                n_episodes += 1
+                if len(batch) >= FLUSH_SIZE:
+                    pd.DataFrame(batch, columns = self.summary_columns()).to_csv(f, index = False, header = header)
+                    f.flush()
+                    batch, header = [], False
+            if batch or header:
+                pd.DataFrame(batch, columns = self.summary_columns()).to_csv(f, index = False, header = header)
+        return n_episodes
+
+
+    @staticmethod
+    def summary_columns():
+        """Returns the list of columns in the summary table"""
+
+        return [EPISODE_COLUMN, N_AIRCRAFT_KEY, N_STEPS_KEY, MIN_SEPARATION_KEY, MEAN_SEPARATION_KEY,
+                LOSS_OF_SEPARATION_PAIRS_KEY, N_SECTOR_EXITS_KEY, MEAN_SECTOR_EXIT_KEY,
+                TOTAL_FUEL_EFFICIENCY_KEY, MEAN_FUEL_EFFICIENCY_KEY]
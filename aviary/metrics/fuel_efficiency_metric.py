@@ -39,6 +39,16 @@ in the range [-1, 0], so the correct formula is:
 # author: Tim Hobson
 # email: thobson@turing.ac.uk
 
+import numpy as np
+
+import aviary.metrics.utils as utils
+
+# Altitude units
+FLIGHT_LEVEL_UNIT = "FL"
+METRE_UNIT = "m"
+
+_SCALE_METRES_TO_FLIGHT_LEVEL = utils._SCALE_METRES_TO_FEET / 100
+
 def fuel_efficiency_metric(current_flight_level, requested_flight_level, initial_flight_level):
     """
     Computes the fuel efficiency metric for the current timestep.
@@ -54,3 +64,71 @@ def fuel_efficiency_metric(current_flight_level, requested_flight_level, initial
     if denom == 0:
         return 0
     return -1 * min(1, num/denom)
+
+
+def fuel_efficiency_scores(current_altitude, requested_flight_level, initial_flight_level, unit = FLIGHT_LEVEL_UNIT):
+    """
+    Vectorised form of fuel_efficiency_metric, e.g. for whole episode tracks of many aircraft.
+
+    The arguments are broadcast against one another, so for an episode the current altitude may be an array with
+    one row per timestep and one column per aircraft, while the requested and initial flight levels are arrays
+    with one element per aircraft. Timesteps at which an aircraft is inactive may be marked by a NaN altitude.
+
+    :param current_altitude: Array of current altitudes (or flight levels)
+    :param requested_flight_level: Array of requested flight levels
+    :param initial_flight_level: Array of initial flight levels
+    :param unit: The unit of the current altitudes: "FL" (flight levels) or "m" (metres)
+    :return: An array of scores, with NaN wherever the current altitude is NaN.
+    """
+
+    current_altitude = np.asarray(current_altitude, dtype = float)
+    if unit == METRE_UNIT:
+        current_altitude = current_altitude * _SCALE_METRES_TO_FLIGHT_LEVEL
+    elif unit != FLIGHT_LEVEL_UNIT:
+        raise ValueError(f'Invalid unit: {unit}')
+
+    requested_flight_level = np.asarray(requested_flight_level, dtype = float)
+    initial_flight_level = np.asarray(initial_flight_level, dtype = float)
+
+    num = np.abs(np.maximum(requested_flight_level, initial_flight_level) - current_altitude)
+    denom = np.abs(requested_flight_level - initial_flight_level)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        ret = np.where(denom == 0, 0.0, -np.minimum(1, num / denom))
+    return np.where(np.isnan(current_altitude), np.nan, ret)
+
+
+def cumulative_fuel_efficiency(scores, axis = 0):
+    """
+    Returns the running total of fuel efficiency scores along the time axis, ignoring NaN (inactive) timesteps.
+
+    :param scores: Array of scores, e.g. as returned by fuel_efficiency_scores
+    :param axis: The time axis
+    """
+
+    return np.nancumsum(scores, axis = axis)
+
+
+def total_fuel_efficiency(scores, axis = 0):
+    """
+    Returns the total of fuel efficiency scores along the time axis (e.g. per aircraft), ignoring NaN (inactive) timesteps.
+
+    :param scores: Array of scores, e.g. as returned by fuel_efficiency_scores
+    :param axis: The time axis
+    """
+
+    return np.nansum(scores, axis = axis)
+
+
+def mean_fuel_efficiency(scores, axis = 0):
+    """
+    Returns the mean of fuel efficiency scores along the time axis (e.g. per aircraft), ignoring NaN (inactive)
+    timesteps. The mean is NaN where there are no active timesteps.
+
+    :param scores: Array of scores, e.g. as returned by fuel_efficiency_scores
+    :param axis: The time axis
+    """
+
+    scores = np.asarray(scores, dtype = float)
+    count = np.sum(~np.isnan(scores), axis = axis)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        return np.where(count > 0, np.nansum(scores, axis = axis) / count, np.nan)
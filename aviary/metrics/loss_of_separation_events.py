@@ -0,0 +1,247 @@
+"""
+Extraction of loss of separation events from time series of pairwise separation scores.
+
+A pair of aircraft is in violation at a tick if its separation score is -1,
+i.e. it is closer than both the horizontal and vertical minimum separation
+distances (see separation_metric). Consecutive violating ticks of a pair form
+an event, and events of the same pair separated by at most max_gap (in time
+units) are merged. Each event records:
+
+- i, j: the indices of the aircraft in the pair (i < j)
+- start, end: the times of the first and last violating ticks
+- n_ticks: the number of violating ticks
+- min_hor_dist: the minimum horizontal distance during the event in nautical miles (nm), if known
+- min_vert_dist: the minimum vertical distance during the event in feet (ft), if known
+
+Events may be extracted from a complete time series in a single vectorised
+pass with loss_of_separation_events, or tick by tick with a
+LossOfSeparationEvents object, which holds only the currently open events and
+so has bounded memory use however long the episode.
+"""
+
+import numpy as np
+
+import aviary.metrics.utils as utils
+import aviary.metrics.metrics_engine as me
+
+# Event keys
+I_KEY = "i"
+J_KEY = "j"
+START_KEY = "start"
+END_KEY = "end"
+N_TICKS_KEY = "n_ticks"
+MIN_HOR_DIST_KEY = "min_hor_dist"
+MIN_VERT_DIST_KEY = "min_vert_dist"
+
+# The score of a pair which has lost separation.
+_LOSS_SCORE = -1
+
+# Open events are ordered by a pair key, which packs the indices (i, j) into a single integer.
+_PAIR_KEY = "pair_key"
+_PAIR_KEY_SHIFT = 32
+
+
+def _events(i, j, start, end, n_ticks, min_hor_dist, min_vert_dist):
+    """Returns a dictionary of event arrays"""
+
+    return {
+        I_KEY: np.asarray(i, dtype = int),
+        J_KEY: np.asarray(j, dtype = int),
+        START_KEY: np.asarray(start, dtype = float),
+        END_KEY: np.asarray(end, dtype = float),
+        N_TICKS_KEY: np.asarray(n_ticks, dtype = int),
+        MIN_HOR_DIST_KEY: np.asarray(min_hor_dist, dtype = float),
+        MIN_VERT_DIST_KEY: np.asarray(min_vert_dist, dtype = float)
+    }
+
+
+def loss_of_separation_events(times, i, j, pair_separation, hor_dist = None, vert_dist = None, max_gap = 0):
+    """
+    Extracts the loss of separation events from a complete time series of pairwise separation scores.
+
+    :param times: Array of tick times, of length T.
+    :param i: Array of the first aircraft index of each pair, of length P.
+    :param j: Array of the second aircraft index of each pair, of length P.
+    :param pair_separation: Array of pairwise separation scores, of shape (T, P). NaN scores are not violations.
+    :param hor_dist: (optional) Array of horizontal distances in nautical miles (nm), of shape (T, P).
+    :param vert_dist: (optional) Array of vertical distances in feet (ft), of shape (T, P).
+    :param max_gap: The maximum time between violations of a pair which are merged into one event.
+    :return: A dictionary of event arrays, with one element per event, ordered by pair then start time.
+    """
+
+    times = np.asarray(times, dtype = float)
+    i, j = np.asarray(i), np.asarray(j)
+    pair_separation = np.asarray(pair_separation, dtype = float)
+    n_times, n_pairs = pair_separation.shape
+
+    with np.errstate(invalid = "ignore"):
+        violation = pair_separation <= _LOSS_SCORE
+
+    # Runs of consecutive violating ticks, in column-major order (i.e. by pair, then time).
+    padding = np.zeros((1, n_pairs), dtype = np.int8)
+    edges = np.diff(np.vstack([padding, violation.astype(np.int8), padding]), axis = 0).T
+    run_pair, run_start = np.nonzero(edges == 1)
+    _, run_end = np.nonzero(edges == -1)
+    run_end = run_end - 1
+
+    if len(run_pair) == 0:
+        return _events(*[[]] * 7)
+
+    # Merge runs of the same pair separated by at most max_gap.
+    new_event = np.ones(len(run_pair), dtype = bool)
+    new_event[1:] = (run_pair[1:] != run_pair[:-1]) | (times[run_start[1:]] - times[run_end[:-1]] > max_gap)
+    event_first = np.flatnonzero(new_event)
+    event_last = np.append(event_first[1:], len(run_pair)) - 1
+
+    n_ticks = np.add.reduceat(run_end - run_start + 1, event_first)
+
+    def event_min(values):
+        """Minimum of an array of values over the violating ticks of each event"""
+
+        if values is None:
+            return np.full(len(event_first), np.nan)
+
+        # Reduce over each run of the flattened (column-major) values, then over the runs of each event.
+        flat = np.append(np.where(violation, np.asarray(values, dtype = float), np.nan).T.ravel(), np.nan)
+        bounds = np.column_stack([run_pair * n_times + run_start, run_pair * n_times + run_end + 1]).ravel()
+        run_min = np.fmin.reduceat(flat, bounds)[::2]
+        return np.fmin.reduceat(run_min, event_first)
+
+    pair = run_pair[event_first]
+    return _events(i[pair], j[pair], times[run_start[event_first]], times[run_end[event_last]], n_ticks,
+                   event_min(hor_dist), event_min(vert_dist))
+
+
+class LossOfSeparationEvents():
+    """
+    Extracts loss of separation events tick by tick, from a stream of pairwise separation scores or positions.
+
+    Events are returned by update once closed, i.e. when a later tick occurs more than max_gap after
+    the last violation of the pair. The remaining open events are returned by flush.
+
+    Args:
+        max_gap (float): The maximum time between violations of a pair which are merged into one event.
+        tracker (SeparationTracker): (optional) Separation tracker used to score positions in update_positions.
+
+    Attributes:
+        As Args.
+    """
+
+    def __init__(self, max_gap = 0, tracker = None):
+
+        self.max_gap = max_gap
+        self.tracker = tracker
+        self.__open = self.__empty__()
+        self.__time = None
+
+
+    @staticmethod
+    def __empty__():
+        """Returns an empty set of open events, keyed by pair key"""
+
+        ret = _events(*[[]] * 7)
+        ret[_PAIR_KEY] = np.zeros(0, dtype = np.int64)
+        return ret
+
+
+    def n_open(self):
+        """The number of open events"""
+
+        return len(self.__open[_PAIR_KEY])
+
+
+    def update(self, time, i, j, pair_separation, hor_dist = None, vert_dist = None):
+        """
+        Processes the pairwise separation scores at one tick.
+
+        :param time: The tick time, which must not decrease between updates.
+        :param i: Array of the first aircraft index of each pair.
+        :param j: Array of the second aircraft index of each pair.
+        :param pair_separation: Array of pairwise separation scores. NaN scores are not violations.
+        :param hor_dist: (optional) Array of horizontal distances in nautical miles (nm).
+        :param vert_dist: (optional) Array of vertical distances in feet (ft).
+        :return: A dictionary of event arrays, holding the events closed at this tick.
+        """
+
+        i, j = np.asarray(i, dtype = np.int64), np.asarray(j, dtype = np.int64)
+        with np.errstate(invalid = "ignore"):
+            violation = np.asarray(pair_separation, dtype = float) <= _LOSS_SCORE
+
+        hor_dist = np.full(len(i), np.nan) if hor_dist is None else np.asarray(hor_dist, dtype = float)
+        vert_dist = np.full(len(i), np.nan) if vert_dist is None else np.asarray(vert_dist, dtype = float)
+        i, j, hor_dist, vert_dist = i[violation], j[violation], hor_dist[violation], vert_dist[violation]
+
+        # Match the violating pairs to the open events.
+        keys = (np.minimum(i, j) << _PAIR_KEY_SHIFT) | np.maximum(i, j)
+        position = np.searchsorted(self.__open[_PAIR_KEY], keys)
+        found = position < self.n_open()
+        found[found] = self.__open[_PAIR_KEY][position[found]] == keys[found]
+        violating = np.zeros(self.n_open(), dtype = bool)
+        violating[position[found]] = True
+
+        # An event is extended by a violation at the next tick or within max_gap of its last violation.
+        # Otherwise it is closed once this tick is more than max_gap after its last violation.
+        within_gap = time - self.__open[END_KEY] <= self.max_gap
+        keep = within_gap | (violating & (self.__open[END_KEY] == self.__time))
+        ret = {key: value[~keep] for key, value in self.__open.items() if key != _PAIR_KEY}
+
+        # Extend the kept events of violating pairs.
+        found[found] = keep[position[found]]
+        index = position[found]
+        self.__open[END_KEY][index] = time
+        self.__open[N_TICKS_KEY][index] += 1
+        self.__open[MIN_HOR_DIST_KEY][index] = np.fmin(self.__open[MIN_HOR_DIST_KEY][index], hor_dist[found])
+        self.__open[MIN_VERT_DIST_KEY][index] = np.fmin(self.__open[MIN_VERT_DIST_KEY][index], vert_dist[found])
+        self.__open = {key: value[keep] for key, value in self.__open.items()}
+        self.__time = time
+
+        # Open events for the other violating pairs.
+        new = ~found
+        if new.any():
+            opened = _events(np.minimum(i[new], j[new]), np.maximum(i[new], j[new]), np.full(new.sum(), time),
+                             np.full(new.sum(), time), np.ones(new.sum()), hor_dist[new], vert_dist[new])
+            opened[_PAIR_KEY] = keys[new]
+            order = np.argsort(np.concatenate([self.__open[_PAIR_KEY], opened[_PAIR_KEY]]), kind = "stable")
+            self.__open = {key: np.concatenate([value, opened[key]])[order] for key, value in self.__open.items()}
+
+        return ret
+
+
+    def update_positions(self, time, lon, lat, alt):
+        """
+        Processes the aircraft positions at one tick, scoring them with the separation tracker.
+
+        :param time: The tick time, which must not decrease between updates.
+        :param lon: Array of current longitudes.
+        :param lat: Array of current latitudes.
+        :param alt: Array of current altitudes (in metres).
+        :return: A dictionary of event arrays, holding the events closed at this tick.
+        """
+
+        if self.tracker is None:
+            raise ValueError('A separation tracker is required to process positions.')
+
+        lon, lat, alt = [np.asarray(a, dtype = float) for a in [lon, lat, alt]]
+        scores = self.tracker.update(lon, lat, alt)
+
+        i, j, pair_separation = scores[me.PAIR_I_KEY], scores[me.PAIR_J_KEY], scores[me.PAIR_SEPARATION_KEY]
+        loss = pair_separation <= _LOSS_SCORE
+        i, j = i[loss], j[loss]
+
+        hor_dist = np.zeros(0)
+        if len(i) > 0:
+            # Note: pyproj treats single element arrays as scalars, so the coordinates are passed as lists.
+            hor_dist = np.asarray(utils.horizontal_distance_m(lon[i].tolist(), lat[i].tolist(),
+                                                              lon[j].tolist(), lat[j].tolist())) / utils._ONE_NM
+        vert_dist = np.abs(alt[i] - alt[j]) * utils._SCALE_METRES_TO_FEET
+
+        return self.update(time, i, j, pair_separation[loss], hor_dist, vert_dist)
+
+
+    def flush(self):
+        """Closes and returns all open events"""
+
+        ret = {key: value for key, value in self.__open.items() if key != _PAIR_KEY}
+        self.__open = self.__empty__()
+        self.__time = None
+        return ret
@@ -0,0 +1,207 @@
+"""
+Evaluation of all metrics for a snapshot of every aircraft in a sector.
+
+The separation, sector exit and fuel efficiency metrics are computed in a
+single pass over arrays of aircraft state, sharing the intermediate results
+(unit conversions, projected positions, sector containment and geodesic
+distances) that the scalar metric functions would otherwise recompute for
+each aircraft or pair of aircraft. Scores are identical to those returned by
+pairwise_separation_metric, sector_exit_metric and fuel_efficiency_metric.
+
+Pairs of aircraft whose projected distance is well beyond the horizontal
+warning distance, or which are vertically separated by at least the vertical
+warning distance, are known to score 0 without computing geodesic distances.
+"""
+
+import numpy as np
+
+import aviary.metrics.utils as utils
+import aviary.metrics.separation_metric as sm
+import aviary.sector.sector_crossings as sc
+from aviary.metrics.fuel_efficiency_metric import fuel_efficiency_scores
+
+# Note: the aviary.metrics package exports a sector_exit_metric function, which shadows the module of the same name.
+from aviary.metrics.sector_exit_metric import target as exit_target, score_array as exit_score_array, \
+    HOR_WARN_DIST as EXIT_HOR_WARN_DIST, HOR_MAX_DIST as EXIT_HOR_MAX_DIST, \
+    VERT_WARN_DIST as EXIT_VERT_WARN_DIST, VERT_MAX_DIST as EXIT_VERT_MAX_DIST
+
+# Pairs whose projected distance exceeds the horizontal warning distance (plus rounding) by this factor are
+# assumed to be beyond it geodesically. This allows for the scale error of the sector's local projection.
+_PROJECTION_TOLERANCE = 1.05
+
+# Result keys
+SEPARATION_KEY = "separation"
+PAIR_I_KEY = "i"
+PAIR_J_KEY = "j"
+PAIR_SEPARATION_KEY = "pair_separation"
+SECTOR_EXIT_KEY = "sector_exit"
+FUEL_EFFICIENCY_KEY = "fuel_efficiency"
+
+class MetricsEngine():
+    """Computes all metrics for snapshots of aircraft state in a sector.
+
+    Args:
+        sector (SectorElement): The sector element.
+        sep_hor_min_dist (float): Separation metric horizontal distance threshold in nautical miles (nm).
+        sep_hor_warn_dist (float): Separation metric horizontal distance threshold in nautical miles (nm).
+        sep_vert_min_dist (float): Separation metric vertical distance threshold in feet (ft).
+        sep_vert_warn_dist (float): Separation metric vertical distance threshold in feet (ft).
+        exit_hor_warn_dist (float): Sector exit metric horizontal distance threshold in nautical miles (nm).
+        exit_hor_max_dist (float): Sector exit metric horizontal distance threshold in nautical miles (nm).
+        exit_vert_warn_dist (float): Sector exit metric vertical distance threshold in feet (ft).
+        exit_vert_max_dist (float): Sector exit metric vertical distance threshold in feet (ft).
+
+    Attributes:
+        As Args, plus:
+        crossing_detector (SectorCrossingDetector): Detects the aircraft leaving the sector.
+    """
+
+    def __init__(self,
+                 sector,
+                 sep_hor_min_dist = sm.HOR_MIN_DIST,
+                 sep_hor_warn_dist = sm.HOR_WARN_DIST,
+                 sep_vert_min_dist = sm.VERT_MIN_DIST,
+                 sep_vert_warn_dist = sm.VERT_WARN_DIST,
+                 exit_hor_warn_dist = EXIT_HOR_WARN_DIST,
+                 exit_hor_max_dist = EXIT_HOR_MAX_DIST,
+                 exit_vert_warn_dist = EXIT_VERT_WARN_DIST,
+                 exit_vert_max_dist = EXIT_VERT_MAX_DIST):
+
+        self.sector = sector
+        self.sep_hor_min_dist = sep_hor_min_dist
+        self.sep_hor_warn_dist = sep_hor_warn_dist
+        self.sep_vert_min_dist = sep_vert_min_dist
+        self.sep_vert_warn_dist = sep_vert_warn_dist
+        self.exit_hor_warn_dist = exit_hor_warn_dist
+        self.exit_hor_max_dist = exit_hor_max_dist
+        self.exit_vert_warn_dist = exit_vert_warn_dist
+        self.exit_vert_max_dist = exit_vert_max_dist
+        self.crossing_detector = sc.SectorCrossingDetector(sector)
+
+
+    def evaluate(self, lon, lat, alt, previous_lon, previous_lat, previous_alt,
+                 requested_flight_level, initial_flight_level, routes):
+        """
+        Computes all metrics for one snapshot of aircraft state.
+
+        Aircraft with non-finite coordinates (e.g. inactive aircraft) are ignored and receive NaN scores.
+
+        :param lon: Array of current longitudes.
+        :param lat: Array of current latitudes.
+        :param alt: Array of current altitudes (in metres).
+        :param previous_lon: Array of previous longitudes.
+        :param previous_lat: Array of previous latitudes.
+        :param previous_alt: Array of previous altitudes (in metres).
+        :param requested_flight_level: Array of requested flight levels.
+        :param initial_flight_level: Array of initial flight levels.
+        :param routes: List of aircraft routes (as returned by aviary.sector.Route.serialize).
+        :return: A dictionary holding per-aircraft score arrays:
+            - separation: the minimum pairwise separation score of each aircraft (0 if it has no neighbours)
+            - sector_exit: the sector exit score of each aircraft (NaN if it has not just exited the sector)
+            - fuel_efficiency: the fuel efficiency score of each aircraft
+          and per-pair arrays, with one element per pair of aircraft (i < j):
+            - i, j: the indices of the aircraft in the pair
+            - pair_separation: the pairwise separation score
+        """
+
+        lon, lat, alt, previous_lon, previous_lat, previous_alt, requested_flight_level, initial_flight_level = \
+            [np.asarray(a, dtype = float) for a in [lon, lat, alt, previous_lon, previous_lat, previous_alt,
+                                                    requested_flight_level, initial_flight_level]]
+
+        # Shared intermediates.
+        alt_ft = alt * utils._SCALE_METRES_TO_FEET
+        previous_alt_ft = previous_alt * utils._SCALE_METRES_TO_FEET
+        flight_level = alt_ft / 100
+        x, y = self.__project__(lon, lat)
+        valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(alt_ft)
+
+        i, j, pair_separation = self.separation_scores(lon, lat, alt_ft, x, y, valid)
+
+        separation = np.where(valid, 0.0, np.nan)
+        np.minimum.at(separation, i, pair_separation)
+        np.minimum.at(separation, j, pair_separation)
+
+        sector_exit = self.sector_exit_scores(lon, lat, alt_ft, x, y, previous_lon, previous_lat, previous_alt_ft,
+                                              requested_flight_level, routes)
+
+        fuel_efficiency = fuel_efficiency_scores(flight_level, requested_flight_level, initial_flight_level)
+
+        return {
+            SEPARATION_KEY: separation,
+            PAIR_I_KEY: i,
+            PAIR_J_KEY: j,
+            PAIR_SEPARATION_KEY: pair_separation,
+            SECTOR_EXIT_KEY: np.where(valid, sector_exit, np.nan),
+            FUEL_EFFICIENCY_KEY: np.where(valid, fuel_efficiency, np.nan)
+        }
+
+
+    def __project__(self, lon, lat):
+        """Projects arrays of coordinates into the sector's projection (in nm)"""
+
+        # Note: pyproj returns scalars for single element arrays.
+        return [np.reshape(a, lon.shape) for a in self.sector.projection(lon, lat)]
+
+
+    @staticmethod
+    def __horizontal_distance_nm__(lon1, lat1, lon2, lat2):
+        """Vectorised form of utils.horizontal_distance_nm (including the rounding to the nearest nm)"""
+
+        # Note: pyproj treats single element arrays as scalars, so the coordinates are passed as lists.
+        lon1, lat1, lon2, lat2 = [np.ravel(a).tolist() for a in [lon1, lat1, lon2, lat2]]
+        return np.round(np.asarray(utils.horizontal_distance_m(lon1, lat1, lon2, lat2)) / utils._ONE_NM)
+
+
+    def separation_scores(self, lon, lat, alt_ft, x, y, valid):
+        """
+        Computes the pairwise separation scores for all pairs of valid aircraft.
+
+        :return: A tuple (i, j, score) of arrays, with one element per pair of aircraft (i < j).
+        """
+
+        index = np.flatnonzero(valid)
+        i, j = np.triu_indices(len(index), k = 1)
+        i, j = index[i], index[j]
+
+        vert_score = sm.score_array(np.abs(alt_ft[i] - alt_ft[j]), self.sep_vert_min_dist, self.sep_vert_warn_dist)
+
+        # Pairs which may score below 0 horizontally. Note that horizontal distances are rounded to the nearest nm.
+        near = np.hypot(x[i] - x[j], y[i] - y[j]) < (self.sep_hor_warn_dist + 0.5) * _PROJECTION_TOLERANCE
+        candidate = near & (vert_score < 0)
+
+        hor_score = np.zeros(len(i))
+        if candidate.any():
+            hor_dist_nm = self.__horizontal_distance_nm__(lon[i[candidate]], lat[i[candidate]],
+                                                          lon[j[candidate]], lat[j[candidate]])
+            hor_score[candidate] = sm.score_array(hor_dist_nm, self.sep_hor_min_dist, self.sep_hor_warn_dist)
+
+        return i, j, np.maximum(hor_score, vert_score)
+
+
+    def sector_exit_scores(self, lon, lat, alt_ft, x, y, previous_lon, previous_lat, previous_alt_ft,
+                           requested_flight_level, routes):
+        """Computes the sector exit scores of all aircraft, with NaN for those that have not just exited the sector"""
+
+        previous_x, previous_y = self.__project__(previous_lon, previous_lat)
+        index = self.crossing_detector.projected_crossings(previous_x, previous_y, previous_alt_ft / 100,
+                                                           x, y, alt_ft / 100)[sc.EXIT_KEY]
+
+        ret = np.full(len(lon), np.nan)
+        if len(index) == 0:
+            return ret
+
+        # Estimate the actual sector exit position as the geodesic midpoint between the previous and current positions.
+        azimuth, _, distance = utils._WGS84.inv(lon[index], lat[index], previous_lon[index], previous_lat[index])
+        actual_lon, actual_lat, _ = utils._WGS84.fwd(lon[index], lat[index], azimuth, np.asarray(distance) / 2)
+        actual_alt_ft = (alt_ft[index] + previous_alt_ft[index]) / 2
+
+        target_lon, target_lat = np.array([exit_target(routes[k]) for k in index], dtype = float).T
+        target_alt_ft = requested_flight_level[index] * 100
+
+        hor_dist_nm = self.__horizontal_distance_nm__(target_lon, target_lat, np.reshape(actual_lon, index.shape),
+                                                      np.reshape(actual_lat, index.shape))
+        m_h = exit_score_array(hor_dist_nm, self.exit_hor_warn_dist, self.exit_hor_max_dist)
+        m_v = exit_score_array(np.abs(actual_alt_ft - target_alt_ft), self.exit_vert_warn_dist, self.exit_vert_max_dist)
+
+        ret[index] = np.minimum(m_h, m_v)
+        return ret
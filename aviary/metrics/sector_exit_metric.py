@@ -19,6 +19,8 @@ For the simplest metric, m_h and m_v take the form of v(d, c, C), a function of
  - v(d) = -(d - c)/(C - c), otherwise.
 """
 
+import numpy as np
+
 import aviary.constants as C
 # import aviary.utils.geo_helper as gh
 import aviary.metrics.utils as utils
@@ -78,6 +80,16 @@ def score(d, c, C):
     return -(d - c) / (C - c)
 
 
+def score_array(d, c, C):
+    """
+    Vectorised form of score, for an array of distances d.
+    """
+
+    assert c < C, f"Expected {c} < {C}"
+    d = np.asarray(d, dtype = float)
+    return np.where(d <= c, 0.0, np.where(d > C, -1.0, -(d - c) / (C - c)))
+
+
 def sector_exit_score(
     actual_lon,
     actual_lat,
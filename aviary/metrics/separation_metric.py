@@ -17,6 +17,8 @@ For the simplest metric, m_h and m_v take the form of v(d, c, C), a function of
  - v(d) = (d - c)/(C - c) -1, otherwise.
 """
 
+import numpy as np
+
 import aviary.metrics.utils as utils
 
 # DEFAULT THRESHOLD VALUES
@@ -46,6 +48,16 @@ def score(d, c, C):
     return (d - c) / (C - c) - 1
 
 
+def score_array(d, c, C):
+    """
+    Vectorised form of score, for an array of distances d.
+    """
+
+    assert c < C, f"Expected {c} < {C}"
+    d = np.asarray(d, dtype = float)
+    return np.where(d < c, -1.0, np.where(d >= C, 0.0, (d - c) / (C - c) - 1))
+
+
 def vertical_separation_score(
     alt1, alt2, vert_min_dist=VERT_MIN_DIST, vert_warn_dist=VERT_WARN_DIST
 ):
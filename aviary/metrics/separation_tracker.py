@@ -0,0 +1,187 @@
+"""
+Incremental separation scoring for a sequence of snapshots of aircraft state.
+
+Between consecutive snapshots aircraft move only a short distance, so the set
+of pairs which may score below 0 changes little. The tracker keeps a Verlet
+neighbour list: the pairs whose projected horizontal distance is within the
+scoring cutoff plus a horizontal skin, and whose vertical distance is within
+the vertical warning distance plus a vertical skin. Only those pairs are
+scored at each update.
+
+The list is rebuilt only when some aircraft has moved more than half of
+either skin since the last build (or the set of active aircraft changes).
+Until then, no pair outside the list can have come within the cutoffs, since
+each aircraft of the pair has moved at most half the skin. Scores are
+therefore identical to those of pairwise_separation_metric (as computed by
+the MetricsEngine); pairs outside the list score 0.
+"""
+
+import numpy as np
+
+import aviary.metrics.utils as utils
+import aviary.metrics.separation_metric as sm
+import aviary.metrics.metrics_engine as me
+
+# DEFAULT PARAMETERS
+HOR_SKIN = 2  # Horizontal skin (nm)
+VERT_SKIN = 500  # Vertical skin (ft)
+
+class SeparationTracker():
+    """
+    Tracks pairwise separation scores across consecutive snapshots of aircraft state.
+
+    Aircraft are identified by their index in the arrays passed to update, which must have the same length
+    at every update. Aircraft with non-finite coordinates (e.g. inactive aircraft) are ignored.
+
+    Args:
+        projection: A pyproj Proj instance with units of nautical miles (e.g. a SectorElement's projection attribute).
+        hor_skin (float): Horizontal skin in nautical miles (nm).
+        vert_skin (float): Vertical skin in feet (ft).
+        hor_min_dist (float): Horizontal distance threshold in nautical miles (nm).
+        hor_warn_dist (float): Horizontal distance threshold in nautical miles (nm).
+        vert_min_dist (float): Vertical distance threshold in feet (ft).
+        vert_warn_dist (float): Vertical distance threshold in feet (ft).
+
+    Attributes:
+        As Args, plus:
+        n_builds (int): The number of times the neighbour list has been built.
+    """
+
+    def __init__(self,
+                 projection,
+                 hor_skin = HOR_SKIN,
+                 vert_skin = VERT_SKIN,
+                 hor_min_dist = sm.HOR_MIN_DIST,
+                 hor_warn_dist = sm.HOR_WARN_DIST,
+                 vert_min_dist = sm.VERT_MIN_DIST,
+                 vert_warn_dist = sm.VERT_WARN_DIST):
+
+        self.projection = projection
+        self.hor_skin = hor_skin
+        self.vert_skin = vert_skin
+        self.hor_min_dist = hor_min_dist
+        self.hor_warn_dist = hor_warn_dist
+        self.vert_min_dist = vert_min_dist
+        self.vert_warn_dist = vert_warn_dist
+        self.reset()
+
+
+    def reset(self):
+        """Discards the neighbour list, so that it is rebuilt at the next update"""
+
+        self.n_builds = 0
+        self._i = self._j = None
+        self._x = self._y = self._alt_ft = self._valid = None
+
+
+    def hor_cutoff(self):
+        """
+        The projected horizontal distance beyond which pairs score 0 horizontally.
+
+        Horizontal distances are rounded to the nearest nm, and the projection's scale error is allowed for.
+        """
+
+        return (self.hor_warn_dist + 0.5) * me._PROJECTION_TOLERANCE
+
+
+    def neighbours(self):
+        """Returns the current neighbour list, as a pair (i, j) of index arrays with i < j"""
+
+        return self._i, self._j
+
+
+    def update(self, lon, lat, alt):
+        """
+        Computes the separation scores for a snapshot of aircraft state.
+
+        :param lon: Array of current longitudes.
+        :param lat: Array of current latitudes.
+        :param alt: Array of current altitudes (in metres).
+        :return: A dictionary holding:
+            - separation: the minimum pairwise separation score of each aircraft (0 if it has no neighbours)
+          and per-pair arrays, with one element per pair in the neighbour list (i < j), all other pairs scoring 0:
+            - i, j: the indices of the aircraft in the pair
+            - pair_separation: the pairwise separation score
+        """
+
+        lon, lat, alt = [np.asarray(a, dtype = float) for a in [lon, lat, alt]]
+
+        alt_ft = alt * utils._SCALE_METRES_TO_FEET
+        # Note: pyproj returns scalars for single element arrays.
+        x, y = [np.reshape(a, lon.shape) for a in self.projection(lon, lat)]
+        valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(alt_ft)
+
+        if self.__needs_build__(x, y, alt_ft, valid):
+            self.__build__(x, y, alt_ft, valid)
+
+        i, j = self._i, self._j
+
+        vert_score = sm.score_array(np.abs(alt_ft[i] - alt_ft[j]), self.vert_min_dist, self.vert_warn_dist)
+        near = np.hypot(x[i] - x[j], y[i] - y[j]) < self.hor_cutoff()
+        candidate = near & (vert_score < 0)
+
+        hor_score = np.zeros(len(i))
+        if candidate.any():
+            hor_dist_nm = me.MetricsEngine.__horizontal_distance_nm__(lon[i[candidate]], lat[i[candidate]],
+                                                                      lon[j[candidate]], lat[j[candidate]])
+            hor_score[candidate] = sm.score_array(hor_dist_nm, self.hor_min_dist, self.hor_warn_dist)
+
+        pair_separation = np.maximum(hor_score, vert_score)
+
+        separation = np.where(valid, 0.0, np.nan)
+        np.minimum.at(separation, i, pair_separation)
+        np.minimum.at(separation, j, pair_separation)
+
+        return {
+            me.SEPARATION_KEY: separation,
+            me.PAIR_I_KEY: i,
+            me.PAIR_J_KEY: j,
+            me.PAIR_SEPARATION_KEY: pair_separation
+        }
+
+
+    def __needs_build__(self, x, y, alt_ft, valid):
+        """Determines whether the neighbour list must be rebuilt"""
+
+        if self._valid is None or len(valid) != len(self._valid) or np.any(valid != self._valid):
+            return True
+
+        # The maximum displacement of any valid aircraft since the last build.
+        hor_displacement = np.hypot(x[valid] - self._x[valid], y[valid] - self._y[valid])
+        vert_displacement = np.abs(alt_ft[valid] - self._alt_ft[valid])
+        return np.any(hor_displacement > self.hor_skin / 2) or np.any(vert_displacement > self.vert_skin / 2)
+
+
+    def __build__(self, x, y, alt_ft, valid):
+        """
+        Builds the neighbour list by sweeping over the aircraft in order of x coordinate.
+
+        At each offset k, every aircraft is paired with the k-th next aircraft in that order, until no such
+        pair is within the horizontal cutoff in x. Only pairs close in x are ever considered.
+        """
+
+        hor_cutoff = self.hor_cutoff() + self.hor_skin
+        vert_cutoff = self.vert_warn_dist + self.vert_skin
+
+        index = np.flatnonzero(valid)
+        order = index[np.argsort(x[index], kind = "stable")]
+        xs = x[order]
+
+        i, j = [], []
+        for k in range(1, len(order)):
+            close = xs[k:] - xs[:-k] < hor_cutoff
+            if not close.any():
+                break
+            a, b = order[:-k][close], order[k:][close]
+            keep = (np.hypot(x[a] - x[b], y[a] - y[b]) < hor_cutoff) & (np.abs(alt_ft[a] - alt_ft[b]) < vert_cutoff)
+            i.append(np.minimum(a[keep], b[keep]))
+            j.append(np.maximum(a[keep], b[keep]))
+
+        i = np.concatenate(i) if i else np.zeros(0, dtype = int)
+        j = np.concatenate(j) if j else np.zeros(0, dtype = int)
+
+        # Order the pairs lexicographically, for consistency with the MetricsEngine.
+        pairs = np.lexsort((j, i))
+        self._i, self._j = i[pairs], j[pairs]
+        self._x, self._y, self._alt_ft, self._valid = x.copy(), y.copy(), alt_ft.copy(), valid.copy()
+        self.n_builds += 1
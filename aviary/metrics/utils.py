@@ -1,11 +1,13 @@
 
 from pyproj import Geod
 
+import aviary.constants as C
+
 _WGS84 = Geod(ellps="WGS84")
 
 _SCALE_METRES_TO_FEET = 3.280839895
 
-_ONE_NM = 1852  # Meters
+_ONE_NM = C.METRES_PER_NM  # Meters
 
 
 def horizontal_distance_m(lon1, lat1, lon2, lat2):
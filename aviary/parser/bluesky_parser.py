@@ -61,6 +61,7 @@ class BlueskyParser(SectorParser):
             raise ValueError(f"Scenario json must contain {sg.AIRCRAFT_KEY} element")
 
         self.scenario = scenario
+        self._aircraft_by_callsign = None
 
     def polyalt_lines(self):
         """
@@ -223,6 +224,20 @@ class BlueskyParser(SectorParser):
                 f.write("%s\n" % item)
         return file
 
+    def aircraft_by_callsign(self):
+        """
+        Returns a dictionary of the lists of aircraft JSON elements with each callsign.
+
+        The dictionary is computed once, since the JSON path query is slow relative to the lookup.
+        """
+
+        if self._aircraft_by_callsign is None:
+            self._aircraft_by_callsign = {}
+            for aircraft in jp.match("$..{}".format(sg.AIRCRAFT_KEY), self.scenario)[0]:
+                self._aircraft_by_callsign.setdefault(aircraft[sg.CALLSIGN_KEY], []).append(aircraft)
+
+        return self._aircraft_by_callsign
+
     def aircraft_property(self, callsign, property_key):
         """
         Parses the JSON scenario definition to extract a particular JSON element for the given aircraft.
@@ -230,11 +245,7 @@ class BlueskyParser(SectorParser):
         """
 
         try:
-            ret = [
-                aircraft[property_key]
-                for aircraft in jp.match("$..{}".format(sg.AIRCRAFT_KEY), self.scenario)[0]
-                if aircraft[sg.CALLSIGN_KEY] == callsign
-            ]
+            ret = [aircraft[property_key] for aircraft in self.aircraft_by_callsign().get(callsign, [])]
         except Exception:
             raise ValueError(f'Failed to find property {property_key} for aircraft {callsign}.')
 
@@ -137,12 +137,17 @@ class SectorParser:
         Returns the sector polygon as shapely.Polygon.
         """
 
-        polygons = self.polygon_geometries()
+        # Stacked sector volumes share the same polygon.
+        polygons = []
+        for polygon in self.polygon_geometries():
+            if polygon[C.COORDINATES_KEY] not in polygons:
+                polygons.append(polygon[C.COORDINATES_KEY])
+
         if len(polygons) != 1:
             raise Exception(
                 f"Expected precisely one polygon; found {len(polygons)} polygons."
             )
-        return geom.Polygon(polygons[0]['coordinates'][0])
+        return geom.Polygon(polygons[0][0])
 
     def sector_name(self):
         """
@@ -183,6 +188,15 @@ class SectorParser:
 
         return int(self.properties_of_type(type_value=C.SECTOR_VOLUME_VALUE)[0][C.UPPER_LIMIT_KEY])
 
+    def sector_volumes(self):
+        """
+        Returns the flight level limits of the (stacked) sector volumes.
+        :return: a list of (lower_limit, upper_limit) pairs of integers.
+        """
+
+        return [(int(volume[C.LOWER_LIMIT_KEY]), int(volume[C.UPPER_LIMIT_KEY]))
+                for volume in self.sector_volume_properties()]
+
     # def sector_length_nm(self):
     #     """
     #     Returns the parsed sector length.
@@ -0,0 +1,194 @@
+"""
+Catalogue of airports, for assigning plausible departure and destination airports to routes.
+
+Departure airports are sampled from those upstream of a route: within a
+range of distances of its first fix and in the direction opposite to its
+initial bearing (within a sector of half-angle HALF_ANGLE). Destination
+airports are sampled likewise from those downstream of its last fix, in the
+direction of its final bearing. If there are no such airports, the airport
+nearest the fix is used.
+
+Airports are indexed by a k-d tree of their coordinates on the unit sphere,
+in which the straight-line (chord) distance increases with the great circle
+distance, so the airports in range of a fix are found by a radius query.
+The candidate airports of each route are cached as alias tables (keyed by the
+route's content hash), so each assignment after the first is a single draw.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from aviary.utils.alias_table import AliasTable
+from aviary.utils.hash_helper import HashHelper
+from aviary.utils.kd_tree import KDTree
+
+# DEFAULT PARAMETERS
+MIN_DISTANCE_NM = 50
+MAX_DISTANCE_NM = 1000
+HALF_ANGLE = 45  # Degrees
+
+# CONSTANTS
+EARTH_RADIUS_NM = 3440.065
+
+# CSV columns
+CODE_COLUMN = "code"
+LATITUDE_COLUMN = "latitude"
+LONGITUDE_COLUMN = "longitude"
+WEIGHT_COLUMN = "weight"
+
+class AirportCatalogue():
+    """
+    A catalogue of airports, indexed by location.
+
+    Args:
+        airports (DataFrame): The airport codes, latitudes and longitudes, and optionally their relative
+            weights (e.g. traffic volumes), in the columns named by CODE_COLUMN, LATITUDE_COLUMN,
+            LONGITUDE_COLUMN and WEIGHT_COLUMN.
+        min_distance_nm (float): The minimum distance of an airport from the end of a route.
+        max_distance_nm (float): The maximum distance of an airport from the end of a route.
+        half_angle (float): The half-angle in degrees of the sector, centred on the route's bearing, in which
+            airports are sampled.
+
+    Attributes:
+        As Args, and:
+        codes (list): The airport codes.
+        latitudes (np.ndarray): The airport latitudes.
+        longitudes (np.ndarray): The airport longitudes.
+        weights (np.ndarray): The airport weights (all one by default).
+        tree (KDTree): Index of the airport coordinates on the unit sphere.
+    """
+
+    def __init__(self, airports, min_distance_nm = MIN_DISTANCE_NM, max_distance_nm = MAX_DISTANCE_NM,
+                 half_angle = HALF_ANGLE):
+
+        for column in [CODE_COLUMN, LATITUDE_COLUMN, LONGITUDE_COLUMN]:
+            if column not in airports.columns:
+                raise ValueError(f'No column named {column} in airports: {list(airports.columns)}')
+        if len(airports) == 0:
+            raise ValueError('An airport catalogue requires at least one airport.')
+
+        self.codes = airports[CODE_COLUMN].astype(str).tolist()
+        self.latitudes = np.asarray(airports[LATITUDE_COLUMN], dtype = float)
+        self.longitudes = np.asarray(airports[LONGITUDE_COLUMN], dtype = float)
+        self.weights = np.asarray(airports[WEIGHT_COLUMN], dtype = float) if WEIGHT_COLUMN in airports.columns \
+            else np.ones(len(self.codes))
+
+        self.min_distance_nm = min_distance_nm
+        self.max_distance_nm = max_distance_nm
+        self.half_angle = half_angle
+
+        self.tree = KDTree(AirportCatalogue.unit_vectors(self.longitudes, self.latitudes))
+
+        # Alias tables of the departure and destination airports of each route, keyed by route content hash.
+        self._departures = {}
+        self._destinations = {}
+
+
+    def __len__(self):
+
+        return len(self.codes)
+
+
+    @staticmethod
+    def from_csv(filename, **kwargs):
+        """
+        Returns an airport catalogue read from a CSV file with a header row.
+
+        :param filename: The CSV file name (or a file-like object).
+        :param kwargs: Keyword arguments passed to the AirportCatalogue constructor.
+        """
+
+        return AirportCatalogue(pd.read_csv(filename, skipinitialspace = True), **kwargs)
+
+
+    @staticmethod
+    def unit_vectors(lon, lat):
+        """Returns the (x, y, z) coordinates on the unit sphere of arrays of longitudes and latitudes"""
+
+        lon, lat = np.radians(lon), np.radians(lat)
+        return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis = -1)
+
+
+    @staticmethod
+    def bearings(lon1, lat1, lon2, lat2):
+        """Returns the initial great circle bearings in degrees (clockwise from north) from one point to others"""
+
+        lon1, lat1, lon2, lat2 = np.radians(lon1), np.radians(lat1), np.radians(lon2), np.radians(lat2)
+        x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(lon2 - lon1)
+        return np.degrees(np.arctan2(np.sin(lon2 - lon1) * np.cos(lat2), x))
+
+
+    def candidates(self, lon, lat, bearing = None):
+        """
+        Returns the indices of the airports in range of a point, in the direction of a bearing.
+
+        :param lon: Longitude of the point.
+        :param lat: Latitude of the point.
+        :param bearing: (optional) The bearing in degrees. If None, airports in any direction are returned.
+        :return: A sorted integer array.
+        """
+
+        point = AirportCatalogue.unit_vectors(lon, lat)
+        radius = 2 * math.sin(min(self.max_distance_nm / EARTH_RADIUS_NM, math.pi) / 2)
+        index = self.tree.query_radius(point, radius)
+
+        # Great circle distances, from the chord lengths.
+        chords = np.linalg.norm(self.tree.points[index] - point, axis = 1)
+        distances = 2 * np.arcsin(np.minimum(chords / 2, 1)) * EARTH_RADIUS_NM
+        index = index[distances >= self.min_distance_nm]
+
+        if bearing is not None:
+            angles = AirportCatalogue.bearings(lon, lat, self.longitudes[index], self.latitudes[index]) - bearing
+            index = index[np.abs((angles + 180) % 360 - 180) <= self.half_angle]
+
+        return index
+
+
+    def __table__(self, lon, lat, bearing):
+        """Returns an alias table of the (weighted) airports in range of a point, or of the nearest airport"""
+
+        index = self.candidates(lon, lat, bearing)
+        index = index[self.weights[index] > 0]
+        if len(index) == 0:
+            return AliasTable({self.codes[self.tree.nearest(AirportCatalogue.unit_vectors(lon, lat))[0]]: 1})
+        return AliasTable({self.codes[k]: self.weights[k] for k in index})
+
+
+    @staticmethod
+    def __bearing__(start, end):
+        """Returns the bearing at a route end away from the route, given its end and neighbouring fixes (or None)"""
+
+        if start.equals(end):
+            return None
+        return float(AirportCatalogue.bearings(start.x, start.y, end.x, end.y)) + 180
+
+
+    def departure(self, route):
+        """Returns a random airport upstream of a route's first fix"""
+
+        key = route.content_hash()
+        if key not in self._departures:
+            points = route.fix_points()
+            bearing = AirportCatalogue.__bearing__(points[0], points[1]) if len(points) > 1 else None
+            self._departures[key] = self.__table__(points[0].x, points[0].y, bearing)
+        return self._departures[key].draw()
+
+
+    def destination(self, route):
+        """Returns a random airport downstream of a route's last fix"""
+
+        key = route.content_hash()
+        if key not in self._destinations:
+            points = route.fix_points()
+            bearing = AirportCatalogue.__bearing__(points[-1], points[-2]) if len(points) > 1 else None
+            self._destinations[key] = self.__table__(points[-1].x, points[-1].y, bearing)
+        return self._destinations[key].draw()
+
+
+    def content_hash(self) -> str:
+        """Returns a stable hash of the airports and parameters (excluding the cached candidates)"""
+
+        return HashHelper.content_hash(self.codes, self.latitudes, self.longitudes, self.weights,
+                                       self.min_distance_nm, self.max_distance_nm, self.half_angle)
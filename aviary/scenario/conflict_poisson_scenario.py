@@ -0,0 +1,281 @@
+"""
+Scenario generation algorithm with Poisson aircraft arrivals and a target number of conflicts.
+
+Candidate scenarios of Poisson traffic are drawn and the number of pairs of
+aircraft predicted to lose separation is counted, until a candidate with the
+requested number of conflicts is found or the time budget is exhausted.
+
+Conflicts are predicted by assuming that each aircraft flies its route at its
+initial flight level and at the trajectory predictor's cruise speed for that
+level. Aircraft positions along the routes are computed in closed form at
+regular sample times, and the closest point of approach of each pair within
+each sample interval is computed assuming straight-line motion. Only pairs
+which are vertically closer than the minimum separation distance and which are
+in the sector at the same time are considered.
+
+Aircraft start times are those assigned by the scenario generator, i.e. each
+aircraft starts at its own timedelta after the scenario start time.
+"""
+
+import math
+import random
+import time
+import warnings
+
+import numpy as np
+
+import aviary.constants as C
+import aviary.scenario.scenario_generator as sg
+import aviary.trajectory.trajectory_predictor as tp
+
+from aviary.scenario.poisson_scenario import PoissonScenario
+from aviary.metrics.separation_metric import HOR_MIN_DIST, VERT_MIN_DIST
+
+# DEFAULT PARAMETERS
+TIME_BUDGET = 5  # Seconds
+SAMPLE_INTERVAL = 10  # Seconds
+
+# CONSTANTS
+FEET_PER_FLIGHT_LEVEL = 100
+SECONDS_PER_HOUR = 60 * 60
+
+# Candidate keys
+TIMEDELTA_KEY = "timedelta"
+ROUTE_INDEX_KEY = "route_index"
+FLIGHT_LEVEL_KEY = "flight_level"
+REQUESTED_FLIGHT_LEVEL_KEY = "requested_flight_level"
+AIRCRAFT_TYPE_INDEX_KEY = "aircraft_type_index"
+
+class ConflictPoissonScenario(PoissonScenario):
+    """
+    A Poisson scenario generator for I, X, Y airspace sectors, targeting a given number of conflicts.
+
+    Exactly one of target_conflicts and conflict_rate must be given.
+
+    Args:
+        arrival_rate (float): The mean rate of aircraft arrivals per second.
+        trajectory_predictor: Trajectory predictor offering cruise speed estimates.
+        duration (float): The scenario duration in seconds, which should match that passed to the scenario generator.
+        target_conflicts (int): The target number of conflicts (pairs of aircraft predicted to lose separation).
+        conflict_rate (float): The target number of conflicts per hour.
+        tolerance (int): The permitted difference between the number of conflicts and the target.
+        time_budget (float): The time in seconds after which, if no candidate has met the target, the best candidate is used.
+        max_candidates (int): (optional) The maximum number of candidates to draw.
+        sample_interval (float): The interval in seconds between the sample times used to predict conflicts.
+        hor_min_dist (float): Horizontal separation threshold in nautical miles (nm).
+        vert_min_dist (float): Vertical separation threshold in feet (ft).
+
+    Attributes:
+        As Args.
+    """
+
+    def __init__(self,
+                 arrival_rate,
+                 trajectory_predictor = tp.global_trajectory_predictor,
+                 duration = SECONDS_PER_HOUR,
+                 target_conflicts = None,
+                 conflict_rate = None,
+                 tolerance = 0,
+                 time_budget = TIME_BUDGET,
+                 max_candidates = None,
+                 sample_interval = SAMPLE_INTERVAL,
+                 hor_min_dist = HOR_MIN_DIST,
+                 vert_min_dist = VERT_MIN_DIST,
+                 **kwargs):
+
+        # Pass the keyword args (including the random seed) to the superclass constructor.
+        super().__init__(arrival_rate = arrival_rate, **kwargs)
+
+        if (target_conflicts is None) == (conflict_rate is None):
+            raise ValueError('Exactly one of target_conflicts and conflict_rate must be given.')
+
+        if trajectory_predictor is None:
+            warnings.warn("Uninitialised global trajectory predictor in use.")
+
+        self.trajectory_predictor = trajectory_predictor
+        self.duration = duration
+        self.target_conflicts = target_conflicts
+        self.conflict_rate = conflict_rate
+        self.tolerance = tolerance
+        self.time_budget = time_budget
+        self.max_candidates = max_candidates
+        self.sample_interval = sample_interval
+        self.hor_min_dist = hor_min_dist
+        self.vert_min_dist = vert_min_dist
+
+
+    def target(self):
+        """Returns the target number of conflicts"""
+
+        if self.target_conflicts is not None:
+            return self.target_conflicts
+        return self.conflict_rate * self.duration / SECONDS_PER_HOUR
+
+
+    # Overriding abstract method
+    def aircraft_generator(self) -> dict:
+        """
+        Generates a sequence of aircraft constituting a scenario with the target number of conflicts.
+
+        The sequence continues with unconstrained Poisson traffic beyond the scenario duration.
+        """
+
+        routes = self.truncated_routes()
+        candidate = self.select_candidate(routes)
+
+        for i in range(len(candidate[TIMEDELTA_KEY])):
+            route, start_position, _ = routes[candidate[ROUTE_INDEX_KEY][i]]
+            yield {
+                sg.AIRCRAFT_TIMEDELTA_KEY: float(candidate[TIMEDELTA_KEY][i]),
+                sg.START_POSITION_KEY: start_position,
+                sg.CALLSIGN_KEY: next(self.callsign_generator()),
+                sg.AIRCRAFT_TYPE_KEY: self.aircraft_types[candidate[AIRCRAFT_TYPE_INDEX_KEY][i]],
+                sg.DEPARTURE_KEY: self.departure_airport(route),
+                sg.DESTINATION_KEY: self.destination_airport(route),
+                sg.CURRENT_FLIGHT_LEVEL_KEY: int(candidate[FLIGHT_LEVEL_KEY][i]),
+                sg.CLEARED_FLIGHT_LEVEL_KEY: int(candidate[FLIGHT_LEVEL_KEY][i]),
+                sg.REQUESTED_FLIGHT_LEVEL_KEY: int(candidate[REQUESTED_FLIGHT_LEVEL_KEY][i]),
+                sg.ROUTE_KEY: route.serialize(),
+            }
+
+        yield from super().aircraft_generator()
+
+
+    def truncated_routes(self):
+        """
+        Returns a list of (route, start position, path) tuples, one per route from which routes are drawn (the
+        route network's routes, if any, otherwise the sector routes, ordered as their route weights), where the
+        route is truncated to exclude its starting fix and the path is an (xy, distances) pair of arrays holding
+        the projected route points (in nm) from the start position and the cumulative distance along the route
+        to each point.
+        """
+
+        ret = []
+        for route in [self.route_at(k) for k in range(len(self.__route_keys__()))]:
+            xy = np.array([point.coords[0] for point in route.fix_points(unprojected = True)], dtype = float)
+            distances = np.concatenate([[0], np.cumsum(np.hypot(*np.diff(xy, axis = 0).T))])
+
+            start_position = route.fix_points()[0].coords[0]
+            route = route.truncated(initial_lat = start_position[1], initial_lon = start_position[0])
+            ret.append((route, start_position, (xy, distances)))
+        return ret
+
+
+    def select_candidate(self, routes):
+        """
+        Draws candidate scenarios until one meets the target number of conflicts (within the tolerance),
+        or the time budget or maximum number of candidates is exhausted, in which case the candidate
+        closest to the target is returned.
+        """
+
+        target = self.target()
+        deadline = time.perf_counter() + self.time_budget
+
+        best, best_error = None, math.inf
+        n_candidates = 0
+        while True:
+            candidate = self.draw_candidate(n_routes = len(routes))
+            error = abs(self.count_conflicts(candidate, routes) - target)
+            n_candidates += 1
+
+            if error < best_error:
+                best, best_error = candidate, error
+            if best_error <= self.tolerance:
+                return best
+
+            if time.perf_counter() > deadline or \
+                    (self.max_candidates is not None and n_candidates >= self.max_candidates):
+                warnings.warn(f'No scenario within tolerance of the target number of conflicts was found after {n_candidates} candidates.')
+                return best
+
+
+    def draw_candidate(self, n_routes):
+        """
+        Draws a candidate scenario, as a dictionary of arrays of aircraft properties, in a single batch.
+
+        The random draws are seeded from the global random state, so candidates are reproducible given the seed.
+        """
+
+        rng = np.random.default_rng(random.getrandbits(64))
+
+        # Draw interarrival times until the total exceeds the duration, as in the scenario generator.
+        # The final aircraft (which ends the scenario) is retained, so the scenario generator stops there.
+        batch_size = max(1, int(self.arrival_rate * self.duration * 1.5) + 10)
+        timedeltas = rng.exponential(1 / self.arrival_rate, size = batch_size)
+        while timedeltas.sum() <= self.duration:
+            timedeltas = np.concatenate([timedeltas, rng.exponential(1 / self.arrival_rate, size = batch_size)])
+        n = int(np.searchsorted(np.cumsum(timedeltas), self.duration, side = "right")) + 1
+
+        flight_levels = np.asarray(self.flight_levels)
+
+        return {
+            TIMEDELTA_KEY: timedeltas[:n],
+            ROUTE_INDEX_KEY: self.sample_indices(self.route_weights, n_routes, n, rng),
+            FLIGHT_LEVEL_KEY: flight_levels[self.sample_indices(self.flight_level_weights, len(flight_levels), n, rng)],
+            REQUESTED_FLIGHT_LEVEL_KEY: flight_levels[self.sample_indices(self.flight_level_weights, len(flight_levels), n, rng)],
+            AIRCRAFT_TYPE_INDEX_KEY: self.sample_indices(self.aircraft_type_weights, len(self.aircraft_types), n, rng)
+        }
+
+
+    def count_conflicts(self, candidate, routes):
+        """Returns the number of pairs of aircraft in a candidate scenario which are predicted to lose separation"""
+
+        # Exclude the final aircraft, which starts after the end of the scenario.
+        n = len(candidate[TIMEDELTA_KEY]) - 1
+        if n < 2:
+            return 0
+
+        # Aircraft start times as assigned by the scenario generator (in whole seconds).
+        start_times = np.floor(candidate[TIMEDELTA_KEY][:n])
+        route_index = candidate[ROUTE_INDEX_KEY][:n]
+        flight_levels = candidate[FLIGHT_LEVEL_KEY][:n]
+        speeds = self.cruise_speeds(flight_levels, candidate[AIRCRAFT_TYPE_INDEX_KEY][:n]) / C.METRES_PER_NM
+
+        paths = [path for _, _, path in routes]
+        lengths = np.array([distances[-1] for _, distances in paths])[route_index]
+        end_times = start_times + lengths / speeds
+
+        # Candidate pairs: vertically close and in the sector at the same time.
+        i, j = np.triu_indices(n, k = 1)
+        keep = (np.abs(flight_levels[i] - flight_levels[j]) * FEET_PER_FLIGHT_LEVEL < self.vert_min_dist) & \
+               (start_times[i] < end_times[j]) & (start_times[j] < end_times[i])
+        i, j = i[keep], j[keep]
+        if len(i) == 0:
+            return 0
+
+        # Aircraft positions at the sample times (NaN when not in the sector).
+        t = np.arange(start_times.min(), end_times.max() + self.sample_interval, self.sample_interval)
+        s = (t[:, np.newaxis] - start_times) * speeds
+        x = np.full(s.shape, np.nan)
+        y = np.full(s.shape, np.nan)
+        for r, (xy, distances) in enumerate(paths):
+            cols = route_index == r
+            x[:, cols] = np.interp(s[:, cols], distances, xy[:, 0])
+            y[:, cols] = np.interp(s[:, cols], distances, xy[:, 1])
+        outside = (s < 0) | (s > lengths)
+        x[outside] = np.nan
+        y[outside] = np.nan
+
+        # Closest approach within each sample interval, assuming straight-line relative motion.
+        dx, dy = x[:, j] - x[:, i], y[:, j] - y[:, i]
+        dx0, dy0 = dx[:-1], dy[:-1]
+        ddx, ddy = dx[1:] - dx0, dy[1:] - dy0
+        dd2 = ddx * ddx + ddy * ddy
+        with np.errstate(invalid = "ignore"):
+            u = np.clip(np.divide(-(dx0 * ddx + dy0 * ddy), dd2, out = np.zeros(dd2.shape), where = dd2 > 0), 0, 1)
+            d = np.hypot(dx0 + u * ddx, dy0 + u * ddy)
+
+        d_min = np.where(np.isnan(d), np.inf, d).min(axis = 0)
+        return int((d_min < self.hor_min_dist).sum())
+
+
+    def cruise_speeds(self, flight_levels, aircraft_type_index):
+        """Returns an array of cruise speeds in metres per second, by flight level and aircraft type index"""
+
+        speeds = {}
+        ret = np.empty(len(flight_levels))
+        for k, (flight_level, type_index) in enumerate(zip(flight_levels.tolist(), aircraft_type_index.tolist())):
+            if (flight_level, type_index) not in speeds:
+                speeds[(flight_level, type_index)] = self.trajectory_predictor.cruise_speed(flight_level, self.aircraft_types[type_index])
+            ret[k] = speeds[(flight_level, type_index)]
+        return ret
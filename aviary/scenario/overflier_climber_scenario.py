@@ -49,8 +49,7 @@ class OverflierClimberScenario(ScenarioAlgorithm):
         overflier_destination = self.destination_airport(overflier_route)
 
         # Construct the climber's route, which is the reverse of the overflier's.
-        climber_route = overflier_route.copy()
-        climber_route.reverse()
+        climber_route = overflier_route.reversed()
 
         # Select the flight levels.
         overflier_flight_level = self.overflier_flight_level()
@@ -84,7 +83,7 @@ class OverflierClimberScenario(ScenarioAlgorithm):
         o_initial_lon, o_initial_lat = GeoHelper.waypoint_location(lat1, lon1, o_lat2, o_lon2, overflier_horizontal_distance)
 
         # Truncate the route in light of the modified starting position.
-        overflier_route.truncate(initial_lat = o_initial_lat, initial_lon = o_initial_lon)
+        overflier_route = overflier_route.truncated(initial_lat = o_initial_lat, initial_lon = o_initial_lon)
 
         # Construct the overflier.
         yield {
@@ -111,7 +110,7 @@ class OverflierClimberScenario(ScenarioAlgorithm):
         c_initial_lon, c_initial_lat = GeoHelper.waypoint_location(lat1, lon1, c_lat2, c_lon2, climber_horizontal_distance)
 
         # Truncate the route in light of the modified starting position.
-        climber_route.truncate(initial_lat = c_initial_lat, initial_lon = c_initial_lon)
+        climber_route = climber_route.truncated(initial_lat = c_initial_lat, initial_lon = c_initial_lon)
 
         yield {
             sg.AIRCRAFT_TIMEDELTA_KEY: 0,
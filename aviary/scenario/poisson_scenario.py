@@ -26,13 +26,13 @@ class PoissonScenario(ScenarioAlgorithm):
 
         while True:
             current_flight_level = int(self.flight_level())
-            route = self.route().copy()
+            route = self.route()
             start_position = route.fix_points()[0].coords[0]
             departure = self.departure_airport(route)
             destination = self.destination_airport(route)
             # truncate the route i.e. remove the starting position fix
             # note coords of start_position are in lon/lat order
-            route.truncate(initial_lat=start_position[1], initial_lon=start_position[0])
+            route = route.truncated(initial_lat=start_position[1], initial_lon=start_position[0])
             yield {
                 sg.AIRCRAFT_TIMEDELTA_KEY: random.expovariate(lambd=self.arrival_rate),
                 sg.START_POSITION_KEY: start_position,
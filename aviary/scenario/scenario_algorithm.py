@@ -9,9 +9,23 @@ from abc import ABC, abstractmethod
 
 import random
 
+from aviary.utils.alias_table import AliasTable
+from aviary.utils.hash_helper import HashHelper
+
+# Optional parameters which are excluded from the content hash when absent, so that algorithms
+# without them hash as before they were supported.
+OPTIONAL_PARAMS = ["route_network", "route_weights", "aircraft_type_weights", "flight_level_weights",
+                   "callsign_prefix_weights", "airport_catalogue"]
 
 class ScenarioAlgorithm(ABC):
-    """A scenario generation algorithm"""
+    """
+    A scenario generation algorithm.
+
+    Routes, aircraft types, flight levels and callsign prefixes are drawn uniformly at random, unless
+    weights are given. Weights may be a dictionary keyed by value, or the name of a CSV file of values
+    and weights (see AliasTable.read_weights). Route weights are keyed by (entry fix name, exit fix name);
+    routes without a weight are never drawn. Weighted draws take constant time, via precomputed alias tables.
+    """
 
     # Default parameters:
     default_aircraft_types = ["B77W", "A320", "A346"] # Types of aircraft available (by default).
@@ -19,7 +33,9 @@ class ScenarioAlgorithm(ABC):
     default_callsign_prefixes = ["SPEEDBIRD", "VJ", "DELTA", "EZY"]
 
     def __init__(
-        self, sector_element, aircraft_types=None, flight_levels=None, callsign_prefixes=None, seed=None
+        self, sector_element, aircraft_types=None, flight_levels=None, callsign_prefixes=None, seed=None,
+        route_network=None, route_weights=None, aircraft_type_weights=None, flight_level_weights=None,
+        callsign_prefix_weights=None, airport_catalogue=None
     ):
 
         self.seed = seed
@@ -30,17 +46,87 @@ class ScenarioAlgorithm(ABC):
         self.sector_element = sector_element
         self.seen_callsigns = set()
 
-        if aircraft_types is None:
-            aircraft_types = ScenarioAlgorithm.default_aircraft_types
-        self.aircraft_types = aircraft_types
+        # Optional RouteNetwork from which routes are drawn, instead of the sector element routes.
+        self.route_network = route_network
+
+        # Optional AirportCatalogue from which departure and destination airports are drawn.
+        self.airport_catalogue = airport_catalogue
+
+        # Weighted values replace the defaults.
+        self.aircraft_type_weights = ScenarioAlgorithm.alias_table(aircraft_type_weights)
+        self.flight_level_weights = ScenarioAlgorithm.alias_table(flight_level_weights)
+        self.callsign_prefix_weights = ScenarioAlgorithm.alias_table(callsign_prefix_weights)
+
+        self.aircraft_types = ScenarioAlgorithm.__population__(aircraft_types, self.aircraft_type_weights,
+                                                               ScenarioAlgorithm.default_aircraft_types)
+        self.flight_levels = ScenarioAlgorithm.__population__(flight_levels, self.flight_level_weights,
+                                                              ScenarioAlgorithm.default_flight_levels)
+        self.callsign_prefixes = ScenarioAlgorithm.__population__(callsign_prefixes, self.callsign_prefix_weights,
+                                                                  ScenarioAlgorithm.default_callsign_prefixes)
+
+        self.route_weights = self.__route_weights__(route_weights)
+
+    @staticmethod
+    def alias_table(weights):
+        """Returns an alias table from weights given as a dictionary or a CSV file name (or None)"""
+
+        if weights is None:
+            return None
+        if not isinstance(weights, dict):
+            weights = AliasTable.read_weights(weights)
+        return AliasTable(weights)
+
+    @staticmethod
+    def __population__(values, weights, default):
+        """Returns the values to be drawn, given the (optional) values, weights and default values"""
+
+        if weights is None:
+            return default if values is None else values
+
+        if values is not None and sorted(values) != sorted(weights.values):
+            raise ValueError(f'Weighted values {weights.values} do not match the given values {values}')
+        return list(weights.values)
+
+    def __route_keys__(self):
+        """Returns the (entry fix name, exit fix name) of each of the routes from which routes are drawn"""
+
+        if self.route_network is not None:
+            names = self.route_network.fix_names
+            return [(names[entry], names[exit]) for entry, exit in zip(*self.route_network.route_pairs())]
+
+        # Note: use the sector routes() method, *not* the shape routes().
+        return [(route.fix_names()[0], route.fix_names()[-1]) for route in self.sector_element.routes()]
+
+    def __route_weights__(self, route_weights):
+        """Returns an alias table of route indices, from weights keyed by (entry fix name, exit fix name)"""
+
+        if route_weights is None:
+            return None
+        if not isinstance(route_weights, dict):
+            route_weights = AliasTable.read_weights(route_weights)
 
-        if flight_levels is None:
-            flight_levels = ScenarioAlgorithm.default_flight_levels
-        self.flight_levels = flight_levels
+        keys = self.__route_keys__()
+        unknown = set(route_weights).difference(keys)
+        if unknown:
+            raise ValueError(f'No routes exist between the fixes {sorted(unknown)}')
 
-        if callsign_prefixes is None:
-            callsign_prefixes = ScenarioAlgorithm.default_callsign_prefixes
-        self.callsign_prefixes = callsign_prefixes
+        return AliasTable({k: route_weights.get(key, 0) for k, key in enumerate(keys)})
+
+    @staticmethod
+    def sample_indices(weights, n, size, rng):
+        """
+        Returns the indices of a batch of random values, for vectorised generators.
+
+        :param weights: An alias table of the values, or None if they are drawn uniformly.
+        :param n: The number of values.
+        :param size: The number of draws.
+        :param rng: A numpy Generator.
+        :return: An integer numpy array.
+        """
+
+        if weights is None:
+            return rng.integers(n, size=size)
+        return weights.sample_indices(size, rng=rng)
 
     @property
     def aircraft_types(self):
@@ -98,29 +184,64 @@ class ScenarioAlgorithm(ABC):
         After resetting, duplicate callsigns (with the set generated before the reset) may occur."""
         self.seen_callsigns = set()
 
+    def content_hash(self):
+        """
+        Returns a stable hash of the algorithm's class and parameters, including its sector element
+        and any trajectory predictor. Transient state (the set of seen callsigns) is excluded.
+        """
+
+        params = {k: v for k, v in vars(self).items()
+                  if k != "seen_callsigns" and not (k in OPTIONAL_PARAMS and v is None)}
+        return HashHelper.content_hash(type(self).__qualname__, params)
+
     def route(self):
         """Returns a random route"""
 
+        if self.route_weights is not None:
+            return self.route_at(self.route_weights.draw())
+
+        # The route network searches for its shortest paths on first use, and caches them.
+        if self.route_network is not None:
+            return self.route_network.route_at(random.randrange(self.route_network.n_routes()))
+
         # Note: use the sector routes() method, *not* the shape routes().
         return random.choice(self.sector_element.routes())
 
+    def route_at(self, k):
+        """Returns the k-th of the routes from which routes are drawn (ordered as their route weights)"""
+
+        if self.route_network is not None:
+            return self.route_network.route_at(k)
+        return self.sector_element.routes()[k]
+
     def flight_level(self):
         """Returns a random flight level"""
 
+        if self.flight_level_weights is not None:
+            return self.flight_level_weights.draw()
         return random.choice(self.flight_levels)
 
     def aircraft_type(self):
         """Returns a random aircraft type"""
 
+        if self.aircraft_type_weights is not None:
+            return self.aircraft_type_weights.draw()
         return random.choice(self.aircraft_types)
 
+    def callsign_prefix(self):
+        """Returns a random callsign prefix"""
+
+        if self.callsign_prefix_weights is not None:
+            return self.callsign_prefix_weights.draw()
+        return random.choice(self.callsign_prefixes)
+
     def callsign_generator(self):
         """Generates a random sequence of unique callsigns"""
 
         k = 3
         while True:
             suffix = "".join([str(x) for x in random.sample(range(0, 10), k=k)])
-            prefix = random.choice(self.callsign_prefixes)
+            prefix = self.callsign_prefix()
             ret = prefix + suffix
 
             if ret in self.seen_callsigns:
@@ -132,11 +253,17 @@ class ScenarioAlgorithm(ABC):
     def departure_airport(self, route):
         """Returns a suitable departure airport for the given route"""
 
-        # TODO: currently a dummy implementation
+        if self.airport_catalogue is not None:
+            return self.airport_catalogue.departure(route)
+
+        # Dummy airport, in the absence of an airport catalogue.
         return "DEP"
 
     def destination_airport(self, route):
         """Returns a suitable destination airport for the given route"""
 
-        # TODO: currently a dummy implementation
+        if self.airport_catalogue is not None:
+            return self.airport_catalogue.destination(route)
+
+        # Dummy airport, in the absence of an airport catalogue.
         return "DEST"
@@ -0,0 +1,147 @@
+"""
+On-disk memoisation of generated scenarios.
+
+Scenarios are stored as pickle files named by a stable content hash of
+every input to scenario generation. The cache directory is bounded in size,
+with least recently used entries evicted first.
+"""
+
+import os
+import pickle
+import tempfile
+
+import aviary.constants as C
+from aviary.__version__ import __version__
+from aviary.utils.hash_helper import HashHelper
+from aviary.utils.filename_helper import FilenameHelper
+
+# CONSTANTS
+CACHE_EXTENSION = "pkl"
+DEFAULT_MAX_SIZE_BYTES = 256 * 1024 * 1024
+
+class ScenarioCache():
+    """A size-bounded, least recently used cache of generated scenarios on disk.
+
+    Args:
+        path (str): Cache directory (created if it does not exist).
+        max_size_bytes (int): Maximum total size of the cached scenario files.
+
+    Attributes:
+        path (str): Cache directory.
+        max_size_bytes (int): Maximum total size of the cached scenario files.
+    """
+
+    def __init__(self, path = None, max_size_bytes = DEFAULT_MAX_SIZE_BYTES):
+
+        if path is None:
+            path = os.path.join(C.DEFAULT_CACHE_DIR, "scenarios")
+
+        if not max_size_bytes > 0:
+            raise ValueError(f'Invalid max_size_bytes argument: {max_size_bytes}')
+
+        os.makedirs(path, exist_ok = True)
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+
+
+    @staticmethod
+    def key(*components) -> str:
+        """Returns the cache key for the given generation inputs"""
+
+        return HashHelper.content_hash(__version__, *components)
+
+
+    def filename(self, key):
+        """Returns the full path of the cache file for a given key"""
+
+        return FilenameHelper.construct_filename(filename = key, desired_extension = CACHE_EXTENSION, path = self.path)
+
+
+    def get(self, key):
+        """
+        Returns the cached scenario for the given key, or None if there is no such entry.
+
+        A successful lookup marks the entry as most recently used.
+        """
+
+        file = self.filename(key)
+        try:
+            with open(file, 'rb') as f:
+                scenario = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+
+        # Record the access time in the file modification time, which orders eviction.
+        try:
+            os.utime(file)
+        except FileNotFoundError:
+            pass
+        return scenario
+
+
+    def put(self, key, scenario):
+        """Stores a scenario under the given key, then evicts entries as necessary to respect the size limit"""
+
+        # Write to a temporary file and rename, so concurrent readers never see a partial entry.
+        fd, tmp = tempfile.mkstemp(dir = self.path, suffix = ".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(scenario, f, protocol = pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.filename(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        self.evict()
+
+
+    def entries(self):
+        """Returns a list of (modification time, size, path) tuples for the cache files, least recently used first"""
+
+        ret = []
+        with os.scandir(self.path) as it:
+            for entry in it:
+                if not entry.name.endswith("." + CACHE_EXTENSION):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                ret.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return sorted(ret)
+
+
+    def size_bytes(self):
+        """Returns the total size of the cache files"""
+
+        return sum(size for _, size, _ in self.entries())
+
+
+    def evict(self):
+        """Removes least recently used entries until the cache size does not exceed max_size_bytes"""
+
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, file in entries:
+            if total <= self.max_size_bytes:
+                break
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+    def clear(self):
+        """Removes all entries from the cache"""
+
+        for _, _, file in self.entries():
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+
+
+    def __contains__(self, key):
+        return os.path.exists(self.filename(key))
@@ -0,0 +1,186 @@
+"""
+Lazy, seed-indexed dataset of generated scenarios, e.g. for reinforcement learning training loops.
+
+Scenarios are generated on demand, by seed (dataset[seed]), and the most
+recently used are kept in a bounded in-memory cache. Each access also
+schedules the generation of the next few seeds in a pool of worker
+processes, so a learner iterating over consecutive seeds finds them already
+generated (or in progress) instead of waiting for them to be generated.
+
+Each worker process builds its own scenario algorithm from the factory once,
+and scenarios are generated by the ScenarioGenerator exactly as they would be
+in the calling process, so the scenario for a given seed does not depend on
+where (or whether) it was prefetched.
+"""
+
+import operator
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aviary.scenario.scenario_generator import ScenarioGenerator
+
+# DEFAULT PARAMETERS
+CACHE_SIZE = 64  # Scenarios
+PREFETCH = 4  # Seeds
+
+# Scenario generator of a worker process
+_worker_generator = None
+
+
+def _init_worker(factory, start_time, cache):
+    """Process pool initializer: builds the scenario algorithm once per worker process"""
+
+    global _worker_generator
+    _worker_generator = ScenarioGenerator(factory(), start_time = start_time, cache = cache)
+
+
+def _generate_in_worker(duration, seed):
+    """Generates a scenario using the worker process's scenario generator"""
+
+    return _worker_generator.generate_scenario(duration = duration, seed = seed)
+
+
+class ScenarioDataset():
+    """
+    A dataset of scenarios indexed by random seed, generated on demand.
+
+    Scenarios are shared with the cache, so callers should copy a scenario before modifying it.
+
+    Args:
+        factory: A callable with no arguments returning a ScenarioAlgorithm instance. If workers is
+            positive, it must be picklable (e.g. a module-level function or a functools.partial).
+        duration (float): The scenario duration in seconds.
+        start_time (datetime): (optional) The scenario start time.
+        cache_size (int): The maximum number of scenarios kept in memory.
+        prefetch (int): The number of seeds, following each accessed seed, to generate in advance.
+        workers (int): The number of worker processes. If 0, scenarios are generated in the calling process
+            and none are prefetched.
+        cache (ScenarioCache): (optional) An on-disk cache of scenarios, shared by all processes.
+
+    Attributes:
+        As Args, and:
+        generator (ScenarioGenerator): The scenario generator of the calling process.
+    """
+
+    def __init__(self, factory, duration, start_time = None, cache_size = CACHE_SIZE, prefetch = PREFETCH,
+                 workers = 1, cache = None):
+
+        if not cache_size > 0:
+            raise ValueError(f'Invalid cache_size argument: {cache_size}')
+        if prefetch < 0 or workers < 0:
+            raise ValueError(f'Invalid prefetch or workers argument: {prefetch}, {workers}')
+
+        self.factory = factory
+        self.duration = duration
+        self.start_time = start_time
+        self.cache_size = cache_size
+        self.prefetch = prefetch
+        self.workers = workers
+        self.cache = cache
+
+        self.generator = ScenarioGenerator(factory(), start_time = start_time, cache = cache)
+
+        # Scenarios by seed, least recently used first, and the futures of scenarios being prefetched.
+        self._scenarios = OrderedDict()
+        self._pending = {}
+        self._executor = None
+
+
+    def __getitem__(self, seed):
+        """
+        Returns the scenario generated with a given seed, and schedules the prefetching of the following seeds.
+
+        :param seed: An integer random seed (e.g. an int or a numpy integer, but not a bool).
+        :return: The scenario dictionary.
+        """
+
+        if isinstance(seed, (bool, np.bool_)):
+            raise TypeError(f'Scenario seeds must be integers: {seed}')
+        try:
+            seed = operator.index(seed)
+        except TypeError:
+            raise TypeError(f'Scenario seeds must be integers: {seed}') from None
+
+        if seed in self._scenarios:
+            self._scenarios.move_to_end(seed)
+            scenario = self._scenarios[seed]
+        elif seed in self._pending:
+            scenario = self.__put__(seed, self._pending.pop(seed).result())
+        else:
+            scenario = self.__put__(seed, self.generator.generate_scenario(duration = self.duration, seed = seed))
+
+        self.schedule(range(seed + 1, seed + 1 + self.prefetch))
+        return scenario
+
+
+    def __contains__(self, seed):
+        """Returns True if the scenario with a given seed is held in memory"""
+
+        return seed in self._scenarios
+
+
+    def __len__(self):
+        """Returns the number of scenarios held in memory"""
+
+        return len(self._scenarios)
+
+
+    def __put__(self, seed, scenario):
+        """Caches a scenario, evicting the least recently used as necessary, and returns it"""
+
+        self._scenarios[seed] = scenario
+        self._scenarios.move_to_end(seed)
+        while len(self._scenarios) > self.cache_size:
+            self._scenarios.popitem(last = False)
+        return scenario
+
+
+    def schedule(self, seeds):
+        """
+        Schedules the generation of scenarios in the worker processes, unless they are cached or pending.
+
+        Completed scenarios are cached on the next access to their seed. Does nothing if there are no workers.
+
+        :param seeds: An iterable of integer random seeds.
+        """
+
+        if self.workers == 0:
+            return
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers = self.workers, initializer = _init_worker,
+                                                 initargs = (self.factory, self.start_time, self.cache))
+
+        # Discard prefetches which are no longer wanted, once complete or if they can be cancelled.
+        seeds = [seed for seed in seeds if seed not in self._scenarios]
+        for seed in [seed for seed in self._pending if seed not in seeds]:
+            if self._pending[seed].done() or self._pending[seed].cancel():
+                del self._pending[seed]
+
+        for seed in seeds:
+            if seed not in self._pending:
+                self._pending[seed] = self._executor.submit(_generate_in_worker, self.duration, seed)
+
+
+    def close(self):
+        """Shuts down the worker processes, cancelling any pending prefetches"""
+
+        # Cancel the prefetches which have not started (Executor.shutdown's cancel_futures requires Python 3.9).
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+
+        if self._executor is not None:
+            self._executor.shutdown(wait = True)
+            self._executor = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -47,18 +47,61 @@ class ScenarioGenerator():
     departure = "DEP"
     destination = "DEST"
 
-    def __init__(self, scenario_algorithm, start_time = None):
+    def __init__(self, scenario_algorithm, start_time = None, cache = None):
+        """
+        ScenarioGenerator constructor.
+
+        :param scenario_algorithm: a ScenarioAlgorithm instance
+        :param start_time: (optional) the scenario start time as a datetime
+        :param cache: (optional) a ScenarioCache in which to memoise generated scenarios
+        """
 
         self.scenario_algorithm = scenario_algorithm
 
         if start_time is None:
             start_time = ScenarioGenerator.default_scenario_start_time
         self.start_time = start_time
+        self.cache = cache
 
 
     # TODO: add an argument to specify which routes to be included in the scenario.
-    def generate_scenario(self, duration, seed = None) -> dict:
-        """Generates a list of aircraft creation data constituting a scenario."""
+    def generate_scenario(self, duration, seed = None, bypass_cache = False) -> dict:
+        """
+        Generates a list of aircraft creation data constituting a scenario.
+
+        If the generator has a cache and a seed is given, a scenario previously generated from identical
+        inputs is returned from the cache instead of being regenerated. In that case the global random
+        state is not advanced by the scenario algorithm. Scenarios whose inputs cannot be hashed (e.g.
+        those with arrival rate functions lacking a content_hash method) are generated but not cached.
+
+        :param duration: the scenario duration in seconds
+        :param seed: the random seed
+        :param bypass_cache: if True, the scenario is generated from scratch (and not cached)
+        """
+
+        if self.cache is None or bypass_cache or seed is None:
+            return self.__generate__(duration = duration, seed = seed)
+
+        try:
+            key = self.cache_key(duration = duration, seed = seed)
+        except TypeError:
+            return self.__generate__(duration = duration, seed = seed)
+
+        scenario = self.cache.get(key)
+        if scenario is None:
+            scenario = self.__generate__(duration = duration, seed = seed)
+            self.cache.put(key, scenario)
+        return scenario
+
+
+    def cache_key(self, duration, seed):
+        """Returns the cache key for a scenario of the given duration and seed"""
+
+        return self.cache.key(type(self).__qualname__, self.scenario_algorithm, self.start_time, duration, seed)
+
+
+    def __generate__(self, duration, seed):
+        """Generates a scenario from scratch"""
 
         self.scenario_algorithm.set_seed(seed)
         self.scenario_algorithm.reset_seen_callsigns()
@@ -0,0 +1,367 @@
+"""
+Local scenario service, serving pre-generated scenario bundles over a Unix or TCP socket.
+
+Each bundle holds a seeded scenario, its sector GeoJSON and its translation
+into a BlueSky scenario (.scn) file. Bundles are produced in a pool of worker
+processes, each of which builds its scenario algorithm (and serialises its
+sector) once, and are held in a bounded pool of ready bundles, so a client
+requesting a bundle is served immediately unless the pool is empty. Producers
+wait while the pool is full (backpressure), so the pool never exceeds its
+capacity.
+
+The protocol is newline-delimited JSON: each request is a single line
+holding a JSON object with a "command" key, and each response is a single
+line holding a JSON object. The commands are:
+
+- "get": responds with a bundle, as an object with the keys seed, sector,
+  scenario and scn (the lines of the BlueSky scenario file);
+- "stats": responds with the server statistics (see ScenarioServer.stats).
+
+Invalid requests receive a response with an "error" key. Bundles are encoded
+by the producers, so serving a bundle is a single write.
+"""
+
+import asyncio
+import json
+import socket
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+
+import geojson
+
+from aviary.parser.bluesky_parser import BlueskyParser
+from aviary.scenario.scenario_generator import ScenarioGenerator
+
+# DEFAULT PARAMETERS
+POOL_SIZE = 16  # Bundles
+WORKERS = 2  # Producer processes
+HOST = "127.0.0.1"
+
+# Protocol keys and values
+COMMAND_KEY = "command"
+ERROR_KEY = "error"
+GET_COMMAND = "get"
+STATS_COMMAND = "stats"
+
+# Bundle keys
+SEED_KEY = "seed"
+SECTOR_KEY = "sector"
+SCENARIO_KEY = "scenario"
+SCN_KEY = "scn"
+
+# Statistics keys
+POOL_SIZE_KEY = "pool_size"
+POOL_CAPACITY_KEY = "pool_capacity"
+PRODUCED_KEY = "produced"
+SERVED_KEY = "served"
+EMPTY_POOL_KEY = "empty_pool_requests"
+MEAN_WAIT_KEY = "mean_wait_seconds"
+MAX_WAIT_KEY = "max_wait_seconds"
+PRODUCER_BLOCKED_KEY = "producer_blocked_seconds"
+MEAN_PRODUCTION_KEY = "mean_production_seconds"
+
+# Scenario generator and sector GeoJSON of a producer process
+_worker_generator = None
+_worker_sector = None
+
+
+def _init_worker(factory, start_time):
+    """Process pool initializer: builds the scenario algorithm and serialises its sector once per worker process"""
+
+    global _worker_generator, _worker_sector
+    _worker_generator = ScenarioGenerator(factory(), start_time = start_time)
+    _worker_sector = geojson.dumps(_worker_generator.scenario_algorithm.sector_element)
+
+
+def _produce_in_worker(duration, seed):
+    """Produces an encoded bundle using the worker process's scenario generator"""
+
+    scenario = _worker_generator.generate_scenario(duration = duration, seed = seed)
+    parser = BlueskyParser(StringIO(_worker_sector), StringIO(json.dumps(scenario)))
+
+    bundle = {
+        SEED_KEY: seed,
+        SECTOR_KEY: json.loads(_worker_sector),
+        SCENARIO_KEY: scenario,
+        SCN_KEY: parser.all_lines()
+    }
+    return (json.dumps(bundle) + "\n").encode("utf-8")
+
+
+class ScenarioServer():
+    """
+    An asyncio server of pre-generated scenario bundles.
+
+    Listens on a Unix socket if a path is given, otherwise on a TCP port of the local host.
+
+    Args:
+        factory: A picklable callable with no arguments returning a ScenarioAlgorithm instance
+            (e.g. a module-level function or a functools.partial).
+        duration (float): The scenario duration in seconds.
+        start_time (datetime): (optional) The scenario start time.
+        first_seed (int): The seed of the first bundle. Bundles are produced with consecutive seeds.
+        pool_size (int): The maximum number of ready bundles.
+        workers (int): The number of producer processes.
+        path (str): (optional) The Unix socket path.
+        host (str): The TCP host, if no path is given.
+        port (int): The TCP port, if no path is given. If 0, a free port is chosen (see the port attribute).
+
+    Attributes:
+        As Args.
+    """
+
+    def __init__(self, factory, duration, start_time = None, first_seed = 0, pool_size = POOL_SIZE,
+                 workers = WORKERS, path = None, host = HOST, port = 0):
+
+        if not (pool_size > 0 and workers > 0):
+            raise ValueError(f'Invalid pool_size or workers argument: {pool_size}, {workers}')
+
+        self.factory = factory
+        self.duration = duration
+        self.start_time = start_time
+        self.first_seed = first_seed
+        self.pool_size = pool_size
+        self.workers = workers
+        self.path = path
+        self.host = host
+        self.port = port
+
+        self._pool = None
+        self._server = None
+        self._executor = None
+        self._producers = []
+        self._next_seed = first_seed
+        self._error = None
+
+        self._produced = 0
+        self._served = 0
+        self._empty_pool_requests = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._producer_blocked = 0.0
+        self._total_production = 0.0
+
+
+    async def start(self):
+        """Starts the producers and begins listening for clients"""
+
+        self._pool = asyncio.Queue(maxsize = self.pool_size)
+        self._executor = ProcessPoolExecutor(max_workers = self.workers, initializer = _init_worker,
+                                             initargs = (self.factory, self.start_time))
+        self._producers = [asyncio.create_task(self.__produce__()) for _ in range(self.workers)]
+
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self.__handle__, path = self.path)
+        else:
+            self._server = await asyncio.start_server(self.__handle__, host = self.host, port = self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+
+    async def stop(self):
+        """Stops listening, and stops the producers"""
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        # Cancelling the producers cancels their pending productions, so the executor need not cancel them
+        # (Executor.shutdown's cancel_futures requires Python 3.9).
+        for producer in self._producers:
+            producer.cancel()
+        await asyncio.gather(*self._producers, return_exceptions = True)
+        self._producers = []
+
+        if self._executor is not None:
+            self._executor.shutdown(wait = True)
+            self._executor = None
+
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+
+    async def serve_forever(self):
+        """Starts the server (unless started) and serves clients until cancelled"""
+
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+
+    async def __produce__(self):
+        """Producer task: produces bundles in the process pool, waiting while the pool is full"""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            seed = self._next_seed
+            self._next_seed += 1
+
+            start = time.perf_counter()
+            try:
+                bundle = await loop.run_in_executor(self._executor, _produce_in_worker, self.duration, seed)
+            except Exception as ex:
+                # Stop producing, but keep serving the ready bundles. Once all producers have stopped,
+                # a sentinel wakes any requests waiting on the empty pool.
+                self._error = f'Scenario production failed for seed {seed}: {ex!r}'
+                if all(producer.done() or producer is asyncio.current_task() for producer in self._producers):
+                    await self._pool.put(None)
+                return
+            produced = time.perf_counter()
+            self._total_production += produced - start
+
+            await self._pool.put(bundle)
+            self._producer_blocked += time.perf_counter() - produced
+            self._produced += 1
+
+
+    async def __handle__(self, reader, writer):
+        """Serves the requests of a client connection"""
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    command = json.loads(line).get(COMMAND_KEY)
+                except (ValueError, AttributeError):
+                    command = None
+
+                if command == GET_COMMAND:
+                    try:
+                        writer.write(await self.get())
+                    except RuntimeError as ex:
+                        writer.write((json.dumps({ERROR_KEY: str(ex)}) + "\n").encode("utf-8"))
+                elif command == STATS_COMMAND:
+                    writer.write((json.dumps(self.stats()) + "\n").encode("utf-8"))
+                else:
+                    writer.write((json.dumps({ERROR_KEY: f'Invalid request: {line[:100]}'}) + "\n").encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+    async def get(self):
+        """
+        Returns the next ready bundle (encoded), waiting if the pool is empty.
+
+        Raises a RuntimeError if the pool is empty and production has stopped (e.g. after an error).
+        """
+
+        start = time.perf_counter()
+        if self._pool.empty():
+            if all(producer.done() for producer in self._producers):
+                raise RuntimeError(self._error or 'Scenario server is not producing bundles.')
+            self._empty_pool_requests += 1
+        bundle = await self._pool.get()
+        if bundle is None:
+            self._pool.put_nowait(None)
+            raise RuntimeError(self._error)
+
+        wait = time.perf_counter() - start
+        self._served += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        return bundle
+
+
+    def stats(self):
+        """
+        Returns the server statistics, as a dictionary with the keys:
+
+        - pool_size, pool_capacity: the number of ready bundles, and the maximum;
+        - produced, served: the numbers of bundles produced and served;
+        - empty_pool_requests: the number of requests which found the pool empty (and so had to wait);
+        - mean_wait_seconds, max_wait_seconds: the time spent by requests waiting for a bundle;
+        - producer_blocked_seconds: the total time spent by producers waiting for space in the pool (backpressure);
+        - mean_production_seconds: the mean time to produce a bundle.
+        """
+
+        return {
+            POOL_SIZE_KEY: self._pool.qsize() if self._pool is not None else 0,
+            POOL_CAPACITY_KEY: self.pool_size,
+            PRODUCED_KEY: self._produced,
+            SERVED_KEY: self._served,
+            EMPTY_POOL_KEY: self._empty_pool_requests,
+            MEAN_WAIT_KEY: self._total_wait / self._served if self._served else 0.0,
+            MAX_WAIT_KEY: self._max_wait,
+            PRODUCER_BLOCKED_KEY: self._producer_blocked,
+            MEAN_PRODUCTION_KEY: self._total_production / self._produced if self._produced else 0.0
+        }
+
+
+class ScenarioClient():
+    """
+    A (blocking) client of a ScenarioServer.
+
+    Args:
+        path (str): (optional) The Unix socket path.
+        host (str): The TCP host, if no path is given.
+        port (int): The TCP port, if no path is given.
+        timeout (float): (optional) The socket timeout in seconds.
+    """
+
+    def __init__(self, path = None, host = HOST, port = None, timeout = None):
+
+        if path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(path)
+        else:
+            self._socket = socket.create_connection((host, port), timeout = timeout)
+        self._file = self._socket.makefile("rwb")
+
+
+    def request(self, command):
+        """Sends a command and returns the decoded response"""
+
+        self._file.write((json.dumps({COMMAND_KEY: command}) + "\n").encode("utf-8"))
+        self._file.flush()
+
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('Scenario server closed the connection.')
+
+        response = json.loads(line)
+        if ERROR_KEY in response:
+            raise ValueError(response[ERROR_KEY])
+        return response
+
+
+    def get(self):
+        """Returns a bundle, as a dictionary with the keys seed, sector, scenario and scn"""
+
+        return self.request(GET_COMMAND)
+
+
+    def stats(self):
+        """Returns the server statistics"""
+
+        return self.request(STATS_COMMAND)
+
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
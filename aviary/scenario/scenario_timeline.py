@@ -0,0 +1,141 @@
+"""
+Time-indexed view of a generated scenario.
+
+Aircraft start times are held in a sorted NumPy array (seconds since the
+scenario start time) so that "which aircraft exist at time t" queries cost
+a binary search rather than a scan over the whole aircraft list.
+"""
+
+import numpy as np
+
+from datetime import datetime
+
+import aviary.scenario.scenario_generator as sg
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+class ScenarioTimeline():
+    """A scenario's aircraft, ordered by start time.
+
+    Args:
+        scenario (dict): A scenario dictionary, as returned by ScenarioGenerator.generate_scenario.
+
+    Attributes:
+        start_time (datetime): The scenario start time.
+        aircraft (list): The scenario aircraft dictionaries, sorted by start time.
+        start_times (numpy array): Aircraft start times in seconds since the scenario start time (sorted).
+    """
+
+    def __init__(self, scenario):
+
+        if sg.AIRCRAFT_KEY not in scenario:
+            raise ValueError(f"Scenario must contain {sg.AIRCRAFT_KEY} element")
+
+        self.start_time = ScenarioTimeline.parse_time(scenario[sg.START_TIME_KEY])
+
+        offsets = np.array([self.offset(ac[sg.START_TIME_KEY]) for ac in scenario[sg.AIRCRAFT_KEY]],
+                           dtype = float)
+
+        # A stable sort preserves the generation order of simultaneous aircraft.
+        order = np.argsort(offsets, kind = "stable")
+
+        self.aircraft = [scenario[sg.AIRCRAFT_KEY][i] for i in order]
+        self.start_times = offsets[order]
+
+
+    def __len__(self):
+        return len(self.aircraft)
+
+
+    def __iter__(self):
+        """Iterates over (start time, aircraft) pairs in time order"""
+
+        return zip(self.start_times.tolist(), self.aircraft)
+
+
+    @staticmethod
+    def parse_time(hms):
+        """Parses a "%H:%M:%S" formatted time string"""
+
+        return datetime.strptime(hms, "%H:%M:%S")
+
+
+    def offset(self, hms):
+        """
+        Returns the number of seconds from the scenario start time to the given "%H:%M:%S" time.
+
+        Times earlier in the day than the scenario start time are taken to fall on the following day.
+        """
+
+        seconds = (ScenarioTimeline.parse_time(hms) - self.start_time).total_seconds()
+        if seconds < 0:
+            seconds += SECONDS_PER_DAY
+        return seconds
+
+
+    def callsigns(self):
+        """Returns the aircraft callsigns in time order"""
+
+        return [ac[sg.CALLSIGN_KEY] for ac in self.aircraft]
+
+
+    def created_index(self, start, end):
+        """
+        Returns the slice of the timeline of aircraft created in the half-open interval [start, end).
+
+        :param start: Interval start in seconds since the scenario start time.
+        :param end: Interval end in seconds since the scenario start time.
+        :return: A slice into the aircraft list (and start_times array).
+        """
+
+        lo = np.searchsorted(self.start_times, start, side = "left")
+        hi = np.searchsorted(self.start_times, end, side = "left")
+        return slice(int(lo), int(max(lo, hi)))
+
+
+    def created_between(self, start, end):
+        """Returns the aircraft created in the half-open interval [start, end) in time order"""
+
+        return self.aircraft[self.created_index(start, end)]
+
+
+    def active_index(self, t, lifetime = None):
+        """
+        Returns the slice of the timeline of aircraft active at time t.
+
+        An aircraft is active from its start time onwards or, if a lifetime is
+        given, for that many seconds after its start time.
+
+        :param t: Time in seconds since the scenario start time.
+        :param lifetime: (optional) The duration in seconds for which each aircraft remains active.
+        :return: A slice into the aircraft list (and start_times array).
+        """
+
+        hi = int(np.searchsorted(self.start_times, t, side = "right"))
+        if lifetime is None:
+            return slice(0, hi)
+
+        lo = int(np.searchsorted(self.start_times, t - lifetime, side = "right"))
+        return slice(min(lo, hi), hi)
+
+
+    def active_at(self, t, lifetime = None):
+        """Returns the aircraft active at time t in time order (see active_index)"""
+
+        return self.aircraft[self.active_index(t, lifetime = lifetime)]
+
+
+    def count_active(self, times, lifetime = None):
+        """
+        Returns the number of active aircraft at each of an array of times.
+
+        :param times: Array of times in seconds since the scenario start time.
+        :param lifetime: (optional) The duration in seconds for which each aircraft remains active.
+        :return: An integer numpy array with the same shape as times.
+        """
+
+        times = np.asarray(times, dtype = float)
+        count = np.searchsorted(self.start_times, times, side = "right")
+        if lifetime is not None:
+            count = count - np.searchsorted(self.start_times, times - lifetime, side = "right")
+        return count
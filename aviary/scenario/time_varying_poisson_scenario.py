@@ -0,0 +1,249 @@
+"""
+Scenario generation algorithm with time-varying (non-homogeneous) Poisson aircraft arrivals.
+
+The arrival rate may vary with the time since the scenario start, e.g. to
+model waves of demand, and may differ between routes.
+
+Arrival times are sampled by thinning: candidate arrivals are drawn from a
+homogeneous Poisson process at the maximum arrival rate, and each candidate
+at time t is kept with probability rate(t) / max_rate. Candidates are drawn,
+and the rate evaluated and thinned, in batches of numpy arrays. With per-route
+rates, each candidate is assigned a route in proportion to the routes'
+maximum rates (via an alias table), and thinned by that route's rate, so the
+arrivals on each route form independent Poisson processes.
+
+As for the PoissonScenario, each aircraft's timedelta is the time since the
+previous arrival, and the random draws are seeded from the global random
+state, so scenarios are reproducible given the seed. Once every rate is zero
+for good (after the rate horizon), the aircraft generator stops.
+"""
+
+import random
+
+import numpy as np
+
+import aviary.scenario.scenario_generator as sg
+
+from aviary.scenario.poisson_scenario import PoissonScenario
+from aviary.utils.alias_table import AliasTable
+from aviary.utils.hash_helper import HashHelper
+
+# Default number of candidate arrivals per batch
+BATCH_SIZE = 256
+
+class ArrivalRate():
+    """
+    An arrival rate (per second) which is a function of the time (in seconds) since the scenario start.
+
+    Args:
+        rate: One of:
+            - a number, for a constant rate;
+            - a piecewise constant table, as a list of (start time, rate) pairs in increasing order of start
+              time, beginning at time 0, where each rate applies until the next start time (the last indefinitely);
+            - a vectorised function, mapping an array of times to an array of rates.
+        max_rate (float): An upper bound on the rate. Required if the rate is a function.
+        horizon (float): A time after which a rate function is zero, if any. Not applicable to tables.
+
+    Attributes:
+        times (np.ndarray): The start times of the table (None if the rate is a function).
+        rates (np.ndarray): The rates of the table (None if the rate is a function).
+        function: The rate function (None if the rate is a table).
+        max_rate (float): As Args. Defaults to the maximum of the table.
+        horizon (float): The time after which the rate is zero, or None if there is no such time. For a table,
+            the start time of its final run of zero rates.
+    """
+
+    def __init__(self, rate, max_rate = None, horizon = None):
+
+        self.function = None
+        self.times, self.rates = None, None
+
+        if callable(rate):
+            if max_rate is None:
+                raise ValueError('The maximum rate of an arrival rate function must be given.')
+            self.function = rate
+            self.horizon = None if horizon is None else float(horizon)
+        else:
+            if horizon is not None:
+                raise ValueError('The horizon of an arrival rate table is given by the table.')
+            table = [(0, rate)] if np.isscalar(rate) else rate
+            self.times, self.rates = np.array(table, dtype = float).reshape(-1, 2).T
+            if len(self.times) == 0 or self.times[0] != 0 or np.any(np.diff(self.times) <= 0):
+                raise ValueError(f'Arrival rate table start times must increase from zero: {rate}')
+            if np.any(~np.isfinite(self.rates)) or np.any(self.rates < 0):
+                raise ValueError(f'Arrival rates must be finite and non-negative: {rate}')
+            if max_rate is None:
+                max_rate = self.rates.max()
+            nonzero = np.flatnonzero(self.rates)
+            if self.rates[-1] > 0:
+                self.horizon = None
+            else:
+                self.horizon = self.times[nonzero[-1] + 1] if len(nonzero) > 0 else 0.0
+
+        if not (np.isfinite(max_rate) and max_rate > 0):
+            raise ValueError(f'The maximum arrival rate must be finite and positive: {max_rate}')
+        self.max_rate = float(max_rate)
+
+
+    def __call__(self, t):
+        """
+        Returns the arrival rate at each of an array of times.
+
+        :param t: Array of times in seconds since the scenario start.
+        :return: A numpy array of rates per second.
+        """
+
+        t = np.asarray(t, dtype = float)
+        if self.function is not None:
+            return np.broadcast_to(np.asarray(self.function(t), dtype = float), t.shape)
+        return self.rates[np.searchsorted(self.times, t, side = "right") - 1]
+
+
+    def content_hash(self) -> str:
+        """
+        Returns a stable hash of the rate table, or of the rate function if it has a content_hash method.
+
+        Raises a TypeError for any other rate function, since its results cannot be hashed faithfully.
+        """
+
+        if self.function is None:
+            return HashHelper.content_hash(self.times, self.rates, self.max_rate)
+
+        if hasattr(self.function, "content_hash") and callable(self.function.content_hash):
+            return HashHelper.content_hash(self.function.content_hash(), self.max_rate, self.horizon)
+
+        raise TypeError(f'Unable to hash the arrival rate function {self.function!r}: '
+                        f'only rate functions with a content_hash method can be hashed.')
+
+
+class TimeVaryingPoissonScenario(PoissonScenario):
+    """
+    A Poisson scenario generator for I, X, Y airspace sectors, with time-varying arrival rates.
+
+    Args:
+        arrival_rate: The arrival rate, as an ArrivalRate or any rate accepted by ArrivalRate. Alternatively,
+            a dictionary of per-route arrival rates keyed by (entry fix name, exit fix name), in which case
+            routes without a rate have no arrivals and route weights must not be given.
+        max_rate (float): An upper bound on the arrival rate, if it is a function.
+        horizon (float): A time after which the arrival rate is zero, if it is a function.
+        batch_size (int): The number of candidate arrivals drawn per batch.
+
+    Attributes:
+        As Args, with the rates converted to ArrivalRate instances.
+    """
+
+    def __init__(self, arrival_rate, max_rate = None, horizon = None, batch_size = BATCH_SIZE, **kwargs):
+
+        # Pass the keyword args (including the random seed) to the superclass constructor.
+        super().__init__(arrival_rate = arrival_rate, **kwargs)
+
+        self.batch_size = batch_size
+
+        if isinstance(arrival_rate, dict):
+            if self.route_weights is not None:
+                raise ValueError('Route weights cannot be combined with per-route arrival rates.')
+
+            keys = self.__route_keys__()
+            unknown = set(arrival_rate).difference(keys)
+            if unknown:
+                raise ValueError(f'No routes exist between the fixes {sorted(unknown)}')
+
+            self.arrival_rate = {key: TimeVaryingPoissonScenario.__arrival_rate__(rate, max_rate, horizon)
+                                 for key, rate in arrival_rate.items()}
+            # The route indices with arrivals, and their maximum rates.
+            self._route_index = [k for k, key in enumerate(keys) if key in self.arrival_rate]
+            self._route_rates = [self.arrival_rate[keys[k]] for k in self._route_index]
+        else:
+            self.arrival_rate = TimeVaryingPoissonScenario.__arrival_rate__(arrival_rate, max_rate, horizon)
+            self._route_index = None
+            self._route_rates = [self.arrival_rate]
+
+        self._routes = AliasTable({k: rate.max_rate for k, rate in enumerate(self._route_rates)})
+
+
+    @staticmethod
+    def __arrival_rate__(rate, max_rate, horizon):
+        """Returns an ArrivalRate instance, given an ArrivalRate or any rate accepted by ArrivalRate"""
+
+        if isinstance(rate, ArrivalRate):
+            return rate
+        return ArrivalRate(rate, max_rate = max_rate, horizon = horizon if callable(rate) else None)
+
+
+    def max_rate(self):
+        """Returns the upper bound on the total arrival rate used to draw candidate arrivals"""
+
+        return sum(rate.max_rate for rate in self._route_rates)
+
+
+    def horizon(self):
+        """Returns the time after which every arrival rate is zero, or None if there is no such time"""
+
+        horizons = [rate.horizon for rate in self._route_rates]
+        return None if None in horizons else max(horizons)
+
+
+    def arrivals(self, start, rng):
+        """
+        Draws a batch of candidate arrivals after a start time and thins them.
+
+        :param start: The time (in seconds since the scenario start) after which candidates are drawn.
+        :param rng: A numpy Generator.
+        :return: A tuple (end, times, rate_index), where end is the time of the last candidate, times is an array
+            of the arrival times and rate_index is an array of the index of the rate of each arrival.
+        """
+
+        max_rate = self.max_rate()
+        times = start + np.cumsum(rng.exponential(1 / max_rate, size = self.batch_size))
+        rate_index = self._routes.sample_indices(self.batch_size, rng = rng)
+        u = rng.random(self.batch_size)
+
+        keep = np.zeros(self.batch_size, dtype = bool)
+        for k, rate in enumerate(self._route_rates):
+            candidates = np.flatnonzero(rate_index == k)
+            rates = rate(times[candidates])
+            if np.any(rates > rate.max_rate):
+                raise ValueError(f'Arrival rate exceeds its maximum rate {rate.max_rate}: {rates.max()}')
+            keep[candidates] = u[candidates] * rate.max_rate < rates
+
+        return times[-1], times[keep], rate_index[keep]
+
+
+    # Overriding abstract method
+    def aircraft_generator(self) -> dict:
+        """Generates a sequence of aircraft constituting a scenario."""
+
+        rng = np.random.default_rng(random.getrandbits(64))
+
+        # Candidates after the horizon are all thinned away, so stop drawing them.
+        horizon = self.horizon()
+        start, previous = 0.0, 0.0
+        while horizon is None or start < horizon:
+            start, times, rate_index = self.arrivals(start, rng)
+            for t, k in zip(times.tolist(), rate_index.tolist()):
+                route = self.route() if self._route_index is None else self.route_at(self._route_index[k])
+                yield self.__aircraft__(t - previous, route)
+                previous = t
+
+
+    def __aircraft__(self, timedelta, route):
+        """Returns the properties of an aircraft, given its timedelta and route"""
+
+        current_flight_level = int(self.flight_level())
+        start_position = route.fix_points()[0].coords[0]
+        departure = self.departure_airport(route)
+        destination = self.destination_airport(route)
+        # Truncate the route i.e. remove the starting position fix (whose coords are in lon/lat order).
+        route = route.truncated(initial_lat = start_position[1], initial_lon = start_position[0])
+        return {
+            sg.AIRCRAFT_TIMEDELTA_KEY: timedelta,
+            sg.START_POSITION_KEY: start_position,
+            sg.CALLSIGN_KEY: next(self.callsign_generator()),
+            sg.AIRCRAFT_TYPE_KEY: self.aircraft_type(),
+            sg.DEPARTURE_KEY: departure,
+            sg.DESTINATION_KEY: destination,
+            sg.CURRENT_FLIGHT_LEVEL_KEY: current_flight_level,
+            sg.CLEARED_FLIGHT_LEVEL_KEY: current_flight_level,
+            sg.REQUESTED_FLIGHT_LEVEL_KEY: int(self.flight_level()),
+            sg.ROUTE_KEY: route.serialize(),
+        }
@@ -0,0 +1,63 @@
+#! python
+"""
+Script for evaluating the aviary metrics over recorded episode logs.
+"""
+
+import argparse
+import os
+import sys
+import traceback
+
+from aviary.metrics.evaluation_pipeline import EvaluationPipeline, CHUNK_SIZE, LOG_COLUMNS
+
+def main(argv=None):
+    #
+    # Help and usage instructions.
+    #
+    description = '''Run this script to evaluate the separation, sector exit and fuel efficiency metrics
+    over every episode in an episode log, writing one summary row per episode.
+    '''
+    epilog = f'''The episode log (.csv or .parquet) must have the columns: {", ".join(LOG_COLUMNS)}.'''
+    parser=argparse.ArgumentParser(description=description, epilog=epilog)
+
+    #
+    # Parse the command line arguments.
+    #
+    parser.add_argument('--sector_file', type=str, help='Sector GeoJSON file', required=True)
+    parser.add_argument('--scenario', type=str, help='Scenario JSON file, or directory of <episode>.json scenario files', required=True)
+    parser.add_argument('--log_file', type=str, help='Episode log file (.csv or .parquet)', required=True)
+    parser.add_argument('--output_file', type=str, help='Output summary file (.csv or .parquet)', required=True)
+
+    parser.add_argument('--workers', type=int, help='Number of worker processes (0 to run in-process)', default=os.cpu_count(), required=False)
+    parser.add_argument('--chunk_size', type=int, help='Number of log rows read at a time', default=CHUNK_SIZE, required=False)
+
+    parser.add_argument('-d', dest='debug', help='Debug mode', action='store_true')
+
+    args=parser.parse_args(argv)
+
+    print(">>>>> Evaluating episodes >>>>>")
+
+    pipeline = EvaluationPipeline(sector_file = args.sector_file,
+                                  scenario = args.scenario,
+                                  workers = args.workers,
+                                  chunk_size = args.chunk_size)
+
+    try:
+        n_episodes = pipeline.run(log_file = args.log_file, output_file = args.output_file)
+    except Exception as ex:
+        print('ERROR: Episode evaluation aborted due to error:')
+        print(ex)
+        if args.debug:
+            print('Traceback:')
+            tb = sys.exc_info()[2]
+            print(traceback.print_tb(tb))
+        else:
+            print('Re-run with the debug flag -d for a stack trace.')
+        return 1
+
+    print(f'SUCCESS! Wrote summaries of {n_episodes} episodes to {args.output_file}')
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -8,10 +8,9 @@ Author: Tim Hobson, thobson@turing.ac.uk
 
 import traceback
 import argparse, sys
-import pandas
 
 import aviary.constants as C
-from aviary.trajectory.lookup_trajectory_predictor import LookupTrajectoryPredictor
+from aviary.trajectory.lookup_table_cache import LookupTableCache
 from aviary.scenario.overflier_climber_scenario import OverflierClimberScenario
 from aviary.scenario.overflier_climber_extended_scenario import OverflierClimberExtendedScenario
 from aviary.scenario.scenario_generator import ScenarioGenerator
@@ -41,6 +40,7 @@ def main(argv=None):
     parser.add_argument('--climb_time_index', type=str, help='Index column in the climb time lookup table', required=True)
     parser.add_argument('--downtrack_distance', type=str, help='Aircraft downtrack distance lookup table in CSV format', required=True)
     parser.add_argument('--downtrack_distance_index', type=str, help='Index column in the downtrack distance lookup table', required=True)
+    parser.add_argument('--lookup_cache', type=str, help='Directory in which to cache the compiled lookup tables', required=False)
 
     parser.add_argument('--sector_type', type=str, help='Sector type: I, X or Y', default="I", required=False)
     parser.add_argument('--aircraft_types', type=str, help='Comma-separated list of aircraft types', required=False)
@@ -60,32 +60,20 @@ def main(argv=None):
     print(">>>>> Generating overflier-climber scenario >>>>>")
 
     #
-    # Read the trajectory lookup tables.
+    # Read the trajectory lookup tables (compiled to a binary cache on first use).
     #
+    lookup_cache = LookupTableCache(path = args.lookup_cache)
     try:
-        cruise_speed_lookup = pandas.read_csv(args.cruise_speed, index_col = args.cruise_speed_index)
-    except ValueError as ex:
-        print(f'Invalid cruise speed command-line arguments:')
+        trajectory_predictor = lookup_cache.load_trajectory_predictor(cruise_speed = args.cruise_speed,
+                                                                      cruise_speed_index = args.cruise_speed_index,
+                                                                      climb_time = args.climb_time,
+                                                                      climb_time_index = args.climb_time_index,
+                                                                      downtrack_distance = args.downtrack_distance,
+                                                                      downtrack_distance_index = args.downtrack_distance_index)
+    except (ValueError, KeyError, OSError) as ex:
+        print(f'Invalid trajectory lookup table command-line arguments:')
         print(ex)
-
-    try:
-        climb_time_lookup = pandas.read_csv(args.climb_time, index_col = args.climb_time_index)
-    except ValueError as ex:
-        print(f'Invalid climb time command-line arguments:')
-        print(ex)
-
-    try:
-        downtrack_distance_lookup = pandas.read_csv(args.downtrack_distance, index_col = args.downtrack_distance_index)
-    except ValueError as ex:
-        print(f'Invalid downtrack distance command-line arguments:')
-        print(ex)
-
-    #print("Successfully read lookup tables for cruise speed, climb time and downtrack distance")
-
-    # Construct the trajectory predictor instance.
-    trajectory_predictor = LookupTrajectoryPredictor(cruise_speed_lookup = cruise_speed_lookup,
-                                                    climb_time_lookup = climb_time_lookup,
-                                                    downtrack_distance_lookup = downtrack_distance_lookup)
+        return 1
 
     # Handle the optional command-line arguments.
 
@@ -0,0 +1,192 @@
+"""
+Composite airspace made of many sector elements, with a spatial index.
+
+Each element keeps its own projection and shape, so containment in the
+composite agrees exactly with SectorElement.contains. Queries are answered in
+two stages:
+
+- candidate elements are found in an STRtree of the element envelopes, in a
+  projection shared by all elements, and in an index of the elements'
+  vertical limits;
+- each candidate is tested exactly, in its own projection.
+
+The cost of a query therefore depends on the number of elements near the
+point, rather than the total number of elements. Envelopes are enlarged by
+ENVELOPE_MARGIN_NM, since straight edges in an element's projection are
+slightly curved in the shared projection.
+"""
+
+import warnings
+
+import numpy as np
+
+import shapely
+from shapely.geometry import box, Point
+from shapely.strtree import STRtree
+
+from aviary.sector.sector_element import SectorElement
+from aviary.utils.geo_helper import GeoHelper
+from aviary.utils.interval_index import IntervalIndex
+
+ENVELOPE_MARGIN_NM = 1
+
+# Shapely 2.x STRtree queries return indices, and accept arrays of geometries.
+SHAPELY_2 = int(shapely.__version__.split(".")[0]) >= 2
+
+class CompositeAirspace():
+    """
+    An airspace composed of sector elements, which may overlap laterally or be stacked vertically.
+
+    Args:
+        elements (list): A list of SectorElement instances.
+        origin (tuple): The origin (longitude, latitude) of the shared projection.
+            Defaults to the mean of the element origins.
+
+    Attributes:
+        elements (list): As Args.
+        origin (tuple): As Args.
+        projection (Proj): The shared projection.
+        envelopes (list): The element envelopes in the shared projection, as shapely Polygons.
+        tree (STRtree): Spatial index of the envelopes.
+        envelope_index (dict): The element indices keyed by envelope id, for Shapely 1.x tree queries.
+        altitude_index (IntervalIndex): Index of the elements' vertical limits.
+    """
+
+    def __init__(self, elements, origin = None):
+
+        self.elements = list(elements)
+        if len(self.elements) == 0:
+            raise ValueError('A composite airspace requires at least one sector element.')
+
+        if origin is None:
+            origin = tuple(np.mean([element.origin for element in self.elements], axis = 0).tolist())
+        self.origin = origin
+        self.projection = SectorElement.stereographic_projection(origin)
+
+        self.envelopes = []
+        for element in self.elements:
+            polygon = GeoHelper.__project__(self.projection, element.polygon())
+            self.envelopes.append(box(*polygon.buffer(ENVELOPE_MARGIN_NM).bounds))
+
+        with warnings.catch_warnings():
+            # Shapely 1.8 warns of the (index-based) STRtree interface in 2.0.
+            warnings.simplefilter("ignore")
+            self.tree = STRtree(self.envelopes)
+        self.envelope_index = {id(envelope): e for e, envelope in enumerate(self.envelopes)}
+
+        self.altitude_index = IntervalIndex([element.lower_limit for element in self.elements],
+                                            [element.upper_limit for element in self.elements])
+
+
+    def __len__(self):
+
+        return len(self.elements)
+
+
+    def __project__(self, lon, lat):
+        """Projects arrays of coordinates into the shared projection (in nm)"""
+
+        lon = np.asarray(lon, dtype = float)
+        # Note: pyproj returns scalars for single element arrays.
+        return [np.reshape(a, lon.shape) for a in self.projection(lon, np.asarray(lat, dtype = float))]
+
+
+    def __lateral_candidates__(self, x, y):
+        """Returns the (point, element) pairs for which the point lies within the element's envelope"""
+
+        if SHAPELY_2:
+            point_index, element_index = self.tree.query(shapely.points(x, y))
+            return point_index.astype(int), element_index.astype(int)
+
+        # Shapely 1.x queries one geometry at a time, returning the matching envelopes themselves.
+        pairs = [(k, self.envelope_index[id(envelope)])
+                 for k in range(len(x)) for envelope in self.tree.query(Point(x[k], y[k]))]
+        if not pairs:
+            return np.zeros(0, dtype = int), np.zeros(0, dtype = int)
+        point_index, element_index = np.array(pairs, dtype = int).T
+        return point_index, element_index
+
+
+    def locate(self, lon, lat, flight_level):
+        """
+        Returns the indices of the elements containing a point.
+
+        :param lon: Longitude
+        :param lat: Latitude
+        :param flight_level: Flight level
+        :return: A sorted list of element indices.
+        """
+
+        vertical = self.altitude_index.query(flight_level)
+        if len(vertical) == 0:
+            return []
+
+        x, y = self.projection(lon, lat)
+        if not (np.isfinite(x) and np.isfinite(y)):
+            return []
+        _, lateral = self.__lateral_candidates__(np.array([x]), np.array([y]))
+
+        candidates = np.intersect1d(vertical, lateral)
+        return [int(e) for e in candidates if self.elements[e].contains(lon, lat, flight_level)]
+
+
+    def contains(self, lon, lat, flight_level) -> bool:
+        """
+        Return a boolean indicating whether a point (lon, lat, flight_level) is inside any element.
+        """
+
+        return len(self.locate(lon, lat, flight_level)) > 0
+
+
+    def locate_points(self, lon, lat, flight_level):
+        """
+        Vectorised form of locate: finds all the (point, element) pairs for which the element contains the point.
+
+        :param lon: Array of longitudes
+        :param lat: Array of latitudes
+        :param flight_level: Array of flight levels
+        :return: A pair (point_index, element_index) of integer arrays, ordered by point index and then element index.
+        """
+
+        lon = np.asarray(lon, dtype = float).ravel()
+        lat = np.asarray(lat, dtype = float).ravel()
+        flight_level = np.asarray(flight_level, dtype = float).ravel()
+
+        x, y = self.__project__(lon, lat)
+        finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y) & np.isfinite(flight_level))
+        point_index, element_index = self.__lateral_candidates__(x[finite], y[finite])
+        point_index = finite[point_index]
+
+        keep = self.altitude_index.contains(element_index, flight_level[point_index])
+        point_index, element_index = point_index[keep], element_index[keep]
+
+        # Test the candidates of each element in a single pass, in the element's projection.
+        inside = np.zeros(len(point_index), dtype = bool)
+        for e in np.unique(element_index):
+            pairs = np.flatnonzero(element_index == e)
+            element = self.elements[e]
+            # Note: pyproj returns scalars for single element arrays, but lists for lists.
+            element_x, element_y = element.projection(lon[point_index[pairs]].tolist(), lat[point_index[pairs]].tolist())
+            inside[pairs] = element.contains_projected_points(element_x, element_y, flight_level[point_index[pairs]])
+
+        point_index, element_index = point_index[inside], element_index[inside]
+        order = np.lexsort((element_index, point_index))
+        return point_index[order], element_index[order]
+
+
+    def contains_points(self, lon, lat, flight_level):
+        """
+        Vectorised form of contains: tests whether each of an array of points is inside any element.
+
+        :param lon: Array of longitudes
+        :param lat: Array of latitudes
+        :param flight_level: Array of flight levels
+        :return: A boolean numpy array
+        """
+
+        lon = np.asarray(lon, dtype = float).ravel()
+        point_index, _ = self.locate_points(lon, lat, flight_level)
+
+        ret = np.zeros(len(lon), dtype = bool)
+        ret[point_index] = True
+        return ret
@@ -4,12 +4,16 @@ Represents a route through a sector shape or element.
 # author: Tim Hobson
 # email: thobson@turing.ac.uk
 
-from shapely.geometry import LineString, mapping
+import numpy as np
+
+from shapely.geometry import LineString, Point, mapping
 
 import aviary.constants as C
 from aviary.utils.geo_helper import GeoHelper
+from aviary.utils.hash_helper import HashHelper
 
 FIX_NAME_KEY = "fixName"
+NAME_DIGEST_SIZE = 8 # Bytes.
 
 class Route():
     """A route through a sector.
@@ -21,6 +25,8 @@ class Route():
     represents a route through a (projected) sector element. If the projection
     attribute is None, the route is through a (flat, 2D) sector shape.
 
+    Routes pickle compactly, as their fix names and coordinates and the proj-string
+    of their projection, which is reconstructed when first used after unpickling.
     """
 
     def __init__(self,
@@ -30,17 +36,52 @@ class Route():
         Route class constructor.
 
         :param fix_list: A list of (str, shapely.point.Point) pairs
-        :param projection: (optional) a pyproj Projection object
+        :param projection: (optional) a pyproj Projection object, or a proj-string from which it is
+            constructed when first used
         """
 
         self.fix_list = fix_list
         self.projection = projection
 
 
+    @property
+    def fix_list(self):
+        return self._fix_list
+
+    # Invalidate the cached hashes whenever the fix list is replaced.
+    @fix_list.setter
+    def fix_list(self, fix_list):
+        self._fix_list = fix_list
+        self._name_hash = None
+        self._content_hash = None
+
+    @property
+    def projection(self):
+        if isinstance(self._projection, str):
+            self._projection = GeoHelper.projection(self._projection)
+        return self._projection
+
+    @projection.setter
+    def projection(self, projection):
+        self._projection = projection
+        self._content_hash = None
+
+
+    def __reduce__(self):
+        """Returns the compact picklable form of the route (see the class docstring)"""
+
+        # Keep the proj-string of an unused projection, rather than constructing it.
+        projection = self._projection if isinstance(self._projection, str) else getattr(self._projection, "srs",
+                                                                                         self._projection)
+        coordinates = np.array([point.coords[0] for point in self.fix_points(unprojected = True)],
+                               dtype = float).reshape(-1, 2)
+        return (_restore_route, (self.fix_names(), coordinates, projection))
+
+
     def copy(self):
         """Returns a deep copy of a Route instance"""
 
-        return Route(fix_list = self.fix_list.copy(), projection = self.projection)
+        return Route(fix_list = list(self.fix_list), projection = self.projection)
 
 
     def reverse(self):
@@ -49,6 +90,14 @@ class Route():
         self.fix_list = self.fix_list[::-1]
 
 
+    def reversed(self):
+        """Returns a reversed copy of the Route instance"""
+
+        ret = self.copy()
+        ret.reverse()
+        return ret
+
+
     def length(self):
         """Returns the number of fixes in the route"""
 
@@ -80,8 +129,19 @@ class Route():
         return self.geojson()
 
     def hash_route(self) -> str:
-        """Returns hash of the sector route (fix names)"""
-        return str(hash(tuple(self.fix_names())))
+        """Returns a stable hash of the sector route (fix names)"""
+
+        if self._name_hash is None:
+            self._name_hash = HashHelper.content_hash(self.fix_names(), digest_size = NAME_DIGEST_SIZE)
+        return self._name_hash
+
+    def content_hash(self) -> str:
+        """Returns a stable hash of the route's fix names, coordinates and projection"""
+
+        if self._content_hash is None:
+            self._content_hash = HashHelper.content_hash(self.fix_names(), self.fix_points(unprojected = True),
+                                                         self.projection)
+        return self._content_hash
 
     def geojson(self) -> dict:
         """
@@ -121,10 +181,10 @@ class Route():
 
         return [
             {
-                FIX_NAME_KEY: self.fix_names()[i],
-                C.GEOMETRY_KEY: mapping(self.fix_points()[i])
+                FIX_NAME_KEY: name,
+                C.GEOMETRY_KEY: mapping(point)
             }
-            for i in range(self.length())
+            for name, point in zip(self.fix_names(), self.fix_points())
         ]
 
     def next_waypoint(self, lat, lon):
@@ -136,9 +196,8 @@ class Route():
         :return: The name of the waypoint on the route, or None if the last waypoint is passed.
         """
 
-        # Make a copy of the route to avoid side effects.
-        truncated = self.copy()
-        truncated.truncate(lat, lon)
+        # Truncate a copy of the route to avoid side effects.
+        truncated = self.truncated(lat, lon)
 
         if truncated.length() == 0:
             return None
@@ -148,30 +207,124 @@ class Route():
     def truncate(self, initial_lat, initial_lon):
         """Truncates this route in light of a given start position by removing fixes that are already passed."""
 
+        self.fix_list = [self.fix_list[i] for i in self.__remaining__(initial_lat, initial_lon)]
+
+
+    def truncated(self, initial_lat, initial_lon):
+        """Returns a copy of this route truncated in light of a given start position (see truncate)"""
+
+        ret = self.copy()
+        ret.truncate(initial_lat = initial_lat, initial_lon = initial_lon)
+        return ret
+
+
+    def __remaining__(self, initial_lat, initial_lon):
+        """Returns the indices of the fixes not yet passed from a given start position"""
+
         if not self.projection:
             raise ValueError("Truncate route operation requires a non-empty projection attribute.")
 
-        def fix_latitude(i):
-            return self.fix_points()[i].coords[0][1]
-
-        def fix_longitude(i):
-            return self.fix_points()[i].coords[0][0]
+        # Note lon/lat order!
+        coords = [point.coords[0] for point in self.fix_points()]
 
-        def distance_to_fix(i):
-            return GeoHelper.distance(lat1=initial_lat, lon1=initial_lon, lat2=fix_latitude(i), lon2=fix_longitude(i))
+        def distance_to_fix(i, lat, lon):
+            return GeoHelper.distance(lat1 = lat, lon1 = lon, lat2 = coords[i][1], lon2 = coords[i][0])
 
         # Handle the case that the aircraft has passed the final fix (using only distances!).
-        distance_to_final_fix = distance_to_fix(-1)
-        distance_to_penultimate_fix = distance_to_fix(-2)
-        distance_between_final_fixes = GeoHelper.distance(lat1=fix_latitude(-1), lon1 = fix_longitude(-1),
-                                                          lat2=fix_latitude(-2), lon2 = fix_longitude(-2))
+        distance_to_final_fix = distance_to_fix(-1, initial_lat, initial_lon)
+        distance_to_penultimate_fix = distance_to_fix(-2, initial_lat, initial_lon)
+        distance_between_final_fixes = distance_to_fix(-2, coords[-1][1], coords[-1][0])
 
         if distance_to_final_fix < distance_to_penultimate_fix and distance_to_penultimate_fix > distance_between_final_fixes:
-            self.fix_list = []
-            return
+            return []
 
         # Retain only those route elements that are closer to the final fix than the initial position.
-        final_lon, final_lat = self.fix_points()[-1].coords[0]  # Note lon/lat order!
-        self.fix_list = [self.fix_list[i] for i in range(self.length()) if
-                         GeoHelper.distance(lat1 = final_lat, lon1 = final_lon, lat2 = fix_latitude(i), lon2 = fix_longitude(i)) <
-                         GeoHelper.distance(lat1 = final_lat, lon1 = final_lon, lat2 = initial_lat, lon2 = initial_lon)]
+        final_lon, final_lat = coords[-1]
+        distance_to_initial = GeoHelper.distance(lat1 = final_lat, lon1 = final_lon, lat2 = initial_lat, lon2 = initial_lon)
+        return [i for i in range(self.length()) if distance_to_fix(i, final_lat, final_lon) < distance_to_initial]
+
+
+class RouteView(Route):
+    """An immutable route through a sector element, whose fix points are projected once, on construction.
+
+    Route views may be shared between threads (e.g. generators running in a thread pool over one sector
+    element): the fix list and projection cannot be assigned, so reverse and truncate raise an exception.
+    Instead, reversed and truncated return new views sharing the fixes and projected points (copy on write),
+    and copy returns a mutable Route.
+
+    Args:
+        fix_list: A list of (str, shapely.point.Point) pairs, stored as a tuple.
+        projection: (optional) A pyproj Projection object, or a proj-string.
+        fix_points: (optional) The projected fix points, if already known.
+    """
+
+    def __init__(self,
+                 fix_list,
+                 projection = None,
+                 fix_points = None):
+
+        self._fix_list = tuple(fix_list)
+        self._projection = projection
+        # Cached hashes (computing them concurrently is harmless, since all threads compute the same values).
+        self._name_hash = None
+        self._content_hash = None
+
+        self._fix_points = tuple(fix_points) if fix_points is not None else tuple(Route.fix_points(self))
+
+
+    @property
+    def fix_list(self):
+        return self._fix_list
+
+    @fix_list.setter
+    def fix_list(self, fix_list):
+        raise Exception("route views are immutable")
+
+    @property
+    def projection(self):
+        return Route.projection.fget(self)
+
+    @projection.setter
+    def projection(self, projection):
+        raise Exception("route views are immutable")
+
+
+    def __reduce__(self):
+
+        return (_restore_route_view, Route.__reduce__(self)[1])
+
+
+    def fix_points(self, unprojected = False):
+        """Returns the coordinates of the fixes in the route"""
+
+        if unprojected:
+            return [i[1] for i in self.fix_list]
+        return list(self._fix_points)
+
+
+    def reversed(self):
+        """Returns a reversed view of the route"""
+
+        return RouteView(fix_list = self.fix_list[::-1], projection = self._projection,
+                         fix_points = self._fix_points[::-1])
+
+
+    def truncated(self, initial_lat, initial_lon):
+        """Returns a view of the route truncated in light of a given start position (see truncate)"""
+
+        remaining = self.__remaining__(initial_lat, initial_lon)
+        return RouteView(fix_list = [self.fix_list[i] for i in remaining], projection = self._projection,
+                         fix_points = [self._fix_points[i] for i in remaining])
+
+
+def _restore_route(fix_names, coordinates, projection):
+    """Reconstructs a route from its compact picklable form (see Route.__reduce__)"""
+
+    return Route(fix_list = [(name, Point(x, y)) for name, (x, y) in zip(fix_names, coordinates.tolist())],
+                 projection = projection)
+
+
+def _restore_route_view(fix_names, coordinates, projection):
+    """Reconstructs a route view from its compact picklable form (see Route.__reduce__)"""
+
+    return RouteView(fix_list = _restore_route(fix_names, coordinates, None).fix_list, projection = projection)
@@ -0,0 +1,291 @@
+"""
+Network of fixes and airways built from the routes of many sector elements.
+
+Fixes at the same geographic location (to the GeoJSON float precision) in
+different elements are merged into a single node, so routes through adjacent
+elements join up. Each pair of consecutive fixes on a route is a directed
+airway, weighted by its geodesic length.
+
+By default, the entry and exit fixes of the network are the first and last
+fixes of the element routes. Shortest paths are computed lazily: the first
+request for a route from an entry fix runs a single Dijkstra search from that
+entry, and caches the result as a shortest path tree (one predecessor per
+fix), from which later routes from the same entry are read off. Indexed
+access to the routes (n_routes, route_at) searches from every entry on first
+use, as does precompute(). Searches visit each airway at most once, and each
+cached tree takes memory linear in the number of fixes, so networks of
+thousands of fixes are supported.
+"""
+
+import heapq
+
+import numpy as np
+
+from shapely.geometry import Point
+
+import aviary.constants as C
+from aviary.sector.route import RouteView
+from aviary.sector.sector_element import SectorElement
+from aviary.utils.geo_helper import GeoHelper
+from aviary.utils.hash_helper import HashHelper
+
+
+class RouteNetwork():
+    """
+    A directed graph of fixes and airways, with cached shortest paths between entry and exit fixes.
+
+    Fixes with the same name at different locations are renamed by appending a suffix (e.g. "ABYSS_1").
+
+    Args:
+        elements (list): A list of SectorElement instances.
+        origin (tuple): The origin (longitude, latitude) of the projection shared by the network's routes.
+            Defaults to the mean of the element origins.
+        entries (list): Names of the entry fixes. Defaults to the first fixes of the element routes.
+        exits (list): Names of the exit fixes. Defaults to the last fixes of the element routes.
+
+    Attributes:
+        origin (tuple): As Args.
+        projection (Proj): The shared projection.
+        fix_names (list): The name of each fix.
+        fix_locations (np.ndarray): The (longitude, latitude) coordinates of each fix.
+        entries (list): The indices of the entry fixes.
+        exits (list): The indices of the exit fixes.
+    """
+
+    def __init__(self, elements, origin = None, entries = None, exits = None):
+
+        elements = list(elements)
+        if len(elements) == 0:
+            raise ValueError('A route network requires at least one sector element.')
+
+        if origin is None:
+            origin = tuple(np.mean([element.origin for element in elements], axis = 0).tolist())
+        self.origin = origin
+        self.projection = SectorElement.stereographic_projection(origin)
+
+        self.fix_names = []
+        self._index = {}
+        locations = []
+        nodes_by_location = {}
+        default_entries, default_exits = [], []
+        edges = set()
+
+        for element in elements:
+            # Map the element's fix names to nodes, merging fixes at the same location.
+            nodes = {}
+            for name in element.shape.fixes.keys():
+                location = element.fix_location(name)
+                key = tuple(round(c, C.FLOAT_PRECISION) for c in location)
+                if key not in nodes_by_location:
+                    unique_name = name
+                    suffix = 0
+                    while unique_name in self._index:
+                        suffix += 1
+                        unique_name = f'{name}_{suffix}'
+                    nodes_by_location[key] = len(self.fix_names)
+                    self._index[unique_name] = len(self.fix_names)
+                    self.fix_names.append(unique_name)
+                    locations.append(location)
+                nodes[name] = nodes_by_location[key]
+
+            for route in element.shape.routes:
+                path = [nodes[name] for name in route.fix_names()]
+                default_entries.append(path[0])
+                default_exits.append(path[-1])
+                edges.update(zip(path[:-1], path[1:]))
+
+        self.fix_locations = np.array(locations, dtype = float).reshape(-1, 2)
+
+        self.entries = sorted(set(default_entries)) if entries is None else [self.index(name) for name in entries]
+        self.exits = sorted(set(default_exits)) if exits is None else [self.index(name) for name in exits]
+
+        # Store the airways in compressed sparse row form, ordered by source fix.
+        edges = np.array(sorted(edges), dtype = int).reshape(-1, 2)
+        self._targets = edges[:, 1]
+        self._offsets = np.searchsorted(edges[:, 0], np.arange(len(self.fix_names) + 1))
+        self._weights = np.array([GeoHelper.distance(lat1 = self.fix_locations[i, 1], lon1 = self.fix_locations[i, 0],
+                                                     lat2 = self.fix_locations[j, 1], lon2 = self.fix_locations[j, 0])
+                                  for i, j in edges], dtype = float) / C.METRES_PER_NM
+
+        # Shortest path trees from each searched fix, and the routes looked up so far.
+        self._predecessors = {}
+        self._distances = {}
+        self._pairs = None
+        self._routes = {}
+
+
+    def __len__(self):
+
+        return len(self.fix_names)
+
+
+    def n_airways(self):
+        """Returns the number of airways (directed edges) in the network"""
+
+        return len(self._targets)
+
+
+    def index(self, fix_name):
+        """Returns the index of a fix, given its name"""
+
+        if fix_name not in self._index:
+            raise ValueError(f'No fix exists named {fix_name}')
+        return self._index[fix_name]
+
+
+    def __search__(self, source):
+        """Runs a Dijkstra search from a source fix and caches the shortest path tree"""
+
+        if source in self._predecessors:
+            return
+
+        offsets, targets, weights = self._offsets.tolist(), self._targets.tolist(), self._weights.tolist()
+        distance = [np.inf] * len(self.fix_names)
+        predecessor = [-1] * len(self.fix_names)
+
+        distance[source] = 0
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > distance[node]:
+                continue
+            for k in range(offsets[node], offsets[node + 1]):
+                target, candidate = targets[k], d + weights[k]
+                if candidate < distance[target]:
+                    distance[target] = candidate
+                    predecessor[target] = node
+                    heapq.heappush(heap, (candidate, target))
+
+        # Keep the trees compact: the paths themselves are reconstructed on lookup.
+        self._predecessors[source] = np.array(predecessor, dtype = np.int32)
+        self._distances[source] = np.array(distance, dtype = float)
+
+
+    def __path__(self, source, target):
+        """Returns the fix indices of the shortest path between two fixes, or None if there is no path"""
+
+        self.__search__(source)
+        predecessor = self._predecessors[source]
+        if target == source or predecessor[target] < 0:
+            return None
+
+        path = [target]
+        while path[-1] != source:
+            path.append(int(predecessor[path[-1]]))
+        return path[::-1]
+
+
+    def precompute(self):
+        """Computes and caches the shortest paths between all pairs of entry and exit fixes"""
+
+        self.route_pairs()
+
+
+    def route_pairs(self):
+        """
+        Returns the connected pairs of distinct entry and exit fixes, searching from every entry fix.
+
+        :return: A pair (entry, exit) of arrays of fix indices, ordered by entry and then exit fix index.
+        """
+
+        if self._pairs is None:
+            exits = np.array(self.exits, dtype = int)
+            entry_index, exit_index = [], []
+            for source in self.entries:
+                self.__search__(source)
+                connected = exits[np.isfinite(self._distances[source][exits]) & (exits != source)]
+                entry_index.append(np.full(len(connected), source))
+                exit_index.append(connected)
+
+            self._pairs = (np.concatenate(entry_index).astype(int) if entry_index else np.zeros(0, dtype = int),
+                           np.concatenate(exit_index).astype(int) if exit_index else np.zeros(0, dtype = int))
+
+        return self._pairs
+
+
+    def n_routes(self):
+        """Returns the number of connected pairs of distinct entry and exit fixes"""
+
+        return len(self.route_pairs()[0])
+
+
+    def shortest_path(self, entry, exit):
+        """
+        Returns the shortest path between two fixes.
+
+        :param entry: The name of the entry fix.
+        :param exit: The name of the exit fix, which must be one of the network's exit fixes.
+        :return: A pair (fix names, length in nautical miles), or None if the exit is unreachable from the entry.
+        """
+
+        source, target = self.index(entry), self.index(exit)
+        if target not in self.exits:
+            raise ValueError(f'Fix {exit} is not an exit fix')
+
+        path = self.__path__(source, target)
+        if path is None:
+            return None
+
+        return [self.fix_names[node] for node in path], float(self._distances[source][target])
+
+
+    def route(self, entry, exit):
+        """
+        Returns the shortest route between two fixes.
+
+        Routes are cached immutable views, which may be shared between threads (as for SectorElement.routes).
+
+        :param entry: The name of the entry fix.
+        :param exit: The name of the exit fix, which must be one of the network's exit fixes.
+        :return: A RouteView instance, in the network's projection.
+        """
+
+        if self.shortest_path(entry, exit) is None:
+            raise ValueError(f'No route exists from {entry} to {exit}')
+
+        return self.__route__(self.index(entry), self.index(exit))
+
+
+    def route_at(self, k):
+        """
+        Returns the shortest route between the k-th connected pair of entry and exit fixes (see route_pairs).
+
+        :param k: The index of the pair, from 0 to n_routes() - 1.
+        :return: A RouteView instance, in the network's projection.
+        """
+
+        entry_index, exit_index = self.route_pairs()
+        return self.__route__(int(entry_index[k]), int(exit_index[k]))
+
+
+    def __route__(self, source, target):
+        """Returns the (cached) RouteView instance between two connected fixes"""
+
+        if (source, target) not in self._routes:
+            path = self.__path__(source, target)
+            lon, lat = self.fix_locations[path].T
+            x, y = self.projection(lon.tolist(), lat.tolist())
+            self._routes[(source, target)] = RouteView(
+                fix_list = [(self.fix_names[node], Point(x[k], y[k])) for k, node in enumerate(path)],
+                projection = self.projection)
+
+        return self._routes[(source, target)]
+
+
+    def routes(self):
+        """
+        Returns the shortest routes between all connected pairs of distinct entry and exit fixes.
+
+        For large networks, prefer route_at, which constructs only the routes that are used.
+
+        :return: A list of RouteView instances, ordered by entry and then exit fix index.
+        """
+
+        return [self.route_at(k) for k in range(self.n_routes())]
+
+
+    def content_hash(self) -> str:
+        """Returns a stable hash of the network's fixes, airways, entry and exit fixes and projection"""
+
+        return HashHelper.content_hash(self.projection, self.fix_names, self.fix_locations, self._targets,
+                                       self._offsets, self.entries, self.exits)
@@ -0,0 +1,165 @@
+"""
+Detection of aircraft entering and leaving a sector between consecutive positions.
+
+The lateral containment of the previous and current positions of all
+aircraft is tested in a single vectorised pass, and combined with the
+sector's vertical limits to give the entry and exit events. Each event
+records the boundaries crossed, as a combination of the flags LATERAL, LOWER
+and UPPER (e.g. an aircraft climbing out through the top of the sector
+crosses the UPPER boundary). For a sector with stacked volumes, the vertical
+boundaries are those of the volume the aircraft enters or leaves.
+
+Aircraft whose previous or current position is unknown (non-finite) have no
+events, so aircraft appearing inside the sector are not treated as entries.
+"""
+
+import numpy as np
+
+from aviary.utils.geo_helper import GeoHelper
+
+# Boundary flags
+LATERAL = 1
+LOWER = 2
+UPPER = 4
+
+# Result keys
+INSIDE_KEY = "inside"
+ENTRY_KEY = "entry"
+ENTRY_BOUNDARY_KEY = "entry_boundary"
+EXIT_KEY = "exit"
+EXIT_BOUNDARY_KEY = "exit_boundary"
+
+class SectorCrossingDetector():
+    """
+    Detects sector entries and exits for arrays of aircraft positions.
+
+    Positions may be given in pairs (previous and current) to crossings, or as a stream to update,
+    in which case each position is tested only once.
+
+    Args:
+        sector (SectorElement): The sector element.
+
+    Attributes:
+        As Args.
+    """
+
+    def __init__(self, sector):
+
+        self.sector = sector
+        self.reset()
+
+
+    def reset(self):
+        """Discards the previous positions passed to update"""
+
+        self._state = None
+
+
+    def __project__(self, lon, lat):
+        """Projects arrays of coordinates into the sector's projection (in nm)"""
+
+        lon = np.asarray(lon, dtype = float)
+        # Note: pyproj returns scalars for single element arrays.
+        return [np.reshape(a, lon.shape) for a in self.sector.projection(lon, np.asarray(lat, dtype = float))]
+
+
+    def __state__(self, lateral, x, y, flight_level):
+        """Returns the containment state (valid, lateral, volume, flight_level) of an array of positions"""
+
+        flight_level = np.asarray(flight_level, dtype = float)
+        valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(flight_level)
+        return valid, lateral, self.sector.volume_index(flight_level), flight_level
+
+
+    def __vertical_boundary__(self, volume, flight_level):
+        """Returns the vertical boundary flags of flight levels outside the given volumes"""
+
+        lower_limit, upper_limit = np.array(self.sector.volumes, dtype = float)[volume].T.reshape(2, -1)
+        return np.where(flight_level < lower_limit, LOWER, 0) | np.where(flight_level > upper_limit, UPPER, 0)
+
+
+    def __events__(self, previous, current):
+        """Computes the entry and exit events between two containment states"""
+
+        previous_valid, previous_lateral, previous_volume, previous_flight_level = previous
+        valid, lateral, volume, flight_level = current
+
+        previous_inside = previous_lateral & (previous_volume >= 0)
+        inside = lateral & (volume >= 0)
+        both_valid = previous_valid & valid
+
+        entry = np.flatnonzero(both_valid & ~previous_inside & inside)
+        exit = np.flatnonzero(both_valid & previous_inside & ~inside)
+
+        entry_boundary = np.where(~previous_lateral[entry], LATERAL, 0) | \
+                         self.__vertical_boundary__(volume[entry], previous_flight_level[entry])
+        exit_boundary = np.where(~lateral[exit], LATERAL, 0) | \
+                        self.__vertical_boundary__(previous_volume[exit], flight_level[exit])
+
+        return {
+            INSIDE_KEY: inside,
+            ENTRY_KEY: entry,
+            ENTRY_BOUNDARY_KEY: entry_boundary,
+            EXIT_KEY: exit,
+            EXIT_BOUNDARY_KEY: exit_boundary
+        }
+
+
+    def crossings(self, previous_lon, previous_lat, previous_flight_level, lon, lat, flight_level):
+        """
+        Computes the entry and exit events of all aircraft between their previous and current positions.
+
+        :param previous_lon: Array of previous longitudes.
+        :param previous_lat: Array of previous latitudes.
+        :param previous_flight_level: Array of previous flight levels.
+        :param lon: Array of current longitudes.
+        :param lat: Array of current latitudes.
+        :param flight_level: Array of current flight levels.
+        :return: A dictionary holding:
+            - inside: a boolean array indicating whether each aircraft is currently inside the sector
+            - entry, exit: arrays of the indices of the aircraft entering and leaving the sector
+            - entry_boundary, exit_boundary: arrays of the boundary flags of each entry and exit
+        """
+
+        previous_x, previous_y = self.__project__(previous_lon, previous_lat)
+        x, y = self.__project__(lon, lat)
+        return self.projected_crossings(previous_x, previous_y, previous_flight_level, x, y, flight_level)
+
+
+    def projected_crossings(self, previous_x, previous_y, previous_flight_level, x, y, flight_level):
+        """
+        Computes the entry and exit events of all aircraft, given positions in the sector's projection.
+
+        See crossings.
+        """
+
+        previous_x, previous_y, x, y = [np.asarray(a, dtype = float) for a in [previous_x, previous_y, x, y]]
+
+        # Test the previous and current positions in a single pass.
+        lateral = GeoHelper.contains_xy(self.sector.shape.polygon, np.concatenate([previous_x, x]),
+                                        np.concatenate([previous_y, y]))
+        n = len(x)
+
+        return self.__events__(self.__state__(lateral[:n], previous_x, previous_y, previous_flight_level),
+                               self.__state__(lateral[n:], x, y, flight_level))
+
+
+    def update(self, lon, lat, flight_level):
+        """
+        Computes the entry and exit events of all aircraft since the previous call to update.
+
+        There are no events at the first call (or the first after reset). The number of aircraft must not change.
+
+        :param lon: Array of current longitudes.
+        :param lat: Array of current latitudes.
+        :param flight_level: Array of current flight levels.
+        :return: See crossings.
+        """
+
+        x, y = self.__project__(lon, lat)
+        state = self.__state__(GeoHelper.contains_xy(self.sector.shape.polygon, x, y), x, y, flight_level)
+
+        previous = self._state if self._state is not None else \
+            (np.zeros(len(x), dtype = bool), np.zeros(len(x), dtype = bool), np.full(len(x), -1), np.full(len(x), np.nan))
+        self._state = state
+        return self.__events__(previous, state)
@@ -4,21 +4,37 @@ Construction of I, X, Y airspace sector elements with upper & lower vertical lim
 # author: Tim Hobson
 # email: thobson@turing.ac.uk
 
+import numpy as np
+
+from bisect import bisect_right
+
 from pyproj import Proj
 from geojson import dump
 
 from io import StringIO
 
+from shapely import wkb
 from shapely.geometry import mapping, Point
 
 import aviary.constants as C
 import aviary.sector.sector_shape as ss
+from aviary.sector.route import Route, RouteView
 import aviary.parser.sector_parser as sp
 from aviary.utils.geo_helper import GeoHelper
 from aviary.utils.filename_helper import FilenameHelper
+from aviary.utils.hash_helper import HashHelper
+
+NAME_DIGEST_SIZE = 8 # Bytes.
 
 class SectorElement():
-    """An elemental sector of airspace"""
+    """
+    An elemental sector of airspace.
+
+    Sector elements pickle compactly, e.g. for sending to worker processes (see also SharedSector): as the
+    parameters of their shape (or, for other shapes, its polygon as WKB, fixes and routes), their vertical
+    limits and the proj-string of their projection. The shape and projection are reconstructed when first
+    used after unpickling.
+    """
 
     def __init__(self,
                  shape,
@@ -26,6 +42,7 @@ class SectorElement():
                  origin = C.DEFAULT_ORIGIN,
                  lower_limit = C.DEFAULT_LOWER_LIMIT,
                  upper_limit = C.DEFAULT_UPPER_LIMIT,
+                 volumes = None,
                  **kwargs):
         """
         SectorElement constructor.
@@ -35,24 +52,219 @@ class SectorElement():
         :param origin: the origin coordinates as a (longitude, latitude) tuple
         :param lower_limit: the lower flight level limit
         :param upper_limit: the upper flight level limit
+        :param volumes: a list of (lower_limit, upper_limit) pairs of stacked volumes sharing the sector polygon,
+            which may touch but not overlap. If given, the lower_limit and upper_limit parameters are ignored.
         """
 
         self.name = name
         self.origin = origin
 
-        # Construct the proj-string (see https://proj.org/usage/quickstart.html)
-        # Note the unit kmi is "International Nautical Mile" (for full list run $ proj -lu).
-        proj_string = f'+proj=stere +lat_0={origin[1]} +lon_0={origin[0]} +k=1 +x_0=0 +y_0=0 +ellps={C.ELLIPSOID} +units=kmi +no_defs'
-        # proj_string = Proj(init="epsg:4326").definition_string()
-        self.projection = Proj(proj_string)
+        # The projection is constructed when first used.
+        self.projection = SectorElement.stereographic_proj_string(origin)
 
         # Construct the shape.
         # f = ss.SectorShape.shape_constructor(type)
         # shape = f(**kwargs)
 
         self.shape = shape
-        self.lower_limit = lower_limit
-        self.upper_limit = upper_limit
+        self.volumes = volumes if volumes is not None else [(lower_limit, upper_limit)]
+
+
+    @staticmethod
+    def stereographic_projection(origin):
+        """
+        Returns the stereographic projection, in nautical miles, centred on an origin.
+
+        :param origin: the origin coordinates as a (longitude, latitude) tuple
+        :return: a pyproj Proj instance
+        """
+
+        return Proj(SectorElement.stereographic_proj_string(origin))
+
+
+    @staticmethod
+    def stereographic_proj_string(origin):
+        """
+        Returns the proj-string of the stereographic projection, in nautical miles, centred on an origin.
+
+        :param origin: the origin coordinates as a (longitude, latitude) tuple
+        :return: a proj-string
+        """
+
+        # Construct the proj-string (see https://proj.org/usage/quickstart.html)
+        # Note the unit kmi is "International Nautical Mile" (for full list run $ proj -lu).
+        # proj_string = Proj(init="epsg:4326").definition_string()
+        return f'+proj=stere +lat_0={origin[1]} +lon_0={origin[0]} +k=1 +x_0=0 +y_0=0 +ellps={C.ELLIPSOID} +units=kmi +no_defs'
+
+
+    @property
+    def projection(self):
+        """The sector projection (a pyproj Proj instance)"""
+
+        if isinstance(self._projection, str):
+            self._projection = GeoHelper.projection(self._projection)
+        return self._projection
+
+
+    @projection.setter
+    def projection(self, projection):
+        """Sets the projection, to a pyproj Proj instance or a proj-string from which it is constructed when first used"""
+
+        self._projection = projection
+        self.__invalidate__()
+
+
+    @property
+    def shape(self):
+        """The sector shape"""
+
+        if self._shape_state is not None:
+            self._shape = SectorElement.__restore_shape__(*self._shape_state)
+            self._shape_state = None
+        return self._shape
+
+
+    @shape.setter
+    def shape(self, shape):
+
+        self._shape = shape
+        self._shape_state = None
+        self.__invalidate__()
+
+
+    def __invalidate__(self):
+        """Clears the routes and hashes cached from the sector geometry (its shape and projection)"""
+
+        self._routes = None
+        self._coordinates_hashes = {}
+        self._geometry_hash = None
+
+
+    @staticmethod
+    def __shape_state__(shape):
+        """
+        Returns the compact picklable form of a sector shape: the shape class and its parameters if it is an I, X
+        or Y shape, otherwise a polygon shape holding its polygon (as WKB), fixes and routes.
+        """
+
+        if shape is None:
+            return None
+
+        if type(shape) in [ss.IShape, ss.XShape, ss.YShape]:
+            return (type(shape), {"length_nm": shape.length_nm, "fix_names": list(shape.fixes),
+                                  "airway_width_nm": shape.airway_width_nm, "offset_nm": shape.offset_nm})
+
+        coordinates = np.array([point.coords[0] for point in shape.fixes.values()], dtype = float).reshape(-1, 2)
+        return (ss.PolygonShape, {"polygon": shape.polygon.wkb, "fix_names": list(shape.fixes),
+                                  "coordinates": coordinates, "routes": shape.routes,
+                                  "sector_type": getattr(shape, "sector_type", None)})
+
+
+    @staticmethod
+    def __restore_shape__(shape_class, params):
+        """Reconstructs a sector shape from its compact picklable form (see __shape_state__)"""
+
+        if shape_class is not ss.PolygonShape:
+            return shape_class(**params)
+
+        return ss.PolygonShape(polygon = wkb.loads(params["polygon"]),
+                               fixes = [(name, Point(x, y)) for name, (x, y) in
+                                        zip(params["fix_names"], params["coordinates"].tolist())],
+                               routes = params["routes"],
+                               sector_type = params["sector_type"])
+
+
+    def __reduce__(self):
+        """Returns the compact picklable form of the sector element (see the class docstring)"""
+
+        shape_state = self._shape_state if self._shape_state is not None else \
+            SectorElement.__shape_state__(self._shape)
+        # Keep the proj-string of an unused projection, rather than constructing it.
+        projection = self._projection if isinstance(self._projection, str) else getattr(self._projection, "srs",
+                                                                                         self._projection)
+        return (_restore_sector_element, (self.name, self.origin, self.volumes, projection, shape_state,
+                                          self._geometry_hash, self._coordinates_hashes))
+
+
+    @property
+    def volumes(self):
+        """The (lower_limit, upper_limit) pairs of the stacked sector volumes, in ascending order"""
+
+        return self._volumes
+
+
+    @volumes.setter
+    def volumes(self, volumes):
+
+        volumes = sorted((lower, upper) for lower, upper in volumes)
+        if len(volumes) == 0:
+            raise ValueError('A sector element requires at least one volume.')
+        if any(lower > upper for lower, upper in volumes):
+            raise ValueError(f'Volume lower limits must not exceed upper limits: {volumes}')
+        if any(below[1] > above[0] for below, above in zip(volumes[:-1], volumes[1:])):
+            raise ValueError(f'Sector volumes must not overlap: {volumes}')
+
+        # Sorted bands, for binary search by flight level.
+        self._volumes = volumes
+        self._volume_lower_limits = [lower for lower, _ in volumes]
+        self._volume_limits = np.array(volumes, dtype = float)
+
+
+    @property
+    def lower_limit(self):
+        """The lower flight level limit of the lowest volume"""
+
+        return self._volumes[0][0]
+
+
+    @lower_limit.setter
+    def lower_limit(self, lower_limit):
+
+        self.volumes = [(lower_limit, self._volumes[0][1])] + self._volumes[1:]
+
+
+    @property
+    def upper_limit(self):
+        """The upper flight level limit of the highest volume"""
+
+        return self._volumes[-1][1]
+
+
+    @upper_limit.setter
+    def upper_limit(self, upper_limit):
+
+        self.volumes = self._volumes[:-1] + [(self._volumes[-1][0], upper_limit)]
+
+
+    def volume_index(self, flight_level):
+        """
+        Returns the index of the volume containing a flight level, by binary search of the stacked volumes.
+
+        A flight level on the boundary of two touching volumes is in the upper volume.
+
+        :param flight_level: A flight level, or an array of flight levels
+        :return: The volume index, or -1 if the flight level is outside every volume (an integer array for array input)
+        """
+
+        if np.ndim(flight_level) == 0:
+            k = bisect_right(self._volume_lower_limits, flight_level) - 1
+            return k if k >= 0 and flight_level <= self._volumes[k][1] else -1
+
+        flight_level = np.asarray(flight_level, dtype = float)
+        k = np.searchsorted(self._volume_limits[:, 0], flight_level, side = "right") - 1
+        inside = (k >= 0) & (flight_level <= self._volume_limits[np.maximum(k, 0), 1])
+        return np.where(inside, k, -1)
+
+
+    def in_vertical_limits(self, flight_level):
+        """
+        Tests whether a flight level, or each of an array of flight levels, is inside one of the sector volumes.
+
+        :param flight_level: A flight level, or an array of flight levels
+        :return: A boolean (a boolean numpy array for array input)
+        """
+
+        return self.volume_index(flight_level) >= 0
 
 
     def polygon(self):
@@ -92,15 +304,20 @@ class SectorElement():
 
         Note: the order of coordinates in a Point is longitude then latitude.
 
-        :return: A list of Route instances.
+        The routes are immutable views, constructed (and projected) once and shared by all callers, so they
+        may be used concurrently by several threads. Use their truncated and reversed methods, or copy them,
+        to obtain modified routes.
+
+        :return: A list of RouteView instances.
         """
 
-        # Return route objects.
-        ret = self.shape.routes
-        for route in ret:
-            route.projection = self.projection
+        routes = self._routes
+        if routes is None:
+            routes = tuple(RouteView(fix_list = route.fix_list, projection = self.projection)
+                           for route in self.shape.routes)
+            self._routes = routes
 
-        return ret
+        return list(routes)
 
     def FIR_geojson(self):
         """
@@ -142,7 +359,7 @@ class SectorElement():
         geojson = {C.TYPE_KEY: C.FEATURE_COLLECTION, C.FEATURES_KEY: []}
         geojson[C.FEATURES_KEY].append(self.FIR_geojson())
         geojson[C.FEATURES_KEY].append(self.sector_geojson())
-        geojson[C.FEATURES_KEY].append(self.boundary_geojson())
+        geojson[C.FEATURES_KEY].extend([self.boundary_geojson(k) for k in range(len(self.volumes))])
         geojson[C.FEATURES_KEY].extend([route.geojson() for route in self.routes()])
         geojson[C.FEATURES_KEY].extend([self.waypoint_geojson(name) for name in self.shape.fixes.keys()])
 
@@ -150,22 +367,50 @@ class SectorElement():
 
 
     def hash_sector_coordinates(self, float_precision = C.FLOAT_PRECISION) -> str:
-        """Returns hash of the sector boundary coordinates as string"""
+        """
+        Returns a stable hash of the sector boundary coordinates as string.
 
-        # Construct properly formatted coordinates before hashing.
-        geojson = {
-            C.GEOMETRY_KEY: mapping(self.polygon())
-        }
-        coords = GeoHelper.format_coordinates(geojson, key = C.GEOMETRY_KEY, float_precision = float_precision,
-                                              as_geojson= False)
-        return str(hash(tuple(coords)))
+        The hash is cached until the shape or projection is assigned. (Shapes are immutable, so the
+        geometry can change only by assignment.)
+        """
+
+        if float_precision not in self._coordinates_hashes:
+            # Construct properly formatted coordinates before hashing.
+            geojson = {
+                C.GEOMETRY_KEY: mapping(self.polygon())
+            }
+            coords = GeoHelper.format_coordinates(geojson, key = C.GEOMETRY_KEY, float_precision = float_precision,
+                                                  as_geojson= False)
+            self._coordinates_hashes[float_precision] = HashHelper.content_hash(coords, digest_size = NAME_DIGEST_SIZE)
+
+        return self._coordinates_hashes[float_precision]
+
+
+    def content_hash(self) -> str:
+        """
+        Returns a stable hash of the sector element: its name, origin, projection, shape
+        (polygon, fixes and routes) and vertical limits.
+
+        The hash of the geometry is cached until the shape or projection is assigned (see hash_sector_coordinates).
+        """
+
+        if self._geometry_hash is None:
+            shape = self.shape
+            self._geometry_hash = HashHelper.content_hash(self.projection, shape.polygon, shape.fixes,
+                                                          [(route.fix_names(), route.fix_points(unprojected = True))
+                                                           for route in shape.routes])
+
+        # Single volume sectors hash as before stacked volumes were supported.
+        volumes = [self.volumes] if len(self.volumes) > 1 else []
+        return HashHelper.content_hash(self.name, self.origin, self.lower_limit, self.upper_limit, self._geometry_hash,
+                                       *volumes)
 
 
     def sector_geojson(self) -> dict:
         """
         Return a GeoJSON dictionary representing the sector. The sector has an
-        associated sector volume (child property) that describes the sector boundaries.
-        The ID of the sector volume is a hash of the sector coordinates.
+        associated sector volume (child property) for each stacked volume, that describes the sector boundaries.
+        The ID of each sector volume is derived from a hash of the sector coordinates (see volume_name).
 
         A sector includes elements:
         - type: "Feature"
@@ -176,7 +421,7 @@ class SectorElement():
             - shape: "I", "X" or "Y"
             - origin: [long, lat]
             - children: {
-                "SECTOR_VOLUME": {"names": [<hash of sector boundary coordinates>]},
+                "SECTOR_VOLUME": {"names": [<volume names>]},
                 "ROUTE":{"names": [<shape route names>]}
                 }
         """
@@ -189,7 +434,7 @@ class SectorElement():
                 C.SHAPE_KEY: self.shape.sector_type,
                 C.ORIGIN_KEY: self.origin,
                 C.CHILDREN_KEY: {
-                    C.SECTOR_VOLUME_VALUE : {C.CHILDREN_NAMES_KEY: [self.hash_sector_coordinates()]},
+                    C.SECTOR_VOLUME_VALUE : {C.CHILDREN_NAMES_KEY: [self.volume_name(k) for k in range(len(self.volumes))]},
                     C.ROUTE_VALUE: {C.CHILDREN_NAMES_KEY: [route.hash_route() for route in self.routes()]}
                 }
             },
@@ -199,15 +444,30 @@ class SectorElement():
         return geojson
 
 
-    def boundary_geojson(self) -> dict:
+    def volume_name(self, volume = 0) -> str:
+        """
+        Returns the ID of a sector volume: the hash of the sector coordinates, suffixed by the volume's
+        flight level limits if there are several stacked volumes.
+        """
+
+        if len(self.volumes) == 1:
+            return self.hash_sector_coordinates()
+
+        lower_limit, upper_limit = self.volumes[volume]
+        return f'{self.hash_sector_coordinates()}-{lower_limit}-{upper_limit}'
+
+
+    def boundary_geojson(self, volume = 0) -> dict:
         """
         Return a GeoJSON dictionary representing the sector boundary (volume).
 
+        :param volume: the index of the volume, in the list of stacked volumes
+
         A sector volume includes elements:
         - type: "Feature"
         - geometry: A Polygon feature whore properties are a list of long/lat coordinates defining the sector boundaries
         - properties:
-            - name: ID derived from hashing the volume's coordinates
+            - name: ID derived from hashing the volume's coordinates (see volume_name)
             - type: "SECTOR_VOLUME"
             - lower_limit: e.g. 150
             - upper_limit: e.g. 400
@@ -221,10 +481,10 @@ class SectorElement():
             C.TYPE_KEY : C.FEATURE_VALUE,
             C.GEOMETRY_KEY: mapping(self.polygon()),
             C.PROPERTIES_KEY : {
-                C.NAME_KEY: self.hash_sector_coordinates(),
+                C.NAME_KEY: self.volume_name(volume),
                 C.TYPE_KEY: C.SECTOR_VOLUME_VALUE,
-                C.LOWER_LIMIT_KEY: self.lower_limit,
-                C.UPPER_LIMIT_KEY: self.upper_limit,
+                C.LOWER_LIMIT_KEY: self.volumes[volume][0],
+                C.UPPER_LIMIT_KEY: self.volumes[volume][1],
                 # C.LENGTH_NM_KEY: self.shape.length_nm,
                 # C.AIRWAY_WIDTH_NM_KEY: self.shape.airway_width_nm,
                 # C.OFFSET_NM_KEY: self.shape.offset_nm,
@@ -244,10 +504,38 @@ class SectorElement():
         point = Point(self.projection(lon, lat))
         return (
             self.shape.polygon.contains(point) and
-            (self.lower_limit <= flight_level <= self.upper_limit)
+            self.in_vertical_limits(flight_level)
             )
 
 
+    def contains_points(self, lon, lat, flight_level):
+        """
+        Vectorised form of contains: tests whether each of an array of points is inside the sector boundary.
+
+        :param lon: Array of longitudes
+        :param lat: Array of latitudes
+        :param flight_level: Array of flight levels
+        :return: A boolean numpy array
+        """
+
+        x, y = self.projection(np.asarray(lon, dtype = float), np.asarray(lat, dtype = float))
+        return self.contains_projected_points(x, y, flight_level)
+
+
+    def contains_projected_points(self, x, y, flight_level):
+        """
+        Tests whether each of an array of points, in projected coordinates, is inside the sector boundary.
+
+        :param x: Array of projected x coordinates
+        :param y: Array of projected y coordinates
+        :param flight_level: Array of flight levels
+        :return: A boolean numpy array
+        """
+
+        return GeoHelper.contains_xy(self.shape.polygon, x, y) & \
+               self.in_vertical_limits(np.asarray(flight_level, dtype = float))
+
+
     def waypoint_geojson(self, name) -> dict:
         """
         Return a GeoJSON dictionary representing the waypoints (fixes)
@@ -294,15 +582,33 @@ class SectorElement():
         """
         parser = sp.SectorParser(sector_geojson)
 
-        shape = ss.PolygonShape(
-            polygon = parser.sector_polygon(),
-            fixes = parser.fixes(),
-            routes = parser.routes()
-        )
-        return SectorElement(
-            shape = shape,
+        ret = SectorElement(
+            shape = None,
             name = parser.sector_name(),
             origin = parser.sector_origin().coords[0],
-            lower_limit = parser.sector_lower_limit(),
-            upper_limit = parser.sector_upper_limit(),
+            volumes = parser.sector_volumes(),
+        )
+
+        # The sector shape is defined in the sector's projection, whereas the GeoJSON holds geographic coordinates.
+        def project(coordinates):
+            return GeoHelper.__project__(ret.projection, Point(coordinates))
+
+        ret.shape = ss.PolygonShape(
+            polygon = GeoHelper.__project__(ret.projection, parser.sector_polygon()),
+            fixes = [(name, GeoHelper.__project__(ret.projection, point)) for name, point in parser.fixes()],
+            routes = [Route(fix_list = [(name, project(coordinates)) for name, coordinates in route.fix_list])
+                      for route in parser.routes()],
+            sector_type = parser.sector_type()
         )
+        return ret
+
+
+def _restore_sector_element(name, origin, volumes, projection, shape_state, geometry_hash, coordinates_hashes):
+    """Reconstructs a sector element from its compact picklable form (see SectorElement.__reduce__)"""
+
+    ret = SectorElement(shape = None, name = name, origin = origin, volumes = volumes)
+    ret.projection = projection
+    ret._shape_state = shape_state
+    ret._geometry_hash = geometry_hash
+    ret._coordinates_hashes = coordinates_hashes
+    return ret
@@ -2,8 +2,12 @@
 Construction of 2D polygons (including I, X, Y shapes) for use as
 cross-sections of airspace sector elements.
 
+Airspace made of several sector elements is supported, for containment queries,
+by aviary.sector.composite_airspace.
+
 TODO:
-    - support gluing together simple I, X, Y elements to construct more complex sector shapes.
+    - support gluing together simple I, X, Y elements to construct more complex sector shapes
+      (i.e. with routes that cross from one element to another).
 """
 # author: Tim Hobson
 # email: thobson@turing.ac.uk
@@ -68,7 +72,7 @@ class SectorShape:
 
 class PolygonShape(SectorShape):
 
-    def __init__(self, polygon, fixes, routes):
+    def __init__(self, polygon, fixes, routes, sector_type = None):
         assert isinstance(polygon, geom.polygon.BaseGeometry)
 
         for fix in fixes:
@@ -82,8 +86,9 @@ class PolygonShape(SectorShape):
                 assert fix in fix_names
 
         self._polygon = polygon
-        self._fixes = fixes
+        self._fixes = dict(fixes)
         self._routes = routes
+        self.sector_type = sector_type
 
 class IShape(SectorShape):
 
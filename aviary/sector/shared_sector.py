@@ -0,0 +1,89 @@
+"""
+Sharing of sector elements between processes.
+
+A SectorElement's compact pickled form (see SectorElement) is published once
+into a multiprocessing.shared_memory block. Worker processes are sent only a
+small descriptor of the block, and attach to it: each process unpickles the
+sector once and thereafter reuses it, so tasks may pass the descriptor with
+every call instead of the sector itself.
+
+Example (with a process pool):
+
+    with SharedSector(sector_element) as shared:
+        with ProcessPoolExecutor() as executor:
+            executor.submit(task, shared.descriptor, ...)
+
+    def task(descriptor, ...):
+        sector_element = SharedSector.attach(descriptor)
+        ...
+"""
+
+import pickle
+
+from aviary.utils.shared_memory_helper import SharedMemoryHelper
+
+# Descriptor keys
+NAME_KEY = "name"
+SIZE_KEY = "size"
+
+# Sector elements attached by this process, keyed by shared memory block name
+_attached = {}
+
+class SharedSector():
+    """A sector element published in shared memory.
+
+    Args:
+        sector_element (SectorElement): The sector element to be shared.
+
+    Attributes:
+        descriptor (dict): A small, picklable description of the shared sector, from which
+            worker processes may attach to it (see attach).
+    """
+
+    def __init__(self, sector_element):
+
+        data = pickle.dumps(sector_element, protocol = pickle.HIGHEST_PROTOCOL)
+
+        self.shm = SharedMemoryHelper.publish(data)
+        self.descriptor = {
+            NAME_KEY: self.shm.name,
+            SIZE_KEY: len(data)
+        }
+
+
+    def close(self):
+        """Closes and unlinks the shared memory block. Processes which have already attached keep their sector."""
+
+        if self.shm is None:
+            return
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        Attaches to a shared sector element. The sector is unpickled on the first call in each process,
+        and the same instance returned by subsequent calls.
+
+        :param descriptor: The descriptor attribute of a SharedSector instance.
+        :return: A SectorElement instance.
+        """
+
+        name = descriptor[NAME_KEY]
+        if name not in _attached:
+            shm = SharedMemoryHelper.attach(name)
+            try:
+                _attached[name] = pickle.loads(shm.buf[:descriptor[SIZE_KEY]])
+            finally:
+                shm.close()
+        return _attached[name]
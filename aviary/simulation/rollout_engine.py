@@ -0,0 +1,266 @@
+"""
+Vectorised kinematic rollout of generated scenarios.
+
+Advances all of a scenario's aircraft along their routes in lockstep, without
+an external simulator. Aircraft state (along-track distance, flight level and
+climb progress) is held in NumPy arrays and positions are computed in the
+sector element's projected coordinates (nautical miles).
+
+Aircraft cruise at the trajectory predictor's cruise speed for their current
+flight level, and climb towards their requested flight level following the
+predictor's climb time and downtrack distance profiles. Descents are not
+modelled: an aircraft whose requested flight level is below its current level
+remains at its current level. An aircraft is removed once it reaches the final
+fix on its route.
+"""
+
+import numpy as np
+
+import aviary.constants as C
+import aviary.scenario.scenario_generator as sg
+from aviary.scenario.scenario_timeline import ScenarioTimeline
+
+# Rollout keys
+TIMES_KEY = "times"
+FLIGHT_LEVELS_KEY = "flight_levels"
+
+class RolloutEngine():
+    """A kinematic simulator for the aircraft in a generated scenario.
+
+    Args:
+        scenario (dict): A scenario dictionary, as returned by ScenarioGenerator.generate_scenario.
+        sector_element (SectorElement): The sector element in which the scenario takes place.
+        trajectory_predictor (TrajectoryPredictor): Trajectory predictor offering cruise speed, climb time and downtrack distance estimates.
+
+    Attributes:
+        callsigns (list): The aircraft callsigns, in the (start time) order used by all state arrays.
+        start_times (numpy array): Aircraft start times in seconds since the scenario start time.
+        time (float): The current simulation time in seconds since the scenario start time.
+        distance (numpy array): The distance in nautical miles travelled by each aircraft along its route.
+        flight_level (numpy array): The current flight level of each aircraft.
+        finished (numpy array): A boolean mask of the aircraft which have reached the end of their route.
+    """
+
+    def __init__(self, scenario, sector_element, trajectory_predictor):
+
+        timeline = ScenarioTimeline(scenario)
+        aircraft = timeline.aircraft
+
+        self.projection = sector_element.projection
+        self.trajectory_predictor = trajectory_predictor
+        self.callsigns = timeline.callsigns()
+        self.start_times = timeline.start_times
+
+        self.__init_routes__(aircraft)
+        self.__init_profiles__(aircraft)
+        self.reset()
+
+
+    def __init_routes__(self, aircraft):
+        """Constructs the padded arrays of projected route waypoints and cumulative distances along each route"""
+
+        paths = []
+        for ac in aircraft:
+            points = [ac[sg.START_POSITION_KEY]] + [fix[C.GEOMETRY_KEY][C.COORDINATES_KEY] for fix in ac[sg.ROUTE_KEY]]
+            lons, lats = np.array(points, dtype = float).T
+            paths.append(np.column_stack(self.projection(lons, lats)))
+
+        # Pad each path to a common number (at least two) of waypoints by repeating its final waypoint.
+        n_points = max([2] + [len(path) for path in paths])
+        self.waypoints = np.empty((len(paths), n_points, 2))
+        for i, path in enumerate(paths):
+            self.waypoints[i, :len(path)] = path
+            self.waypoints[i, len(path):] = path[-1]
+
+        segment_lengths = np.linalg.norm(np.diff(self.waypoints, axis = 1), axis = 2)
+        self.distances = np.concatenate([np.zeros((len(paths), 1)), np.cumsum(segment_lengths, axis = 1)], axis = 1)
+        self.route_lengths = self.distances[:, -1]
+
+
+    def __init_profiles__(self, aircraft):
+        """Tabulates the trajectory predictor's profiles for each aircraft type and each aircraft's climb"""
+
+        types = [ac[sg.AIRCRAFT_TYPE_KEY] for ac in aircraft]
+        self.initial_flight_level = np.array([ac[sg.CURRENT_FLIGHT_LEVEL_KEY] for ac in aircraft], dtype = float)
+        requested_flight_level = np.array([ac[sg.REQUESTED_FLIGHT_LEVEL_KEY] for ac in aircraft], dtype = float)
+
+        levels = self.trajectory_predictor.flight_levels()
+        if levels is None:
+            levels = sorted(set(self.initial_flight_level.tolist() + requested_flight_level.tolist()))
+
+        # Profiles are (xp, fp) pairs suitable for np.interp, one per aircraft type.
+        self.aircraft_types = sorted(set(types))
+        self.type_masks = [np.array([t == aircraft_type for t in types], dtype = bool) for aircraft_type in self.aircraft_types]
+        self.speed_profiles = []
+        self.level_profiles = []
+        self.downtrack_profiles = []
+        climb_time_profiles = []
+        for aircraft_type in self.aircraft_types:
+
+            speeds = self.__tabulate__(self.trajectory_predictor.cruise_speed, levels, aircraft_type)
+            times = self.__tabulate__(self.trajectory_predictor.climb_time_to_level, levels, aircraft_type)
+            downtrack = self.__tabulate__(self.trajectory_predictor.downtrack_distance_to_level, levels, aircraft_type)
+
+            cruise = np.isfinite(speeds)
+            climb = np.isfinite(times) & np.isfinite(downtrack)
+            if not cruise.any() or not climb.any():
+                raise ValueError(f'Insufficient trajectory prediction data for aircraft type {aircraft_type}.')
+
+            climb_levels = np.array(levels, dtype = float)[climb]
+            climb_times = np.maximum.accumulate(times[climb])
+
+            self.speed_profiles.append((np.array(levels, dtype = float)[cruise], speeds[cruise]))
+            self.level_profiles.append((climb_times, climb_levels))
+            self.downtrack_profiles.append((climb_times, np.maximum.accumulate(downtrack[climb])))
+            climb_time_profiles.append((climb_levels, climb_times))
+
+        # The climb clock measures time since the start of a climb from the lowest tabulated level.
+        self.initial_climb_clock = self.__lookup__(self.initial_flight_level, climb_time_profiles)
+        self.climb_clock_end = np.where(requested_flight_level > self.initial_flight_level,
+                                        self.__lookup__(requested_flight_level, climb_time_profiles),
+                                        self.initial_climb_clock)
+
+
+    @staticmethod
+    def __tabulate__(f, levels, aircraft_type):
+        """Evaluates a trajectory predictor method at the given flight levels, with NaN where no prediction is available"""
+
+        ret = np.full(len(levels), np.nan)
+        for i, flight_level in enumerate(levels):
+            try:
+                ret[i] = f(flight_level, aircraft_type)
+            except KeyError:
+                pass
+        return ret
+
+
+    def __lookup__(self, x, profiles):
+        """Interpolates per-aircraft values in the per-aircraft-type profiles"""
+
+        ret = np.empty(len(x))
+        for mask, (xp, fp) in zip(self.type_masks, profiles):
+            ret[mask] = np.interp(x[mask], xp, fp)
+        return ret
+
+
+    def __len__(self):
+        return len(self.callsigns)
+
+
+    def reset(self):
+        """Resets the simulation to the scenario start time"""
+
+        self.time = 0.0
+        self.distance = np.zeros(len(self))
+        self.flight_level = self.initial_flight_level.copy()
+        self.climb_clock = self.initial_climb_clock.copy()
+        self.finished = self.route_lengths <= 0
+
+
+    def active(self):
+        """Returns a boolean mask of the aircraft present at the current time"""
+
+        return (self.start_times <= self.time) & ~self.finished
+
+
+    def step(self, dt):
+        """
+        Advances the simulation by a time step.
+
+        :param dt: The time step in seconds
+        """
+
+        t0 = self.time
+        self.time = t0 + dt
+
+        # Time spent in flight during this step (an aircraft may start part way through it).
+        elapsed = np.clip(self.time - np.maximum(self.start_times, t0), 0, dt)
+        moving = (elapsed > 0) & ~self.finished
+        elapsed = np.where(moving, elapsed, 0)
+
+        # Climb, for as much of the step as the climb lasts.
+        climbing = moving & (self.climb_clock < self.climb_clock_end)
+        climb_clock = np.minimum(self.climb_clock + elapsed, self.climb_clock_end)
+        distance = self.__lookup__(climb_clock, self.downtrack_profiles) - \
+                   self.__lookup__(self.climb_clock, self.downtrack_profiles)
+        self.flight_level = np.where(climbing, self.__lookup__(climb_clock, self.level_profiles), self.flight_level)
+
+        # Cruise for the remainder of the step.
+        cruise_time = elapsed - (climb_clock - self.climb_clock)
+        distance = distance + self.__lookup__(self.flight_level, self.speed_profiles) * cruise_time
+
+        self.climb_clock = climb_clock
+        self.distance += np.where(moving, distance / C.METRES_PER_NM, 0)
+        self.finished |= moving & (self.distance >= self.route_lengths)
+
+
+    def positions(self, projected = False):
+        """
+        Returns the current aircraft positions, with NaN coordinates for inactive aircraft.
+
+        :param projected: If True, returns projected x-y coordinates (in nautical miles) rather than longitude/latitude.
+        :return: A pair of numpy arrays (of x & y coordinates, or of longitudes & latitudes)
+        """
+
+        rows = np.arange(len(self))
+
+        # Index of the route segment on which each aircraft lies.
+        segment = (self.distances[:, 1:-1] <= self.distance[:, np.newaxis]).sum(axis = 1)
+
+        start = self.distances[rows, segment]
+        length = self.distances[rows, segment + 1] - start
+        fraction = np.divide(self.distance - start, length, out = np.zeros(len(self)), where = length > 0)
+        fraction = np.clip(fraction, 0, 1)[:, np.newaxis]
+
+        xy = self.waypoints[rows, segment] + fraction * (self.waypoints[rows, segment + 1] - self.waypoints[rows, segment])
+        xy[~self.active()] = np.nan
+
+        if projected:
+            return xy[:, 0], xy[:, 1]
+        return self.projection(xy[:, 0], xy[:, 1], inverse = True)
+
+
+    def flight_levels(self):
+        """Returns the current aircraft flight levels, with NaN for inactive aircraft"""
+
+        return np.where(self.active(), self.flight_level, np.nan)
+
+
+    def ticks(self, duration, dt = 1):
+        """
+        Generates the aircraft positions at each time step, from the current time up to the given duration.
+
+        :param duration: The simulation end time in seconds since the scenario start time
+        :param dt: The time step in seconds
+        :return: A generator of (time, longitudes, latitudes, flight levels) tuples
+        """
+
+        # Allow for rounding error in the number of whole steps.
+        n_steps = max(0, int(np.floor((duration - self.time) / dt + 1e-9)))
+
+        for i in range(n_steps + 1):
+            if i > 0:
+                self.step(dt)
+            lons, lats = self.positions()
+            yield self.time, lons, lats, self.flight_levels()
+
+
+    def run(self, duration, dt = 1):
+        """
+        Runs the simulation from the scenario start time.
+
+        :param duration: The simulation end time in seconds since the scenario start time
+        :param dt: The time step in seconds
+        :return: A dictionary holding an array of times and, for each of longitudes, latitudes and flight levels,
+                 an array with one row per time and one column per aircraft (in callsigns order).
+        """
+
+        self.reset()
+        times, lons, lats, flight_levels = zip(*self.ticks(duration = duration, dt = dt))
+
+        return {
+            TIMES_KEY: np.array(times),
+            C.LONGITUDES_KEY: np.array(lons).reshape(len(times), len(self)),
+            C.LATITUDES_KEY: np.array(lats).reshape(len(times), len(self)),
+            FLIGHT_LEVELS_KEY: np.array(flight_levels).reshape(len(times), len(self))
+        }
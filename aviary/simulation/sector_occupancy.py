@@ -0,0 +1,265 @@
+"""
+Sector occupancy (the number of aircraft inside a sector) over time.
+
+Each aircraft's occupancy of the sector is a set of [entry time, exit time)
+intervals, derived either:
+
+- from route geometry: the intersections of the aircraft's projected path
+  with the sector polygon, converted to times at the trajectory predictor's
+  cruise speed for the aircraft's initial flight level. Climbs are not
+  modelled, so aircraft whose initial flight level is outside the sector's
+  volumes never enter it. Intersections are computed once per
+  distinct path, and most aircraft in a scenario share a few paths.
+- from a rollout: the times at which the aircraft positions computed by the
+  RolloutEngine, at regular time steps, enter and leave the sector. This
+  accounts for climbs, at the resolution of the time step.
+
+The occupancy step function is computed from the intervals by a sweep over
+the sorted entry and exit times, rather than by sampling each time step.
+Occupancy of many scenarios at common sample times is computed with a single
+cumulative sum over a histogram of entry and exit events.
+"""
+
+import numpy as np
+
+from shapely.geometry import LineString, Point
+
+import aviary.constants as C
+import aviary.scenario.scenario_generator as sg
+import aviary.simulation.rollout_engine as re
+from aviary.scenario.scenario_timeline import ScenarioTimeline
+
+# Method names
+ROUTES_METHOD = "routes"
+ROLLOUT_METHOD = "rollout"
+
+# Interval keys
+AIRCRAFT_INDEX_KEY = "aircraft_index"
+ENTRY_TIME_KEY = "entry_time"
+EXIT_TIME_KEY = "exit_time"
+
+
+def occupancy(entry_times, exit_times):
+    """
+    Computes the occupancy step function from arrays of entry and exit times.
+
+    Infinite exit times (i.e. aircraft which never leave the sector) are ignored.
+
+    :param entry_times: Array of entry times.
+    :param exit_times: Array of exit times.
+    :return: A pair (times, counts) of arrays, where counts[k] is the occupancy from times[k] until times[k + 1]
+             (and after the final time). The occupancy before times[0] is zero.
+    """
+
+    entry_times = np.asarray(entry_times, dtype = float)
+    exit_times = np.asarray(exit_times, dtype = float)
+    exit_times = exit_times[np.isfinite(exit_times)]
+
+    times = np.concatenate([entry_times, exit_times])
+    delta = np.concatenate([np.ones(len(entry_times), dtype = int), -np.ones(len(exit_times), dtype = int)])
+
+    order = np.argsort(times, kind = "stable")
+    times, counts = times[order], np.cumsum(delta[order])
+
+    # Keep the final count at each distinct time.
+    last = np.ones(len(times), dtype = bool)
+    last[:-1] = times[1:] != times[:-1]
+    return times[last], counts[last]
+
+
+def occupancy_at(times, counts, t):
+    """
+    Evaluates an occupancy step function at an array of times.
+
+    :param times: Array of step times, as returned by occupancy.
+    :param counts: Array of counts, as returned by occupancy.
+    :param t: Array of times at which to evaluate the occupancy.
+    :return: An integer array with the same shape as t.
+    """
+
+    # Prepend the zero occupancy before the first step.
+    counts = np.concatenate([[0], np.asarray(counts, dtype = int)])
+    return counts[np.searchsorted(times, t, side = "right")]
+
+
+class SectorOccupancy():
+    """
+    Computes the occupancy of a sector by the aircraft in generated scenarios.
+
+    Args:
+        sector_element (SectorElement): The sector element.
+        trajectory_predictor (TrajectoryPredictor): Trajectory predictor offering cruise speed (and, for rollouts,
+            climb time and downtrack distance) estimates.
+
+    Attributes:
+        As Args.
+    """
+
+    def __init__(self, sector_element, trajectory_predictor):
+
+        self.sector_element = sector_element
+        self.trajectory_predictor = trajectory_predictor
+        self.__path_intervals = {}
+
+
+    def path_intervals(self, points):
+        """
+        Returns the intervals of distance along a path for which it is inside the sector polygon.
+
+        :param points: A tuple of (longitude, latitude) coordinates of the points on the path.
+        :return: A pair (start, end) of arrays of distances in nautical miles.
+        """
+
+        if points not in self.__path_intervals:
+            lons, lats = np.array(points, dtype = float).T
+            path = LineString(np.column_stack(self.sector_element.projection(lons, lats)))
+
+            intersection = path.intersection(self.sector_element.shape.polygon)
+            pieces = getattr(intersection, "geoms", [intersection])
+            bounds = sorted(sorted([path.project(Point(piece.coords[0])), path.project(Point(piece.coords[-1]))])
+                            for piece in pieces if isinstance(piece, LineString) and not piece.is_empty)
+
+            self.__path_intervals[points] = (np.array([b[0] for b in bounds], dtype = float),
+                                             np.array([b[1] for b in bounds], dtype = float))
+
+        return self.__path_intervals[points]
+
+
+    def route_intervals(self, scenario):
+        """
+        Computes the sector occupancy intervals of each aircraft from route geometry and cruise speeds.
+
+        :param scenario: A scenario dictionary, as returned by ScenarioGenerator.generate_scenario.
+        :return: A dictionary of arrays, with one element per interval:
+            - aircraft_index: the index of the aircraft in the scenario timeline (i.e. in start time order)
+            - entry_time, exit_time: the times of entry and exit in seconds since the scenario start time
+        """
+
+        timeline = ScenarioTimeline(scenario)
+
+        index, entry, exit = [], [], []
+        speeds = {}
+        for k, (start_time, ac) in enumerate(timeline):
+            flight_level = ac[sg.CURRENT_FLIGHT_LEVEL_KEY]
+            if not self.sector_element.in_vertical_limits(flight_level):
+                continue
+
+            key = (flight_level, ac[sg.AIRCRAFT_TYPE_KEY])
+            if key not in speeds:
+                speeds[key] = self.trajectory_predictor.cruise_speed(*key) / C.METRES_PER_NM
+
+            points = tuple([tuple(ac[sg.START_POSITION_KEY])] +
+                           [tuple(fix[C.GEOMETRY_KEY][C.COORDINATES_KEY]) for fix in ac[sg.ROUTE_KEY]])
+            start, end = self.path_intervals(points)
+
+            index.append(np.full(len(start), k))
+            entry.append(start_time + start / speeds[key])
+            exit.append(start_time + end / speeds[key])
+
+        return self.__intervals__(index, entry, exit)
+
+
+    def rollout_intervals(self, scenario, duration, dt = 1):
+        """
+        Computes the sector occupancy intervals of each aircraft from a rollout of the scenario.
+
+        An aircraft still inside the sector at the end of the rollout has an infinite exit time.
+
+        :param scenario: A scenario dictionary, as returned by ScenarioGenerator.generate_scenario.
+        :param duration: The rollout duration in seconds.
+        :param dt: The rollout time step in seconds.
+        :return: See route_intervals.
+        """
+
+        rollout = re.RolloutEngine(scenario, self.sector_element, self.trajectory_predictor).run(duration, dt = dt)
+        times = rollout[re.TIMES_KEY]
+        lons = rollout[C.LONGITUDES_KEY]
+
+        # Test all positions at every time step in a single pass.
+        inside = self.sector_element.contains_points(lons.ravel(), rollout[C.LATITUDES_KEY].ravel(),
+                                                     rollout[re.FLIGHT_LEVELS_KEY].ravel()).reshape(lons.shape)
+
+        padding = np.zeros((1, inside.shape[1]), dtype = np.int8)
+        edges = np.diff(np.vstack([padding, inside.astype(np.int8), padding]), axis = 0).T
+        index, entry = np.nonzero(edges == 1)
+        _, exit = np.nonzero(edges == -1)
+
+        return self.__intervals__([index], [times[entry]], [np.append(times, np.inf)[exit]])
+
+
+    @staticmethod
+    def __intervals__(index, entry, exit):
+        """Returns a dictionary of interval arrays, from lists of arrays"""
+
+        return {
+            AIRCRAFT_INDEX_KEY: np.concatenate(index).astype(int) if index else np.zeros(0, dtype = int),
+            ENTRY_TIME_KEY: np.concatenate(entry).astype(float) if entry else np.zeros(0),
+            EXIT_TIME_KEY: np.concatenate(exit).astype(float) if exit else np.zeros(0)
+        }
+
+
+    def intervals(self, scenario, method = ROUTES_METHOD, duration = None, dt = 1):
+        """
+        Computes the sector occupancy intervals of each aircraft by the given method.
+
+        :param scenario: A scenario dictionary, as returned by ScenarioGenerator.generate_scenario.
+        :param method: "routes" (route geometry and cruise speeds) or "rollout".
+        :param duration: The rollout duration in seconds (required by the rollout method).
+        :param dt: The rollout time step in seconds.
+        :return: See route_intervals.
+        """
+
+        if method == ROUTES_METHOD:
+            return self.route_intervals(scenario)
+        if method == ROLLOUT_METHOD:
+            if duration is None:
+                raise ValueError('A duration is required to compute occupancy from a rollout.')
+            return self.rollout_intervals(scenario, duration = duration, dt = dt)
+        raise ValueError(f'Invalid occupancy method: {method}. Expected "{ROUTES_METHOD}" or "{ROLLOUT_METHOD}".')
+
+
+    def occupancy(self, scenario, method = ROUTES_METHOD, duration = None, dt = 1):
+        """
+        Computes the occupancy step function of a scenario.
+
+        :param scenario: A scenario dictionary, as returned by ScenarioGenerator.generate_scenario.
+        :param method: "routes" (route geometry and cruise speeds) or "rollout".
+        :param duration: The rollout duration in seconds (required by the rollout method).
+        :param dt: The rollout time step in seconds.
+        :return: A pair (times, counts) of arrays (see the occupancy function).
+        """
+
+        intervals = self.intervals(scenario, method = method, duration = duration, dt = dt)
+        return occupancy(intervals[ENTRY_TIME_KEY], intervals[EXIT_TIME_KEY])
+
+
+    def batch_occupancy(self, scenarios, times, method = ROUTES_METHOD, duration = None, dt = 1):
+        """
+        Computes the occupancy of each of a sequence of scenarios at common sample times.
+
+        :param scenarios: An iterable of scenario dictionaries.
+        :param times: Sorted array of sample times in seconds since each scenario's start time.
+        :param method: "routes" (route geometry and cruise speeds) or "rollout".
+        :param duration: The rollout duration in seconds (required by the rollout method).
+        :param dt: The rollout time step in seconds.
+        :return: An integer array with one row per scenario and one column per sample time.
+        """
+
+        times = np.asarray(times, dtype = float)
+
+        n_scenarios = 0
+        scenario_index, entry, exit = [], [], []
+        for s, scenario in enumerate(scenarios):
+            intervals = self.intervals(scenario, method = method, duration = duration, dt = dt)
+            scenario_index.append(np.full(len(intervals[ENTRY_TIME_KEY]), s))
+            entry.append(intervals[ENTRY_TIME_KEY])
+            exit.append(intervals[EXIT_TIME_KEY])
+            n_scenarios += 1
+
+        # Each event changes the occupancy at every sample time from the first at or after it.
+        histogram = np.zeros((n_scenarios, len(times) + 1), dtype = int)
+        if n_scenarios > 0:
+            scenario_index, entry, exit = [np.concatenate(a) for a in [scenario_index, entry, exit]]
+            np.add.at(histogram, (scenario_index, np.searchsorted(times, entry, side = "left")), 1)
+            np.add.at(histogram, (scenario_index, np.searchsorted(times, exit, side = "left")), -1)
+        return np.cumsum(histogram, axis = 1)[:, :len(times)]
@@ -1,6 +1,7 @@
 
 import pytest
 
+import functools
 import pandas
 from io import StringIO
 
@@ -8,6 +9,7 @@ import aviary.sector.sector_shape as ss
 import aviary.sector.sector_element as se
 import aviary.scenario.poisson_scenario as ps
 import aviary.scenario.overflier_climber_scenario as ocs
+from aviary.trajectory.lookup_trajectory_predictor import LookupTrajectoryPredictor
 
 @pytest.fixture(scope="function")
 def i_element():
@@ -54,6 +56,22 @@ def y_element():
     return se.SectorElement(shape = shape, name = name, origin = origin, lower_limit = lower_limit, upper_limit = upper_limit)
 
 
+def poisson_scenario(arrival_rate):
+    """Scenario algorithm factory (module-level, so it may be pickled)"""
+
+    shape = ss.IShape(fix_names = ['a', 'b', 'c', 'd', 'e'])
+    element = se.SectorElement(shape = shape, name = "EARTH", origin = (-0.1275, 51.5), lower_limit = 140,
+                               upper_limit = 400)
+    return ps.PoissonScenario(sector_element = element, arrival_rate = arrival_rate)
+
+
+@pytest.fixture(scope="function")
+def scenario_factory():
+    """Test fixture: a picklable scenario algorithm factory, e.g. for worker processes."""
+
+    return functools.partial(poisson_scenario, arrival_rate = 2 / 60)
+
+
 @pytest.fixture(scope="function")
 def cruise_speed_dataframe():
     """Test fixture: a data frame of flight level vs cruise speed, by aircraft type"""
@@ -111,6 +129,15 @@ def downtrack_distance_dataframe():
     return pandas.read_csv(downtrack_distance_data, index_col = index_col)
 
 
+@pytest.fixture(scope="function")
+def predictor(cruise_speed_dataframe, climb_time_dataframe, downtrack_distance_dataframe):
+    """Test fixture: a LookupTrajectoryPredictor object"""
+
+    return LookupTrajectoryPredictor(cruise_speed_lookup = cruise_speed_dataframe,
+                                     climb_time_lookup = climb_time_dataframe,
+                                     downtrack_distance_lookup = downtrack_distance_dataframe)
+
+
 @pytest.fixture(scope="function")
 def i_sector_geojson():
     """Test fixture: a serialised geoJSON sector,
@@ -0,0 +1,113 @@
+import pytest
+
+import numpy as np
+
+import aviary.metrics.closest_point_of_approach as cpa
+import aviary.metrics.utils as utils
+
+_SCALE_FEET_TO_METERS = 1/utils._SCALE_METRES_TO_FEET
+_KNOTS = utils._ONE_NM / 3600  # Metres per second.
+
+
+def test_closest_point_of_approach():
+
+    # Head-on, parallel (no relative motion) and diverging pairs.
+    x = np.array([0., 20., 0., 10.])
+    y = np.array([0., 0., 5., 5.])
+    vx = np.array([0.1, -0.1, 0., 0.1])
+    vy = np.zeros(4)
+
+    i, j, t_cpa, d_cpa = cpa.closest_point_of_approach(x, y, vx, vy, horizon = 300)
+
+    assert list(zip(i, j)) == [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]
+    assert t_cpa[0] == pytest.approx(100)
+    assert d_cpa[0] == pytest.approx(0)
+
+    # Aircraft 0 & 3 have no relative motion: closest approach is now.
+    assert t_cpa[2] == 0
+    assert d_cpa[2] == pytest.approx(np.hypot(10, 5))
+
+    # Aircraft 2 is stationary and aircraft 3 is flying away from it.
+    assert t_cpa[5] == 0
+    assert d_cpa[5] == pytest.approx(10)
+
+    # Closest approach beyond the horizon is clipped to the horizon.
+    _, _, t_cpa, d_cpa = cpa.closest_point_of_approach(x, y, vx, vy, horizon = 50)
+    assert t_cpa[0] == 50
+    assert d_cpa[0] == pytest.approx(10)
+
+
+def test_closest_point_of_approach_brute_force():
+
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(-50, 50, (2, 30))
+    vx, vy = rng.uniform(-0.15, 0.15, (2, 30))
+
+    _, _, t_cpa, d_cpa = cpa.closest_point_of_approach(x, y, vx, vy, horizon = 300)
+
+    t = np.linspace(0, 300, 3001)
+    i, j = np.triu_indices(30, k = 1)
+    d = np.hypot((x[j] - x[i])[:, None] + (vx[j] - vx[i])[:, None] * t, (y[j] - y[i])[:, None] + (vy[j] - vy[i])[:, None] * t)
+
+    assert np.all(d_cpa <= d.min(axis = 1) + 1e-9)
+    assert np.allclose(d_cpa, d.min(axis = 1), atol = 1e-3)
+
+
+def test_projected_state(i_element):
+
+    lon, lat = i_element.origin
+
+    # Flying due north at 360 knots (0.1 nm per second).
+    x, y, vx, vy = cpa.projected_state([lon], [lat], [0], [360 * _KNOTS], i_element.projection)
+
+    assert x[0] == pytest.approx(0, abs = 1e-6)
+    assert y[0] == pytest.approx(0, abs = 1e-6)
+    assert vx[0] == pytest.approx(0, abs = 1e-6)
+    assert vy[0] == pytest.approx(0.1, rel = 1e-3)
+
+
+def test_predict_conflicts(i_element):
+
+    lon, lat = i_element.centre_point()
+    speed = 360 * _KNOTS
+
+    # Aircraft 0 & 1 converge head-on at the same level 20nm apart (along the I-shaped sector).
+    # Aircraft 2 is as aircraft 1 but 2000ft higher. Aircraft 3 is climbing towards aircraft 0's level.
+    lons = [lon, lon, lon, lon]
+    lats = [lat, lat + 20 / 60, lat + 20 / 60, lat + 20 / 60]
+    alts = np.array([30000, 30000, 32000, 26000]) * _SCALE_FEET_TO_METERS
+    tracks = [0, 180, 180, 180]
+    speeds = [speed] * 4
+    vertical_speeds = np.array([0, 0, 0, 2000 / 60]) * _SCALE_FEET_TO_METERS
+
+    result = cpa.predict_conflicts(lons, lats, alts, tracks, speeds, i_element.projection,
+                                   vertical_speed = vertical_speeds, horizon = 300)
+
+    pairs = list(zip(result[cpa.I_KEY], result[cpa.J_KEY]))
+
+    head_on = pairs.index((0, 1))
+    assert result[cpa.T_CPA_KEY][head_on] == pytest.approx(100, rel = 1e-2)
+    assert result[cpa.D_CPA_KEY][head_on] == pytest.approx(0, abs = 0.1)
+    assert result[cpa.VERT_CPA_KEY][head_on] == pytest.approx(0)
+    assert result[cpa.LOSS_KEY][head_on]
+    # Loss of separation occurs when the aircraft are 5nm apart, i.e. 15nm (at 0.2nm/s) before the CPA.
+    assert result[cpa.T_LOSS_KEY][head_on] == pytest.approx(75, rel = 1e-2)
+
+    # Vertical separation is maintained.
+    separated = pairs.index((0, 2))
+    assert result[cpa.VERT_CPA_KEY][separated] == pytest.approx(2000)
+    assert not result[cpa.LOSS_KEY][separated]
+    assert np.isnan(result[cpa.T_LOSS_KEY][separated])
+
+    # The climber is within 1000ft of aircraft 0 from 90s onwards (i.e. 3000ft higher).
+    climber = pairs.index((0, 3))
+    assert result[cpa.LOSS_KEY][climber]
+    assert result[cpa.T_LOSS_KEY][climber] == pytest.approx(90, rel = 1e-2)
+
+    # Without the climb, vertical separation is maintained.
+    result = cpa.predict_conflicts(lons, lats, alts, tracks, speeds, i_element.projection, horizon = 300)
+    assert not result[cpa.LOSS_KEY][climber]
+
+    # Loss of separation beyond the horizon is not predicted.
+    result = cpa.predict_conflicts(lons, lats, alts, tracks, speeds, i_element.projection, horizon = 60)
+    assert not result[cpa.LOSS_KEY].any()
@@ -0,0 +1,202 @@
+import pytest
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import aviary.metrics.evaluation_pipeline as ep
+import aviary.metrics.metrics_engine as me
+import aviary.metrics.utils as utils
+import aviary.scenario.scenario_generator as sg
+
+_SCALE_FEET_TO_METRES = 1/utils._SCALE_METRES_TO_FEET
+
+N_STEPS = 40
+
+
+def scenario(i_element, flight_levels):
+    """Returns a scenario with one aircraft per I-sector route, flying at the given flight levels"""
+
+    return {
+        sg.START_TIME_KEY: "00:00:00",
+        sg.AIRCRAFT_KEY: [
+            {
+                sg.CALLSIGN_KEY: f'AC{k}',
+                sg.CURRENT_FLIGHT_LEVEL_KEY: flight_level,
+                sg.REQUESTED_FLIGHT_LEVEL_KEY: 400,
+                sg.ROUTE_KEY: route.serialize()
+            }
+            for k, (route, flight_level) in enumerate(zip(i_element.routes(), flight_levels))
+        ]
+    }
+
+
+def tracks(i_element, episode, flight_levels):
+    """Returns the log rows of an episode in which each aircraft flies its route from end to end"""
+
+    rows = []
+    for k, (route, flight_level) in enumerate(zip(i_element.routes(), flight_levels)):
+        (lon0, lat0), (lon1, lat1) = route.fix_points()[0].coords[0], route.fix_points()[-1].coords[0]
+        for t in range(N_STEPS):
+            u = t / (N_STEPS - 1)
+            rows.append({ep.EPISODE_COLUMN: episode, ep.TIME_COLUMN: 10 * t, ep.CALLSIGN_COLUMN: f'AC{k}',
+                         ep.LONGITUDE_COLUMN: lon0 + u * (lon1 - lon0), ep.LATITUDE_COLUMN: lat0 + u * (lat1 - lat0),
+                         ep.ALTITUDE_COLUMN: flight_level * 100 * _SCALE_FEET_TO_METRES})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="function")
+def files(i_element, tmp_path):
+    """Test fixture: sector, scenario and episode log files, with one episode in conflict and one not"""
+
+    sector_file = i_element.write_geojson(filename = "sector", path = str(tmp_path))
+
+    scenario_path = Path(tmp_path, "scenarios")
+    scenario_path.mkdir()
+    episodes = {"conflict": [200, 200], "separated": [200, 300]}
+    frames = []
+    for episode, flight_levels in episodes.items():
+        with open(Path(scenario_path, f'{episode}.json'), 'w') as f:
+            json.dump(scenario(i_element, flight_levels), f)
+        frames.append(tracks(i_element, episode, flight_levels))
+
+    log_file = str(Path(tmp_path, "log.csv"))
+    pd.concat(frames).to_csv(log_file, index = False)
+
+    return sector_file, str(scenario_path), log_file
+
+
+def test_episodes(files):
+
+    sector_file, scenario, log_file = files
+
+    # Episodes span several chunks.
+    target = ep.EvaluationPipeline(sector_file, scenario, workers = 0, chunk_size = 7)
+    result = list(target.episodes(log_file))
+
+    assert [episode for episode, _ in result] == ["conflict", "separated"]
+    assert [len(frame) for _, frame in result] == [2 * N_STEPS, 2 * N_STEPS]
+
+
+def test_episodes_not_contiguous(files, tmp_path):
+
+    sector_file, scenario, log_file = files
+
+    log = pd.read_csv(log_file)
+    log_file = str(Path(tmp_path, "shuffled.csv"))
+    log.iloc[np.r_[0:10, 100:110, 10:20]].to_csv(log_file, index = False)
+
+    # The error does not depend on whether the repeated episode crosses a chunk boundary.
+    for chunk_size in [10, 30]:
+        target = ep.EvaluationPipeline(sector_file, scenario, workers = 0, chunk_size = chunk_size)
+        with pytest.raises(ValueError):
+            list(target.episodes(log_file))
+
+
+def test_evaluate(files):
+
+    sector_file, scenario, log_file = files
+
+    target = ep.EvaluationPipeline(sector_file, scenario, workers = 0, chunk_size = 7)
+    result = {summary[ep.EPISODE_COLUMN]: summary for summary in target.evaluate(log_file)}
+
+    conflict, separated = result["conflict"], result["separated"]
+    for summary in [conflict, separated]:
+        assert summary[ep.N_AIRCRAFT_KEY] == 2
+        assert summary[ep.N_STEPS_KEY] == N_STEPS
+        assert summary[ep.N_SECTOR_EXITS_KEY] == 2
+
+    # Aircraft flying opposite routes at the same level lose separation.
+    assert conflict[ep.MIN_SEPARATION_KEY] == -1
+    assert conflict[ep.LOSS_OF_SEPARATION_PAIRS_KEY] == 1
+    assert separated[ep.MIN_SEPARATION_KEY] == 0
+    assert separated[ep.LOSS_OF_SEPARATION_PAIRS_KEY] == 0
+    assert separated[ep.MEAN_SEPARATION_KEY] == 0
+
+    # The aircraft at FL300 is closer to its requested flight level.
+    assert separated[ep.TOTAL_FUEL_EFFICIENCY_KEY] > conflict[ep.TOTAL_FUEL_EFFICIENCY_KEY]
+    assert conflict[ep.MEAN_FUEL_EFFICIENCY_KEY] == pytest.approx(conflict[ep.TOTAL_FUEL_EFFICIENCY_KEY] / (2 * N_STEPS))
+
+
+def test_evaluate_matches_metrics_engine(i_element, files):
+
+    sector_file, scenario, log_file = files
+
+    target = ep.EvaluationPipeline(sector_file, scenario, workers = 0)
+    result = next(target.evaluate(log_file))
+
+    log = pd.read_csv(log_file)
+    log = log[log[ep.EPISODE_COLUMN] == "conflict"]
+    aircraft = ep.EpisodeEvaluator.read_aircraft(str(Path(scenario, "conflict.json")))
+    engine = me.MetricsEngine(i_element)
+
+    separation, sector_exit = [], []
+    previous = None
+    for _, rows in log.groupby(ep.TIME_COLUMN):
+        rows = rows.sort_values(ep.CALLSIGN_COLUMN)
+        state = [rows[c].values for c in [ep.LONGITUDE_COLUMN, ep.LATITUDE_COLUMN, ep.ALTITUDE_COLUMN]]
+        if previous is None:
+            previous = [np.full(2, np.nan)] * 3
+        callsigns = rows[ep.CALLSIGN_COLUMN].tolist()
+        scores = engine.evaluate(*state, *previous,
+                                 [aircraft[c][sg.REQUESTED_FLIGHT_LEVEL_KEY] for c in callsigns],
+                                 [aircraft[c][sg.CURRENT_FLIGHT_LEVEL_KEY] for c in callsigns],
+                                 [aircraft[c][sg.ROUTE_KEY] for c in callsigns])
+        separation.extend(scores[me.PAIR_SEPARATION_KEY])
+        sector_exit.extend(s for s in scores[me.SECTOR_EXIT_KEY] if np.isfinite(s))
+        previous = state
+
+    assert result[ep.MIN_SEPARATION_KEY] == min(separation)
+    assert result[ep.MEAN_SECTOR_EXIT_KEY] == pytest.approx(np.mean(sector_exit))
+
+
+def test_run(files, tmp_path):
+
+    sector_file, scenario, log_file = files
+
+    sequential = str(Path(tmp_path, "sequential.csv"))
+    parallel = str(Path(tmp_path, "parallel.csv"))
+
+    assert ep.EvaluationPipeline(sector_file, scenario, workers = 0, chunk_size = 1).run(log_file, sequential) == 2
+    assert ep.EvaluationPipeline(sector_file, scenario, workers = 2, chunk_size = 50).run(log_file, parallel) == 2
+
+    expected = pd.read_csv(sequential)
+    assert expected.columns.tolist() == ep.EvaluationPipeline.summary_columns()
+    assert expected[ep.EPISODE_COLUMN].tolist() == ["conflict", "separated"]
+    pd.testing.assert_frame_equal(pd.read_csv(parallel), expected)
+
+
+def test_run_shared_scenario(i_element, files, tmp_path):
+
+    sector_file, scenario, log_file = files
+
+    output_file = str(Path(tmp_path, "summary.csv"))
+    target = ep.EvaluationPipeline(sector_file, str(Path(scenario, "conflict.json")), workers = 0)
+    target.run(log_file, output_file)
+
+    # Both episodes are scored against the shared scenario, in which both aircraft start at FL200.
+    # The aircraft at FL300 in the second episode is then halfway to its requested flight level.
+    result = pd.read_csv(output_file)
+    assert result[ep.TOTAL_FUEL_EFFICIENCY_KEY].tolist() == pytest.approx([-2 * N_STEPS, -1.5 * N_STEPS])
+
+
+def test_missing_aircraft(i_element, files, tmp_path):
+
+    sector_file, scenario, log_file = files
+
+    with open(Path(scenario, "conflict.json"), 'w') as f:
+        json.dump(scenario_with_aircraft(i_element, 1), f)
+
+    target = ep.EvaluationPipeline(sector_file, scenario, workers = 0)
+    with pytest.raises(ValueError):
+        list(target.evaluate(log_file))
+
+
+def scenario_with_aircraft(i_element, n):
+    """Returns a scenario holding only the first n aircraft"""
+
+    ret = scenario(i_element, [200, 200])
+    ret[sg.AIRCRAFT_KEY] = ret[sg.AIRCRAFT_KEY][:n]
+    return ret
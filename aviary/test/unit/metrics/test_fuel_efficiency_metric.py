@@ -1,6 +1,10 @@
 import pytest
 
-from aviary.metrics.fuel_efficiency_metric import fuel_efficiency_metric
+import numpy as np
+
+import aviary.metrics.utils as utils
+from aviary.metrics.fuel_efficiency_metric import fuel_efficiency_metric, fuel_efficiency_scores, \
+    cumulative_fuel_efficiency, total_fuel_efficiency, mean_fuel_efficiency, METRE_UNIT
 
 def test_fuel_efficiency_metric():
 
@@ -48,3 +52,45 @@ def test_fuel_efficiency_metric():
     # No commands sent to aircraft
     result = fuel_efficiency_metric(current_flight_level=200, requested_flight_level=200, initial_flight_level=200)
     assert result == 0
+
+
+def test_fuel_efficiency_scores():
+
+    current = np.array([[100, 500, 200],
+                        [200, 400, 200],
+                        [300, 300, np.nan],
+                        [400, 200, np.nan],
+                        [500, 100, np.nan]])
+    requested = np.array([400, 200, 200])
+    initial = np.array([200, 400, 200])
+
+    result = fuel_efficiency_scores(current, requested, initial)
+    assert result.shape == current.shape
+
+    for t in range(current.shape[0]):
+        for k in range(current.shape[1]):
+            if np.isnan(current[t, k]):
+                assert np.isnan(result[t, k])
+            else:
+                assert result[t, k] == fuel_efficiency_metric(current[t, k], requested[k], initial[k])
+
+    # Altitudes in metres.
+    metres = current * 100 / utils._SCALE_METRES_TO_FEET
+    assert np.allclose(fuel_efficiency_scores(metres, requested, initial, unit = METRE_UNIT), result, equal_nan = True)
+
+    with pytest.raises(ValueError):
+        fuel_efficiency_scores(current, requested, initial, unit = "ft")
+
+
+def test_fuel_efficiency_reductions():
+
+    scores = np.array([[-1, -0.5, np.nan],
+                       [-0.5, 0, np.nan],
+                       [0, -1, np.nan]])
+
+    assert cumulative_fuel_efficiency(scores).tolist() == [[-1, -0.5, 0], [-1.5, -0.5, 0], [-1.5, -1.5, 0]]
+    assert total_fuel_efficiency(scores).tolist() == [-1.5, -1.5, 0]
+
+    result = mean_fuel_efficiency(scores)
+    assert result[:2].tolist() == [-0.5, -0.5]
+    assert np.isnan(result[2])
@@ -0,0 +1,125 @@
+import pytest
+
+import numpy as np
+
+import aviary.metrics.loss_of_separation_events as lse
+import aviary.metrics.separation_tracker as st
+import aviary.metrics.utils as utils
+
+_SCALE_FEET_TO_METRES = 1/utils._SCALE_METRES_TO_FEET
+
+EVENT_KEYS = [lse.I_KEY, lse.J_KEY, lse.START_KEY, lse.END_KEY, lse.N_TICKS_KEY,
+              lse.MIN_HOR_DIST_KEY, lse.MIN_VERT_DIST_KEY]
+
+
+def as_set(events):
+    """Returns a set of event tuples"""
+
+    return set(zip(*[np.round(events[key], 9).tolist() for key in EVENT_KEYS]))
+
+
+@pytest.fixture(scope="function")
+def scores():
+    """Test fixture: a random time series of pairwise separation scores, with irregular tick times"""
+
+    rng = np.random.default_rng(3)
+    n_times, n = 200, 6
+    i, j = np.triu_indices(n, k = 1)
+
+    times = np.cumsum(rng.choice([1, 2, 5], n_times)).astype(float)
+    pair_separation = np.where(rng.random((n_times, len(i))) < 0.3, -1.0, -rng.random((n_times, len(i))))
+    pair_separation[rng.random(pair_separation.shape) < 0.05] = np.nan
+    hor_dist = rng.uniform(0, 5, pair_separation.shape)
+    vert_dist = rng.uniform(0, 1000, pair_separation.shape)
+    return times, i, j, pair_separation, hor_dist, vert_dist
+
+
+def test_loss_of_separation_events():
+
+    times = [0, 1, 2, 3, 4, 5, 6]
+    pair_separation = np.array([[-1, 0], [-1, -1], [0, -1], [0, -0.5], [-1, -1], [-1, np.nan], [0, -1]])
+    hor_dist = np.array([[3, 9], [2, 4], [9, 1], [9, 9], [4, 4], [1, 9], [9, 2]])
+
+    result = lse.loss_of_separation_events(times, [0, 0], [1, 2], pair_separation, hor_dist = hor_dist)
+
+    assert result[lse.I_KEY].tolist() == [0, 0, 0, 0, 0]
+    assert result[lse.J_KEY].tolist() == [1, 1, 2, 2, 2]
+    assert result[lse.START_KEY].tolist() == [0, 4, 1, 4, 6]
+    assert result[lse.END_KEY].tolist() == [1, 5, 2, 4, 6]
+    assert result[lse.N_TICKS_KEY].tolist() == [2, 2, 2, 1, 1]
+    assert result[lse.MIN_HOR_DIST_KEY].tolist() == [2, 1, 1, 4, 2]
+    assert np.isnan(result[lse.MIN_VERT_DIST_KEY]).all()
+
+    # Merging events separated by at most two ticks.
+    result = lse.loss_of_separation_events(times, [0, 0], [1, 2], pair_separation, hor_dist = hor_dist, max_gap = 2)
+    assert result[lse.START_KEY].tolist() == [0, 4, 1]
+    assert result[lse.END_KEY].tolist() == [1, 5, 6]
+    assert result[lse.N_TICKS_KEY].tolist() == [2, 2, 4]
+    assert result[lse.MIN_HOR_DIST_KEY].tolist() == [2, 1, 1]
+
+    # No violations.
+    result = lse.loss_of_separation_events(times, [0], [1], np.zeros((7, 1)))
+    assert all(len(result[key]) == 0 for key in EVENT_KEYS)
+
+
+@pytest.mark.parametrize("max_gap", [0, 2, 5, 12])
+def test_update_matches_batch(scores, max_gap):
+
+    times, i, j, pair_separation, hor_dist, vert_dist = scores
+    expected = lse.loss_of_separation_events(times, i, j, pair_separation, hor_dist, vert_dist, max_gap = max_gap)
+
+    target = lse.LossOfSeparationEvents(max_gap = max_gap)
+    closed = []
+    max_open = 0
+    for t, time in enumerate(times):
+        closed.append(target.update(time, i, j, pair_separation[t], hor_dist[t], vert_dist[t]))
+        max_open = max(max_open, target.n_open())
+    closed.append(target.flush())
+
+    result = set().union(*[as_set(events) for events in closed])
+    assert result == as_set(expected)
+    assert sum(len(events[lse.I_KEY]) for events in closed) == len(expected[lse.I_KEY])
+
+    # At most one event per pair is open at any time.
+    assert max_open <= len(i)
+    assert target.n_open() == 0
+
+
+def test_update_closes_events():
+
+    target = lse.LossOfSeparationEvents(max_gap = 10)
+
+    assert len(target.update(0, [0], [1], [-1])[lse.I_KEY]) == 0
+    assert len(target.update(5, [0], [1], [0])[lse.I_KEY]) == 0
+    assert target.n_open() == 1
+
+    result = target.update(11, [0], [1], [-1])
+    assert result[lse.START_KEY].tolist() == [0]
+    assert result[lse.END_KEY].tolist() == [0]
+    assert target.n_open() == 1
+
+
+def test_update_positions(x_element):
+
+    with pytest.raises(ValueError):
+        lse.LossOfSeparationEvents().update_positions(0, [0, 0], [0, 0], [0, 0])
+
+    target = lse.LossOfSeparationEvents(tracker = st.SeparationTracker(x_element.projection))
+
+    # Two aircraft converging head-on at the same level, then passing.
+    lon, lat = x_element.centre_point()
+    alt = np.full(2, 30000 * _SCALE_FEET_TO_METRES)
+    closed = []
+    for t in range(60):
+        offset = 0.15 - 0.005 * t
+        closed.append(target.update_positions(t, [lon, lon], [lat - offset, lat + offset], alt))
+    closed.append(target.flush())
+
+    result = [events for events in closed if len(events[lse.I_KEY]) > 0]
+    assert len(result) == 1
+
+    event = result[0]
+    assert event[lse.I_KEY].tolist() == [0] and event[lse.J_KEY].tolist() == [1]
+    assert event[lse.START_KEY][0] < 30 < event[lse.END_KEY][0]
+    assert event[lse.MIN_HOR_DIST_KEY][0] == pytest.approx(0)
+    assert event[lse.MIN_VERT_DIST_KEY][0] == 0
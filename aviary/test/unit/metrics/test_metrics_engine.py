@@ -0,0 +1,111 @@
+import pytest
+
+import numpy as np
+
+import aviary.metrics.metrics_engine as me
+import aviary.metrics.utils as utils
+from aviary.metrics.separation_metric import pairwise_separation_metric
+from aviary.metrics.sector_exit_metric import sector_exit_metric
+from aviary.metrics.fuel_efficiency_metric import fuel_efficiency_metric
+
+_SCALE_FEET_TO_METRES = 1/utils._SCALE_METRES_TO_FEET
+
+
+@pytest.fixture(scope="function")
+def snapshot(x_element):
+    """Test fixture: a snapshot of aircraft state in and around an X-shaped sector"""
+
+    rng = np.random.default_rng(42)
+    n = 60
+
+    routes = [route.serialize() for route in x_element.routes()]
+    centre_lon, centre_lat = x_element.centre_point()
+
+    # Aircraft concentrated around the sector centre, so that some pairs are close.
+    lon = centre_lon + rng.normal(0, 0.3, n)
+    lat = centre_lat + rng.normal(0, 0.3, n)
+    alt = rng.choice([30000, 30500, 31000, 32000, 33000], n) * _SCALE_FEET_TO_METRES
+
+    previous_lon = lon - rng.normal(0, 0.05, n)
+    previous_lat = lat - rng.normal(0, 0.05, n)
+    previous_alt = alt - rng.choice([0, 500], n) * _SCALE_FEET_TO_METRES
+
+    # Some aircraft are leaving the sector vertically.
+    alt[:5] = (x_element.upper_limit + 5) * 100 * _SCALE_FEET_TO_METRES
+    previous_alt[:5] = (x_element.upper_limit - 5) * 100 * _SCALE_FEET_TO_METRES
+
+    requested_flight_level = rng.choice([300, 320, 340], n)
+    initial_flight_level = rng.choice([280, 300, 320], n)
+
+    return {
+        "lon": lon, "lat": lat, "alt": alt,
+        "previous_lon": previous_lon, "previous_lat": previous_lat, "previous_alt": previous_alt,
+        "requested_flight_level": requested_flight_level, "initial_flight_level": initial_flight_level,
+        "routes": [routes[k] for k in rng.integers(len(routes), size = n)]
+    }
+
+
+def test_evaluate(x_element, snapshot):
+
+    target = me.MetricsEngine(x_element)
+    result = target.evaluate(**snapshot)
+
+    n = len(snapshot["lon"])
+    lon, lat, alt = snapshot["lon"], snapshot["lat"], snapshot["alt"]
+
+    # Pairwise separation scores match the scalar metric.
+    assert len(result[me.PAIR_I_KEY]) == n * (n - 1) / 2
+    expected = [pairwise_separation_metric(lon[i], lat[i], alt[i], lon[j], lat[j], alt[j])
+                for i, j in zip(result[me.PAIR_I_KEY], result[me.PAIR_J_KEY])]
+    assert result[me.PAIR_SEPARATION_KEY].tolist() == pytest.approx(expected)
+    assert min(expected) < 0
+
+    for k in range(n):
+        scores = [s for s, i, j in zip(expected, result[me.PAIR_I_KEY], result[me.PAIR_J_KEY]) if k in (i, j)]
+        assert result[me.SEPARATION_KEY][k] == pytest.approx(min(scores))
+
+    # Sector exit scores match the scalar metric (with NaN in place of None).
+    exits = 0
+    for k in range(n):
+        expected = sector_exit_metric(lon[k], lat[k], alt[k], snapshot["previous_lon"][k], snapshot["previous_lat"][k],
+                                      snapshot["previous_alt"][k], snapshot["requested_flight_level"][k],
+                                      x_element, snapshot["routes"][k])
+        if expected is None:
+            assert np.isnan(result[me.SECTOR_EXIT_KEY][k])
+        else:
+            exits += 1
+            assert result[me.SECTOR_EXIT_KEY][k] == pytest.approx(expected)
+    assert exits >= 5
+
+    # Fuel efficiency scores match the scalar metric.
+    for k in range(n):
+        expected = fuel_efficiency_metric(alt[k] * utils._SCALE_METRES_TO_FEET / 100,
+                                          snapshot["requested_flight_level"][k], snapshot["initial_flight_level"][k])
+        assert result[me.FUEL_EFFICIENCY_KEY][k] == pytest.approx(expected)
+
+
+def test_evaluate_ignores_inactive_aircraft(x_element, snapshot):
+
+    snapshot["lon"][3] = np.nan
+    snapshot["lat"][3] = np.nan
+
+    result = me.MetricsEngine(x_element).evaluate(**snapshot)
+
+    n = len(snapshot["lon"])
+    assert len(result[me.PAIR_I_KEY]) == (n - 1) * (n - 2) / 2
+    assert 3 not in result[me.PAIR_I_KEY] and 3 not in result[me.PAIR_J_KEY]
+    for key in [me.SEPARATION_KEY, me.SECTOR_EXIT_KEY, me.FUEL_EFFICIENCY_KEY]:
+        assert np.isnan(result[key][3])
+    assert np.isfinite(result[me.SEPARATION_KEY][4])
+
+
+def test_contains_points(x_element):
+
+    lon, lat = x_element.centre_point()
+    lons = np.array([lon, lon, lon + 5, np.nan])
+    lats = np.array([lat, lat, lat, np.nan])
+    flight_levels = np.array([x_element.lower_limit, x_element.upper_limit + 1, x_element.lower_limit, 300])
+
+    result = x_element.contains_points(lons, lats, flight_levels)
+    assert result.tolist() == [True, False, False, False]
+    assert result.tolist()[:3] == [x_element.contains(*args) for args in zip(lons[:3], lats[:3], flight_levels[:3])]
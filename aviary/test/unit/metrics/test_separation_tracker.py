@@ -0,0 +1,108 @@
+import pytest
+
+import numpy as np
+
+import aviary.metrics.separation_tracker as st
+import aviary.metrics.metrics_engine as me
+import aviary.metrics.utils as utils
+from aviary.metrics.separation_metric import pairwise_separation_metric
+
+_SCALE_FEET_TO_METRES = 1/utils._SCALE_METRES_TO_FEET
+
+
+@pytest.fixture(scope="function")
+def trajectories(x_element):
+    """Test fixture: positions of aircraft flying straight and level around an X-shaped sector, over 40 ticks"""
+
+    rng = np.random.default_rng(7)
+    n, ticks = 30, 40
+
+    centre_lon, centre_lat = x_element.centre_point()
+    lon0 = centre_lon + rng.normal(0, 0.2, n)
+    lat0 = centre_lat + rng.normal(0, 0.2, n)
+    alt = rng.choice([30000, 30500, 31000, 33000], n) * _SCALE_FEET_TO_METRES
+
+    # Roughly 450 knots over a one second tick.
+    track = rng.uniform(0, 360, n)
+    step = 0.002 * np.vstack([np.sin(np.radians(track)), np.cos(np.radians(track))])
+
+    t = np.arange(ticks)[:, np.newaxis]
+    return lon0 + t * step[0], lat0 + t * step[1], np.tile(alt, (ticks, 1))
+
+
+def brute_force(lon, lat, alt):
+    """Returns a dictionary of the separation scores of all pairs of aircraft, keyed by (i, j)"""
+
+    n = len(lon)
+    return {(i, j): pairwise_separation_metric(lon[i], lat[i], alt[i], lon[j], lat[j], alt[j])
+            for i in range(n) for j in range(i + 1, n)}
+
+
+def test_update(x_element, trajectories):
+
+    target = st.SeparationTracker(x_element.projection)
+
+    lons, lats, alts = trajectories
+    for lon, lat, alt in zip(lons, lats, alts):
+        result = target.update(lon, lat, alt)
+        expected = brute_force(lon, lat, alt)
+
+        # Scores of pairs in the neighbour list match the scalar metric, and all other pairs score 0.
+        actual = {(i, j): s for i, j, s in zip(result[me.PAIR_I_KEY], result[me.PAIR_J_KEY],
+                                               result[me.PAIR_SEPARATION_KEY])}
+        for pair, score in expected.items():
+            assert actual.get(pair, 0) == pytest.approx(score)
+
+        for k in range(len(lon)):
+            assert result[me.SEPARATION_KEY][k] == pytest.approx(min(s for (i, j), s in expected.items() if k in (i, j)))
+
+    assert min(brute_force(lons[-1], lats[-1], alts[-1]).values()) < 0
+
+    # The neighbour list is rebuilt only occasionally.
+    assert 1 < target.n_builds < len(lons)
+
+
+def test_update_matches_metrics_engine(x_element, trajectories):
+
+    target = st.SeparationTracker(x_element.projection, hor_skin = 5)
+    engine = me.MetricsEngine(x_element)
+
+    lons, lats, alts = trajectories
+    for lon, lat, alt in zip(lons, lats, alts):
+        result = target.update(lon, lat, alt)
+
+        x, y = x_element.projection(lon, lat)
+        i, j, expected = engine.separation_scores(lon, lat, alt * utils._SCALE_METRES_TO_FEET, x, y,
+                                                  np.full(len(lon), True))
+        expected = {(a, b): s for a, b, s in zip(i, j, expected) if s != 0}
+        actual = {(a, b): s for a, b, s in zip(result[me.PAIR_I_KEY], result[me.PAIR_J_KEY],
+                                               result[me.PAIR_SEPARATION_KEY]) if s != 0}
+        assert actual == expected
+
+
+def test_update_rebuilds(x_element, trajectories):
+
+    target = st.SeparationTracker(x_element.projection)
+    lons, lats, alts = trajectories
+    lon, lat, alt = lons[0].copy(), lats[0].copy(), alts[0].copy()
+
+    target.update(lon, lat, alt)
+    target.update(lon, lat, alt)
+    assert target.n_builds == 1
+
+    # An aircraft climbing by more than half the vertical skin.
+    alt[0] += st.VERT_SKIN * _SCALE_FEET_TO_METRES
+    target.update(lon, lat, alt)
+    assert target.n_builds == 2
+
+    # An aircraft becoming inactive.
+    lon[1], lat[1] = np.nan, np.nan
+    result = target.update(lon, lat, alt)
+    assert target.n_builds == 3
+    assert np.isnan(result[me.SEPARATION_KEY][1])
+    i, j = target.neighbours()
+    assert 1 not in i and 1 not in j
+
+    target.reset()
+    target.update(lon, lat, alt)
+    assert target.n_builds == 1
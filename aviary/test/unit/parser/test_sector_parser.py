@@ -77,6 +77,13 @@ def test_sector_volume_properties(target):
                                                C.LENGTH_NM_KEY, C.AIRWAY_WIDTH_NM_KEY, C.OFFSET_NM_KEY])
 
 
+def test_sector_volumes(target):
+
+    assert target.sector_volumes() == [(50, 450)]
+    assert target.sector_lower_limit() == 50
+    assert target.sector_upper_limit() == 450
+
+
 def test_geometries_of_type(target):
 
     result = target.geometries_of_type(C.POINT_VALUE)
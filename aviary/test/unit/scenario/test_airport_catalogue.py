@@ -0,0 +1,83 @@
+import pytest
+
+import random
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+import aviary.scenario.airport_catalogue as ac
+import aviary.scenario.poisson_scenario as ps
+import aviary.scenario.scenario_generator as sg
+
+
+AIRPORTS_CSV = """code, latitude, longitude, weight
+SOUTH, 48.0, -0.5, 1
+SOUTHEAST, 49.5, 1.0, 3
+NORTH, 55.0, 0.3, 1
+EAST, 51.5, 5.0, 1
+FAR, 10.0, 0.0, 1
+NEAR, 51.0, -0.13, 1
+"""
+
+
+@pytest.fixture(scope="function")
+def target():
+    """Test fixture: an airport catalogue."""
+
+    return ac.AirportCatalogue.from_csv(StringIO(AIRPORTS_CSV))
+
+
+def test_candidates(target):
+
+    assert len(target) == 6
+
+    index = target.candidates(lon = -0.1275, lat = 51.5)
+    assert sorted(target.codes[k] for k in index) == ["EAST", "NORTH", "SOUTH", "SOUTHEAST"]
+
+    # Airports to the south, within 45 degrees.
+    index = target.candidates(lon = -0.1275, lat = 51.5, bearing = 180)
+    assert sorted(target.codes[k] for k in index) == ["SOUTH", "SOUTHEAST"]
+
+    index = target.candidates(lon = -0.1275, lat = 51.5, bearing = -90)
+    assert len(index) == 0
+
+
+def test_departure_destination(target, i_element):
+
+    # The first route runs north from fix E to fix A.
+    route = i_element.routes()[0]
+    assert route.fix_names()[0] == "E"
+
+    random.seed(1)
+    departures = [target.departure(route) for _ in range(2000)]
+    assert set(departures) == {"SOUTH", "SOUTHEAST"}
+    assert departures.count("SOUTHEAST") / len(departures) == pytest.approx(0.75, abs = 0.05)
+    assert {target.destination(route) for _ in range(10)} == {"NORTH"}
+
+    reversed_route = i_element.routes()[1]
+    assert {target.departure(reversed_route) for _ in range(10)} == {"NORTH"}
+
+    # Without airports in range, the nearest airport is used.
+    target = ac.AirportCatalogue(pd.DataFrame({ac.CODE_COLUMN: ["EAST", "FAR"], ac.LATITUDE_COLUMN: [51.5, 10.0],
+                                               ac.LONGITUDE_COLUMN: [5.0, 0.0]}))
+    assert target.departure(route) == "EAST"
+
+    with pytest.raises(ValueError):
+        ac.AirportCatalogue(pd.DataFrame({ac.CODE_COLUMN: ["EAST"], ac.LATITUDE_COLUMN: [51.5]}))
+
+
+def test_scenario(target, i_element):
+
+    scenario = ps.PoissonScenario(sector_element = i_element, arrival_rate = 2 / 60, airport_catalogue = target,
+                                  seed = 22)
+
+    generator = scenario.aircraft_generator()
+    for _ in range(20):
+        x = next(generator)
+        assert x[sg.DEPARTURE_KEY] in ["SOUTH", "SOUTHEAST", "NORTH"]
+        assert x[sg.DESTINATION_KEY] in ["SOUTH", "SOUTHEAST", "NORTH"]
+        assert x[sg.DEPARTURE_KEY] != x[sg.DESTINATION_KEY]
+
+    assert scenario.content_hash() != ps.PoissonScenario(sector_element = i_element, arrival_rate = 2 / 60,
+                                                         seed = 22).content_hash()
@@ -0,0 +1,157 @@
+import pytest
+
+import numpy as np
+
+import aviary.scenario.conflict_poisson_scenario as cps
+import aviary.scenario.scenario_generator as sg
+import aviary.sector.route_network as rn
+import aviary.sector.sector_element as se
+import aviary.sector.sector_shape as ss
+
+
+@pytest.fixture(scope="function")
+def target(x_element, predictor):
+    """Test fixture: a conflict-targeted Poisson scenario object."""
+
+    return cps.ConflictPoissonScenario(sector_element = x_element,
+                                       arrival_rate = 1 / 300,
+                                       trajectory_predictor = predictor,
+                                       duration = 1800,
+                                       target_conflicts = 3,
+                                       aircraft_types = ["B743", "B744"],
+                                       flight_levels = [200, 300, 400],
+                                       seed = 22)
+
+
+def candidate(timedeltas, route_index, flight_levels):
+    """Returns a candidate scenario with the given properties (and a final aircraft to end the scenario)"""
+
+    n = len(timedeltas) + 1
+    return {
+        cps.TIMEDELTA_KEY: np.array(timedeltas + [10000.]),
+        cps.ROUTE_INDEX_KEY: np.array(route_index + [0]),
+        cps.FLIGHT_LEVEL_KEY: np.array(flight_levels + [200]),
+        cps.REQUESTED_FLIGHT_LEVEL_KEY: np.array(flight_levels + [200]),
+        cps.AIRCRAFT_TYPE_INDEX_KEY: np.zeros(n, dtype = int)
+    }
+
+
+def test_init(x_element, predictor):
+
+    with pytest.raises(ValueError):
+        cps.ConflictPoissonScenario(sector_element = x_element, arrival_rate = 1 / 60, trajectory_predictor = predictor)
+
+    with pytest.raises(ValueError):
+        cps.ConflictPoissonScenario(sector_element = x_element, arrival_rate = 1 / 60, trajectory_predictor = predictor,
+                                    target_conflicts = 1, conflict_rate = 2)
+
+    target = cps.ConflictPoissonScenario(sector_element = x_element, arrival_rate = 1 / 60, trajectory_predictor = predictor,
+                                         duration = 1800, conflict_rate = 4)
+    assert target.target() == 2
+
+
+def test_count_conflicts(i_element, predictor):
+
+    target = cps.ConflictPoissonScenario(sector_element = i_element, arrival_rate = 1 / 60, trajectory_predictor = predictor,
+                                         target_conflicts = 1, aircraft_types = ["B743"])
+    routes = target.truncated_routes()
+
+    # The two routes through an I-shaped sector are the reverse of one another.
+    assert target.count_conflicts(candidate([0., 0.], [0, 1], [200, 200]), routes) == 1
+    assert target.count_conflicts(candidate([0., 0.], [0, 1], [200, 300]), routes) == 0
+    # Simultaneous aircraft on the same route are also in conflict with one another.
+    assert target.count_conflicts(candidate([0., 0., 0.], [0, 1, 1], [200, 200, 200]), routes) == 3
+
+    # Aircraft following one another at the same speed remain separated.
+    assert target.count_conflicts(candidate([0., 60.], [0, 0], [200, 200]), routes) == 0
+    assert target.count_conflicts(candidate([0., 10.], [0, 0], [200, 200]), routes) == 1
+
+    # The final aircraft (which starts after the end of the scenario) is excluded.
+    assert target.count_conflicts(candidate([0.], [0], [200]), routes) == 0
+
+
+def test_select_candidate(target):
+
+    routes = target.truncated_routes()
+    result = target.select_candidate(routes)
+
+    assert target.count_conflicts(result, routes) == target.target_conflicts
+    assert np.cumsum(result[cps.TIMEDELTA_KEY])[-2] <= target.duration
+    assert np.cumsum(result[cps.TIMEDELTA_KEY])[-1] > target.duration
+
+
+def test_select_candidate_exhausted(target):
+
+    target.target_conflicts = 1000
+    target.max_candidates = 3
+
+    with pytest.warns(UserWarning):
+        result = target.select_candidate(target.truncated_routes())
+    assert result is not None
+
+
+def test_generate_scenario(target):
+
+    generator = sg.ScenarioGenerator(target)
+    result = generator.generate_scenario(duration = target.duration, seed = 22)
+
+    assert len(result[sg.AIRCRAFT_KEY]) > 0
+    for aircraft in result[sg.AIRCRAFT_KEY]:
+        assert aircraft[sg.AIRCRAFT_TYPE_KEY] in target.aircraft_types
+        assert aircraft[sg.CURRENT_FLIGHT_LEVEL_KEY] in target.flight_levels
+
+    # Scenarios are reproducible given the seed.
+    assert generator.generate_scenario(duration = target.duration, seed = 22) == result
+
+
+def test_draw_candidate_weighted(x_element, predictor):
+
+    target = cps.ConflictPoissonScenario(sector_element = x_element,
+                                         arrival_rate = 1 / 30,
+                                         trajectory_predictor = predictor,
+                                         duration = 1800,
+                                         target_conflicts = 0,
+                                         aircraft_type_weights = {"B743": 0, "B744": 1},
+                                         flight_level_weights = {200: 3, 300: 0, 400: 1},
+                                         seed = 22)
+
+    routes = x_element.routes()
+    target.route_weights = target.alias_table({0: 0, 1: 1})
+
+    result = target.draw_candidate(n_routes = len(routes))
+    assert set(result[cps.AIRCRAFT_TYPE_INDEX_KEY].tolist()) == {1}
+    assert set(result[cps.FLIGHT_LEVEL_KEY].tolist()) == {200, 400}
+    assert set(result[cps.ROUTE_INDEX_KEY].tolist()) == {1}
+
+
+def test_route_network(i_element, predictor):
+
+    x_element = se.SectorElement(shape = ss.XShape(length_nm = 30), origin = i_element.fix_location("A"))
+    network = rn.RouteNetwork([i_element, x_element])
+    names = network.fix_names
+    keys = [(names[entry], names[exit]) for entry, exit in zip(*network.route_pairs())]
+
+    # Routes are drawn from the route network, subject to route weights keyed by its entry and exit fixes.
+    target = cps.ConflictPoissonScenario(sector_element = i_element,
+                                         route_network = network,
+                                         route_weights = {keys[0]: 0, keys[-1]: 1},
+                                         arrival_rate = 1 / 60,
+                                         trajectory_predictor = predictor,
+                                         duration = 1800,
+                                         target_conflicts = 0,
+                                         aircraft_types = ["B743", "B744"],
+                                         flight_levels = [200, 300, 400],
+                                         max_candidates = 5,
+                                         seed = 22)
+
+    routes = target.truncated_routes()
+    assert len(routes) == network.n_routes()
+    expected = [network.route_at(k) for k in range(network.n_routes())]
+    assert [start for _, start, _ in routes] == [route.fix_points()[0].coords[0] for route in expected]
+    assert [len(xy) for _, _, (xy, _) in routes] == [route.length() for route in expected]
+
+    result = sg.ScenarioGenerator(target).generate_scenario(duration = target.duration, seed = 22)
+    assert len(result[sg.AIRCRAFT_KEY]) > 0
+    for aircraft in result[sg.AIRCRAFT_KEY]:
+        assert aircraft[sg.START_POSITION_KEY] == expected[-1].fix_points()[0].coords[0]
+        assert aircraft[sg.ROUTE_KEY][-1]["fixName"] == keys[-1][1]
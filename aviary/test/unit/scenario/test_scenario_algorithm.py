@@ -1,5 +1,7 @@
 import pytest
 
+from io import StringIO
+
 from aviary.scenario.scenario_algorithm import ScenarioAlgorithm
 
 from aviary.sector.route import Route
@@ -18,6 +20,11 @@ class ConcreteAlgorithm(ScenarioAlgorithm):
         pass
 
 
+class WeightedAlgorithm(ScenarioAlgorithm):
+    def aircraft_generator(self):
+        pass
+
+
 @pytest.fixture(scope="function")
 def target(i_element):
     """Test fixture: a scenario algorithm object."""
@@ -150,3 +157,32 @@ def test_route(target):
     assert result.fix_names()[2] == "C"
     assert result.fix_names()[3] == "D"
     assert result.fix_names()[4] == "E"
+
+
+def test_weights(i_element):
+
+    routes = i_element.routes()
+    target = WeightedAlgorithm(
+        sector_element=i_element,
+        aircraft_type_weights={"B747": 9, "B777": 1},
+        flight_level_weights=StringIO("value,weight\n200,1\n400,0\n"),
+        callsign_prefix_weights={"EZY": 1},
+        route_weights={(routes[1].fix_names()[0], routes[1].fix_names()[-1]): 1},
+        seed=22
+    )
+
+    assert target.aircraft_types == ["B747", "B777"]
+    assert target.flight_levels == [200, 400]
+
+    types = [target.aircraft_type() for _ in range(1000)]
+    assert types.count("B747") > 850
+    assert {target.flight_level() for _ in range(100)} == {200}
+    assert next(target.callsign_generator()).startswith("EZY")
+    assert {target.route().hash_route() for _ in range(20)} == {routes[1].hash_route()}
+
+    assert target.content_hash() != WeightedAlgorithm(sector_element=i_element, seed=22).content_hash()
+
+    with pytest.raises(ValueError):
+        WeightedAlgorithm(sector_element=i_element, aircraft_types=["A320"], aircraft_type_weights={"B747": 1})
+    with pytest.raises(ValueError):
+        WeightedAlgorithm(sector_element=i_element, route_weights={("A", "NOWHERE"): 1})
@@ -0,0 +1,117 @@
+import pytest
+
+import os
+import subprocess
+import sys
+
+import aviary.scenario.poisson_scenario as ps
+import aviary.scenario.scenario_generator as sg
+import aviary.scenario.time_varying_poisson_scenario as tvps
+from aviary.scenario.scenario_cache import ScenarioCache
+
+
+def poisson_scenario(sector_element, arrival_rate = 2 / 60):
+
+    return ps.PoissonScenario(sector_element = sector_element,
+                              arrival_rate = arrival_rate,
+                              aircraft_types = ['B747', 'B777'],
+                              callsign_prefixes = ["SPEEDBIRD", "VJ", "DELTA", "EZY"],
+                              flight_levels = [200, 240, 280, 320, 360, 400],
+                              seed = 22)
+
+
+@pytest.fixture(scope="function")
+def cache(tmp_path):
+    """Test fixture: an empty scenario cache."""
+
+    return ScenarioCache(path = str(tmp_path))
+
+
+def test_key(i_element, x_element):
+
+    duration, seed = 1000, 83
+
+    key = ScenarioCache.key(poisson_scenario(i_element), duration, seed)
+    assert key == ScenarioCache.key(poisson_scenario(i_element), duration, seed)
+
+    assert key != ScenarioCache.key(poisson_scenario(i_element), duration, seed + 1)
+    assert key != ScenarioCache.key(poisson_scenario(i_element), duration + 1, seed)
+    assert key != ScenarioCache.key(poisson_scenario(x_element), duration, seed)
+    assert key != ScenarioCache.key(poisson_scenario(i_element, arrival_rate = 1 / 60), duration, seed)
+
+
+def test_key_is_stable_across_processes():
+
+    code = """
+import aviary.sector.sector_shape as ss
+import aviary.sector.sector_element as se
+import aviary.scenario.poisson_scenario as ps
+from aviary.scenario.scenario_cache import ScenarioCache
+sector = se.SectorElement(shape = ss.XShape(), name = "HELL", lower_limit = 140, upper_limit = 400)
+algorithm = ps.PoissonScenario(sector_element = sector, arrival_rate = 0.1, seed = 22)
+print(ScenarioCache.key(algorithm, 1000, 83))
+"""
+
+    keys = set()
+    for hash_seed in ["1", "2"]:
+        env = dict(os.environ, PYTHONHASHSEED = hash_seed)
+        keys.add(subprocess.check_output([sys.executable, "-c", code], env = env).strip())
+
+    assert len(keys) == 1
+
+
+def test_generate_scenario_with_cache(i_element, cache, monkeypatch):
+
+    duration, seed = 1000, 83
+
+    expected = sg.ScenarioGenerator(poisson_scenario(i_element)).generate_scenario(duration = duration, seed = seed)
+
+    scen_gen = sg.ScenarioGenerator(poisson_scenario(i_element), cache = cache)
+    assert scen_gen.generate_scenario(duration = duration, seed = seed) == expected
+    assert len(cache.entries()) == 1
+
+    # A cache hit must not invoke the scenario algorithm.
+    def fail(self):
+        raise AssertionError("Scenario regenerated despite cache entry")
+
+    monkeypatch.setattr(ps.PoissonScenario, "aircraft_generator", fail)
+    assert scen_gen.generate_scenario(duration = duration, seed = seed) == expected
+
+    with pytest.raises(AssertionError):
+        scen_gen.generate_scenario(duration = duration, seed = seed, bypass_cache = True)
+
+
+def test_generate_scenario_not_hashable(i_element, cache):
+
+    # An arrival rate function without a content hash bypasses the cache.
+    algorithm = tvps.TimeVaryingPoissonScenario(sector_element = i_element, arrival_rate = lambda t: 0.01 + 0 * t,
+                                                max_rate = 0.01, seed = 22)
+    scen_gen = sg.ScenarioGenerator(algorithm, cache = cache)
+
+    scenario = scen_gen.generate_scenario(duration = 1000, seed = 83)
+    assert len(scenario[sg.AIRCRAFT_KEY]) > 0
+    assert len(cache.entries()) == 0
+
+
+def test_eviction(tmp_path):
+
+    target = ScenarioCache(path = str(tmp_path), max_size_bytes = 5000)
+    payload = {"data": "x" * 2000}
+
+    for key in ["a", "b"]:
+        target.put(key, payload)
+
+    # Touch "a" so that "b" becomes the least recently used entry.
+    os.utime(target.filename("b"), ns = (0, 0))
+    assert target.get("a") == payload
+
+    target.put("c", payload)
+
+    assert "a" in target
+    assert "b" not in target
+    assert "c" in target
+    assert target.size_bytes() <= 5000
+
+    target.clear()
+    assert target.entries() == []
+    assert target.get("a") is None
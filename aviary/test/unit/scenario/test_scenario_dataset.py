@@ -0,0 +1,49 @@
+import pytest
+
+import numpy as np
+
+from aviary.scenario.scenario_dataset import ScenarioDataset
+from aviary.scenario.scenario_generator import ScenarioGenerator, AIRCRAFT_KEY
+
+
+def test_getitem(scenario_factory):
+
+    expected = ScenarioGenerator(scenario_factory()).generate_scenario(duration = 600, seed = 5)
+
+    target = ScenarioDataset(scenario_factory, duration = 600, cache_size = 2, workers = 0)
+    assert target[5] == expected
+    assert target[5] is target[5]
+    assert 5 in target
+
+    # The least recently used scenario is evicted.
+    target[6]
+    target[7]
+    assert len(target) == 2
+    assert 5 not in target and 7 in target
+
+    # Numpy integer seeds (e.g. from samplers) are accepted, but not booleans.
+    assert target[np.int64(7)] is target[7]
+    with pytest.raises(TypeError):
+        target["5"]
+    with pytest.raises(TypeError):
+        target[True]
+    with pytest.raises(ValueError):
+        ScenarioDataset(scenario_factory, duration = 600, cache_size = 0)
+
+
+def test_prefetch(scenario_factory):
+
+    generator = ScenarioGenerator(scenario_factory())
+    expected = [generator.generate_scenario(duration = 600, seed = seed) for seed in range(4)]
+
+    with ScenarioDataset(scenario_factory, duration = 600, prefetch = 2, workers = 2) as target:
+        assert target[0] == expected[0]
+        assert sorted(target._pending) == [1, 2]
+
+        # Prefetched scenarios are identical to those generated in the calling process.
+        assert target[1] == expected[1]
+        assert target[2] == expected[2]
+        assert sorted(target._pending) == [3, 4]
+        assert len(target[3][AIRCRAFT_KEY]) == len(expected[3][AIRCRAFT_KEY])
+
+    assert target._executor is None
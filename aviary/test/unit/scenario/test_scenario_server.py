@@ -0,0 +1,70 @@
+import pytest
+
+import asyncio
+import json
+import time
+
+import aviary.scenario.scenario_server as ss
+
+from aviary.scenario.scenario_generator import ScenarioGenerator, AIRCRAFT_KEY
+
+
+def failing_scenario():
+    """Scenario algorithm factory which fails"""
+
+    raise ValueError("No sector")
+
+
+def test_server(scenario_factory, tmp_path):
+
+    expected = ScenarioGenerator(scenario_factory()).generate_scenario(duration = 600, seed = 3)
+
+    async def run():
+        async with ss.ScenarioServer(scenario_factory, duration = 600, first_seed = 3, pool_size = 2, workers = 1,
+                                     path = str(tmp_path / "aviary.sock")) as server:
+            # Wait for the pool to fill.
+            while server.stats()[ss.POOL_SIZE_KEY] < 2:
+                await asyncio.sleep(0.05)
+
+            def client_requests():
+                with ss.ScenarioClient(path = server.path, timeout = 30) as client:
+                    return [client.get() for _ in range(3)], client.stats()
+
+            bundles, stats = await asyncio.get_running_loop().run_in_executor(None, client_requests)
+
+            reader, writer = await asyncio.open_unix_connection(server.path)
+            writer.write(b"not json\n")
+            await writer.drain()
+            error = json.loads(await reader.readline())
+            writer.close()
+
+            return bundles, stats, error
+
+    bundles, stats, error = asyncio.run(run())
+
+    assert [bundle[ss.SEED_KEY] for bundle in bundles] == [3, 4, 5]
+    assert bundles[0][ss.SCENARIO_KEY] == json.loads(json.dumps(expected))
+    assert bundles[0][ss.SECTOR_KEY]["features"]
+    assert len(bundles[0][ss.SCN_KEY]) > len(expected[AIRCRAFT_KEY])
+
+    # The pool is bounded, so the producer waited for space.
+    assert stats[ss.SERVED_KEY] == 3
+    assert stats[ss.POOL_CAPACITY_KEY] == 2
+    assert stats[ss.PRODUCER_BLOCKED_KEY] > 0
+    assert stats[ss.PRODUCED_KEY] <= stats[ss.SERVED_KEY] + 2 + 1
+
+    assert ss.ERROR_KEY in error
+
+
+def test_server_error():
+
+    async def run():
+        async with ss.ScenarioServer(failing_scenario, duration = 600, workers = 1) as server:
+            def client_requests():
+                with ss.ScenarioClient(port = server.port, timeout = 30) as client:
+                    return client.get()
+
+            return await asyncio.get_running_loop().run_in_executor(None, client_requests)
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
@@ -0,0 +1,72 @@
+import pytest
+
+import aviary.scenario.scenario_generator as sg
+import aviary.scenario.poisson_scenario as ps
+from aviary.scenario.scenario_timeline import ScenarioTimeline
+
+
+@pytest.fixture(scope="function")
+def scenario():
+    """Test fixture: a minimal scenario dictionary with out-of-order start times."""
+
+    def aircraft(callsign, start_time):
+        return {sg.CALLSIGN_KEY: callsign, sg.START_TIME_KEY: start_time}
+
+    return {
+        sg.START_TIME_KEY: "12:00:00",
+        sg.AIRCRAFT_KEY: [
+            aircraft("C", "12:02:00"),
+            aircraft("A", "12:00:00"),
+            aircraft("D", "12:05:30"),
+            aircraft("B", "12:01:00"),
+            aircraft("E", "00:00:10") # Following day.
+        ]
+    }
+
+
+def test_timeline_order(scenario):
+
+    target = ScenarioTimeline(scenario)
+
+    assert len(target) == 5
+    assert target.callsigns() == ["A", "B", "C", "D", "E"]
+    assert list(target.start_times) == [0, 60, 120, 330, 12 * 60 * 60 + 10]
+    assert [t for t, _ in target] == list(target.start_times)
+
+
+def test_created_between(scenario):
+
+    target = ScenarioTimeline(scenario)
+
+    assert [ac[sg.CALLSIGN_KEY] for ac in target.created_between(0, 120)] == ["A", "B"]
+    assert [ac[sg.CALLSIGN_KEY] for ac in target.created_between(60, 331)] == ["B", "C", "D"]
+    assert target.created_between(400, 500) == []
+    assert target.created_between(200, 100) == []
+
+
+def test_active_at(scenario):
+
+    target = ScenarioTimeline(scenario)
+
+    assert target.active_at(-1) == []
+    assert [ac[sg.CALLSIGN_KEY] for ac in target.active_at(60)] == ["A", "B"]
+    assert [ac[sg.CALLSIGN_KEY] for ac in target.active_at(200, lifetime = 100)] == ["C"]
+
+    assert list(target.count_active([-1, 60, 200, 1000])) == [0, 2, 3, 4]
+    assert list(target.count_active([60, 200], lifetime = 100)) == [2, 1]
+
+
+def test_generated_scenario(i_element):
+
+    algorithm = ps.PoissonScenario(sector_element = i_element,
+                                   arrival_rate = 2 / 60,
+                                   aircraft_types = ['B747', 'B777'],
+                                   flight_levels = [200, 240, 280],
+                                   seed = 22)
+    scenario = sg.ScenarioGenerator(algorithm).generate_scenario(duration = 1000, seed = 22)
+
+    target = ScenarioTimeline(scenario)
+
+    assert len(target) == len(scenario[sg.AIRCRAFT_KEY])
+    assert all(target.start_times[:-1] <= target.start_times[1:])
+    assert len(target.active_at(target.start_times[-1])) == len(target)
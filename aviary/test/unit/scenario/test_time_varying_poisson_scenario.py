@@ -0,0 +1,171 @@
+import pytest
+
+import numpy as np
+
+import aviary.scenario.scenario_generator as sg
+import aviary.scenario.time_varying_poisson_scenario as tvps
+
+
+@pytest.fixture(scope="function")
+def target(i_element):
+    """Test fixture: a time-varying Poisson scenario object, with a rush wave after ten minutes."""
+
+    return tvps.TimeVaryingPoissonScenario(
+        sector_element = i_element,
+        arrival_rate = [(0, 1 / 60), (600, 10 / 60), (1200, 1 / 60)],
+        aircraft_types = ["B747", "B777"],
+        seed = 22
+    )
+
+
+def arrival_times(target, n, rng):
+    """Returns the times of at least n arrivals, drawn in batches"""
+
+    start, times = 0, []
+    while sum(len(t) for t in times) < n:
+        start, t, _ = target.arrivals(start, rng)
+        times.append(t)
+    return np.concatenate(times)
+
+
+def test_arrival_rate():
+
+    target = tvps.ArrivalRate([(0, 1), (10, 3), (20, 0)])
+    assert target.max_rate == 3
+    assert target([0, 5, 10, 19.9, 20, 1000]).tolist() == [1, 1, 3, 3, 0, 0]
+    assert target.horizon == 20
+    assert tvps.ArrivalRate([(0, 1), (10, 0), (20, 0)]).horizon == 10
+    assert tvps.ArrivalRate([(0, 0), (10, 1)]).horizon is None
+
+    target = tvps.ArrivalRate(0.5)
+    assert target(np.array([0, 100])).tolist() == [0.5, 0.5]
+    assert target.horizon is None
+
+    target = tvps.ArrivalRate(lambda t: 1 + np.sin(t), max_rate = 2)
+    assert target(np.array([0.0])).tolist() == [1]
+    assert target.horizon is None
+    assert tvps.ArrivalRate(lambda t: 1 + np.sin(t), max_rate = 2, horizon = 100).horizon == 100
+
+    for rate in [[(5, 1)], [(0, 1), (0, 2)], [(0, -1)], 0]:
+        with pytest.raises(ValueError):
+            tvps.ArrivalRate(rate)
+    with pytest.raises(ValueError):
+        tvps.ArrivalRate(lambda t: t)
+    with pytest.raises(ValueError):
+        tvps.ArrivalRate([(0, 1), (10, 0)], horizon = 10)
+
+
+class RateObject():
+    """A constant rate function with a content hash"""
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def __call__(self, t):
+        return np.full(np.shape(t), self.rate)
+
+    def content_hash(self):
+        return str(self.rate)
+
+
+def test_arrival_rate_content_hash():
+
+    key = tvps.ArrivalRate([(0, 1), (10, 3)]).content_hash()
+    assert key == tvps.ArrivalRate([(0, 1), (10, 3)]).content_hash()
+    assert key != tvps.ArrivalRate([(0, 1), (10, 2)]).content_hash()
+
+    key = tvps.ArrivalRate(RateObject(0.1), max_rate = 1).content_hash()
+    assert key == tvps.ArrivalRate(RateObject(0.1), max_rate = 1).content_hash()
+    assert key != tvps.ArrivalRate(RateObject(0.05), max_rate = 1).content_hash()
+
+    # Rate functions without a content hash cannot be hashed.
+    with pytest.raises(TypeError):
+        tvps.ArrivalRate(lambda t: 0.1 + 0 * t, max_rate = 1).content_hash()
+
+
+def test_aircraft_generator(target):
+
+    generator = target.aircraft_generator()
+    x = next(generator)
+    assert sorted(x.keys()) == sorted([sg.CALLSIGN_KEY, sg.CLEARED_FLIGHT_LEVEL_KEY, sg.CURRENT_FLIGHT_LEVEL_KEY,
+                                       sg.DEPARTURE_KEY, sg.DESTINATION_KEY, sg.REQUESTED_FLIGHT_LEVEL_KEY,
+                                       sg.ROUTE_KEY, sg.AIRCRAFT_TIMEDELTA_KEY, sg.AIRCRAFT_TYPE_KEY,
+                                       sg.START_POSITION_KEY])
+    assert x[sg.AIRCRAFT_TYPE_KEY] in ["B747", "B777"]
+
+    # Arrivals are reproducible given the seed.
+    target.set_seed(22)
+    generator = target.aircraft_generator()
+    timedeltas = [next(generator)[sg.AIRCRAFT_TIMEDELTA_KEY] for _ in range(20)]
+    target.set_seed(22)
+    generator = target.aircraft_generator()
+    assert [next(generator)[sg.AIRCRAFT_TIMEDELTA_KEY] for _ in range(20)] == timedeltas
+
+    times = arrival_times(target, 1000, np.random.default_rng(1))
+
+    # The number of arrivals in each period reflects its rate (10 and 100 expected before and during the wave).
+    assert (np.diff(times, prepend = 0) >= 0).all()
+    assert np.sum(times < 600) < 25
+    assert 70 < np.sum((times >= 600) & (times < 1200)) < 130
+
+
+def test_rate_ends_in_zero(i_element):
+
+    # Generation stops once the rate is zero for good, rather than thinning candidates forever.
+    target = tvps.TimeVaryingPoissonScenario(sector_element = i_element, arrival_rate = [(0, 0.01), (1800, 0)],
+                                             seed = 22)
+    assert target.horizon() == 1800
+    scenario = sg.ScenarioGenerator(target).generate_scenario(duration = 3600, seed = 22)
+    assert len(scenario[sg.AIRCRAFT_KEY]) > 0
+    assert sum(x[sg.AIRCRAFT_TIMEDELTA_KEY] for x in scenario[sg.AIRCRAFT_KEY]) < 1800
+
+    target = tvps.TimeVaryingPoissonScenario(sector_element = i_element,
+                                             arrival_rate = lambda t: np.where(t < 1800, 0.01, 0),
+                                             max_rate = 0.01, horizon = 1800, seed = 22)
+    assert target.horizon() == 1800
+    scenario = sg.ScenarioGenerator(target).generate_scenario(duration = 3600, seed = 22)
+    assert sum(x[sg.AIRCRAFT_TIMEDELTA_KEY] for x in scenario[sg.AIRCRAFT_KEY]) < 1800
+
+    # With per-route rates, generation stops after the last horizon.
+    routes = i_element.routes()
+    keys = [(route.fix_names()[0], route.fix_names()[-1]) for route in routes]
+    target = tvps.TimeVaryingPoissonScenario(sector_element = i_element,
+                                             arrival_rate = {keys[0]: [(0, 0.01), (600, 0)],
+                                                             keys[1]: [(0, 0.01), (1200, 0)]},
+                                             seed = 22)
+    assert target.horizon() == 1200
+
+
+def test_route_rates(i_element):
+
+    routes = i_element.routes()
+    keys = [(route.fix_names()[0], route.fix_names()[-1]) for route in routes]
+
+    target = tvps.TimeVaryingPoissonScenario(sector_element = i_element,
+                                             arrival_rate = {keys[0]: [(0, 0), (600, 1 / 60)], keys[1]: 1 / 60},
+                                             seed = 22)
+    assert target.max_rate() == pytest.approx(2 / 60)
+
+    generator = target.aircraft_generator()
+    t = 0
+    for _ in range(200):
+        x = next(generator)
+        t += x[sg.AIRCRAFT_TIMEDELTA_KEY]
+        route = x[sg.ROUTE_KEY]
+        # The first route has no arrivals for the first ten minutes.
+        if t < 600:
+            assert route[-1] == routes[1].serialize()[-1]
+
+    with pytest.raises(ValueError):
+        tvps.TimeVaryingPoissonScenario(sector_element = i_element, arrival_rate = {("A", "NOWHERE"): 1})
+    with pytest.raises(ValueError):
+        tvps.TimeVaryingPoissonScenario(sector_element = i_element, arrival_rate = {keys[0]: 1},
+                                        route_weights = {keys[0]: 1})
+
+
+def test_max_rate_exceeded(i_element):
+
+    target = tvps.TimeVaryingPoissonScenario(sector_element = i_element, arrival_rate = lambda t: 2 + 0 * t,
+                                             max_rate = 1, seed = 22)
+    with pytest.raises(ValueError):
+        next(target.aircraft_generator())
@@ -0,0 +1,66 @@
+import pytest
+
+import numpy as np
+
+import aviary.sector.sector_shape as ss
+import aviary.sector.sector_element as se
+import aviary.sector.composite_airspace as ca
+
+
+@pytest.fixture(scope="function")
+def elements():
+    """Test fixture: a grid of X and I sector elements, with elements stacked vertically at some grid points."""
+
+    ret = []
+    for k, (lon, lat) in enumerate([(lon, lat) for lon in [-2, -1, 0, 1] for lat in [50, 51, 52]]):
+        shape = ss.XShape() if k % 2 == 0 else ss.IShape()
+        ret.append(se.SectorElement(shape = shape, name = f"E{k}", origin = (lon, lat),
+                                    lower_limit = 100, upper_limit = 300))
+        if k % 3 == 0:
+            ret.append(se.SectorElement(shape = ss.IShape(), name = f"U{k}", origin = (lon, lat),
+                                        lower_limit = 300, upper_limit = 450))
+    return ret
+
+
+def test_locate(elements):
+
+    target = ca.CompositeAirspace(elements)
+    assert len(target) == len(elements)
+
+    lon, lat = elements[0].centre_point()
+    assert target.locate(lon, lat, 200) == [0]
+    assert target.locate(lon, lat, 300) == [0, 1]
+    assert target.locate(lon, lat, 400) == [1]
+    assert target.locate(lon, lat, 500) == []
+    assert target.locate(lon + 0.3, lat + 0.3, 200) == []
+    assert not target.contains(lon + 0.3, lat + 0.3, 200)
+    assert target.contains(lon, lat, 200)
+
+    with pytest.raises(ValueError):
+        ca.CompositeAirspace([])
+
+
+def test_locate_points(elements):
+
+    rng = np.random.default_rng(3)
+    n = 500
+    lon = rng.uniform(-2.7, 1.7, n)
+    lat = rng.uniform(49.5, 52.5, n)
+    flight_level = rng.choice([50, 100, 200, 300, 350, 500], n)
+    lon[0] = np.nan
+
+    target = ca.CompositeAirspace(elements)
+    point_index, element_index = target.locate_points(lon, lat, flight_level)
+
+    # The index agrees with testing every element.
+    expected = [(k, e) for k in range(n) for e, element in enumerate(elements)
+                if element.contains(lon[k], lat[k], flight_level[k])]
+    assert list(zip(point_index.tolist(), element_index.tolist())) == expected
+    assert len(set(point_index.tolist())) > 50
+
+    assert target.contains_points(lon, lat, flight_level).tolist() == \
+        [any(element.contains(lon[k], lat[k], flight_level[k]) for element in elements) for k in range(n)]
+
+    # Single points agree with the batch query.
+    for k in range(50):
+        assert target.locate(lon[k], lat[k], flight_level[k]) == element_index[point_index == k].tolist()
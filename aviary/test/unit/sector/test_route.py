@@ -2,6 +2,7 @@
 import pytest
 
 import json
+import pickle
 
 import aviary.constants as C
 import aviary.sector.route as sr
@@ -139,35 +140,116 @@ def test_truncate(i_element):
     assert latE < latD # Sanity check: the route is due south.
 
     # If we start from north of fix A, the truncated route is identical to the original route
+    target = full_route.copy()
     target.truncate(initial_lat = latA + 1, initial_lon = lonA)
     assert target.fix_list == full_route.fix_list
 
-    # If we start from halfway between fixes B and C, the truncated route omits both fixes A and B.
-    target = i_element.routes()[1].copy()
-
     # If we start from halfway between fixes A and B, the truncated route omits only fix A.
+    target = full_route.copy()
     target.truncate(initial_lat = (latA + latB)/2, initial_lon = lonA)
     assert target.fix_list == full_route.fix_list[1:]
 
     # If we start from halfway between fixes B and C, the truncated route omits both fixes A and B.
-    target = i_element.routes()[1].copy()
-
+    target = full_route.copy()
     target.truncate(initial_lat = (latB + latC)/2, initial_lon = lonA)
     assert target.fix_list == full_route.fix_list[2:]
 
     # If we start from halfway between fixes C and D, the truncated route omits fixes A, B and C.
-    target = i_element.routes()[1].copy()
-
+    target = full_route.copy()
     target.truncate(initial_lat = (latC + latD)/2, initial_lon = lonA)
     assert target.fix_list == full_route.fix_list[3:]
 
     # If we start from halfway between fixes D and E, the truncated route omits both fixes A, B, C and D.
-    target = i_element.routes()[1].copy()
-
+    target = full_route.copy()
     target.truncate(initial_lat = (latD + latE)/2, initial_lon = lonA)
     assert target.fix_list == full_route.fix_list[4:]
 
     # If we start from south of fix E, the truncated route has an empty fix list.
-    target = i_element.routes()[1].copy()
+    target = full_route.copy()
     target.truncate(initial_lat = latE - 1, initial_lon = lonA)
     assert not target.fix_list
+
+
+def test_route_view(i_element):
+
+    target = i_element.routes()[1]
+    full_route = target.copy()
+    lonA, latA = target.fix_points()[0].coords[0]
+    lonB, latB = target.fix_points()[1].coords[0]
+
+    # Sector routes are shared, immutable views.
+    assert isinstance(target, sr.RouteView)
+    assert i_element.routes()[1] is target
+    with pytest.raises(Exception):
+        target.truncate(initial_lat = (latA + latB)/2, initial_lon = lonA)
+    with pytest.raises(Exception):
+        target.reverse()
+    with pytest.raises(Exception):
+        target.projection = None
+
+    # Truncation and reversal return new views, leaving the original unchanged.
+    truncated = target.truncated(initial_lat = (latA + latB)/2, initial_lon = lonA)
+    assert isinstance(truncated, sr.RouteView)
+    assert list(truncated.fix_list) == full_route.fix_list[1:]
+    assert truncated.fix_points() == target.fix_points()[1:]
+    assert list(target.fix_list) == full_route.fix_list
+
+    expected = full_route.copy()
+    expected.truncate(initial_lat = (latA + latB)/2, initial_lon = lonA)
+    assert truncated.serialize() == expected.serialize()
+    assert truncated.content_hash() == expected.content_hash()
+
+    assert target.reversed().fix_names() == i_element.routes()[0].fix_names()
+    assert target.reversed().serialize() == full_route.reversed().serialize()
+
+    # Copies are mutable routes.
+    assert type(target.copy()) == sr.Route
+
+
+def test_hash_route(i_element):
+
+    target = i_element.routes()[1].copy()
+    result = target.hash_route()
+
+    assert result == i_element.routes()[1].hash_route()
+    assert result != i_element.routes()[0].hash_route()
+
+    # The cached hash is invalidated when the route changes.
+    target.reverse()
+    assert target.hash_route() == i_element.routes()[0].hash_route()
+
+    target.fix_list = target.fix_list[1:]
+    assert target.hash_route() != i_element.routes()[0].hash_route()
+
+
+def test_content_hash(i_element, x_element):
+
+    target = i_element.routes()[1]
+
+    assert target.content_hash() == i_element.routes()[1].copy().content_hash()
+    assert target.content_hash() != i_element.routes()[0].content_hash()
+
+    # The content hash depends on the fix coordinates, not only the fix names.
+    unprojected = sr.Route(fix_list = target.fix_list)
+    assert unprojected.hash_route() == target.hash_route()
+    assert unprojected.content_hash() != target.content_hash()
+
+
+def test_pickle(i_element):
+
+    target = i_element.routes()[1].copy()
+    result = pickle.loads(pickle.dumps(target))
+
+    # The projection is reconstructed when first used.
+    assert isinstance(result._projection, str)
+    assert result.content_hash() == target.content_hash()
+    assert result.serialize() == target.serialize()
+
+    # Route views unpickle as route views.
+    view = pickle.loads(pickle.dumps(i_element.routes()[1]))
+    assert isinstance(view, sr.RouteView)
+    assert view.serialize() == target.serialize()
+
+    unprojected = pickle.loads(pickle.dumps(sr.Route(fix_list = target.fix_list)))
+    assert unprojected.projection is None
+    assert unprojected.fix_points() == target.fix_points(unprojected = True)
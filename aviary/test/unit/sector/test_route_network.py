@@ -0,0 +1,114 @@
+import pytest
+
+import numpy as np
+
+import aviary.constants as C
+import aviary.sector.sector_shape as ss
+import aviary.sector.sector_element as se
+import aviary.sector.route as rt
+import aviary.sector.route_network as rn
+import aviary.scenario.poisson_scenario as ps
+import aviary.scenario.scenario_generator as sg
+from aviary.utils.geo_helper import GeoHelper
+
+
+@pytest.fixture(scope="function")
+def grid():
+    """Test fixture: a 3x3 grid of X elements, each centred on the exterior fixes of its neighbours."""
+
+    rows = [[se.SectorElement(shape = ss.XShape(), origin = (-0.1275, 51.5))]]
+    for r in range(3):
+        if r > 0:
+            rows.append([se.SectorElement(shape = ss.XShape(), origin = rows[-1][0].fix_location("SIN"))])
+        while len(rows[r]) < 3:
+            rows[r].append(se.SectorElement(shape = ss.XShape(), origin = rows[r][-1].fix_location("SATAN")))
+    return [element for row in rows for element in row]
+
+
+def test_single_element(i_element):
+
+    target = rn.RouteNetwork([i_element])
+
+    assert len(target) == len(i_element.shape.fixes)
+    assert target.n_airways() == 8
+    assert [route.fix_names() for route in target.routes()] == \
+        sorted([route.fix_names() for route in i_element.routes()], key = lambda names: target.index(names[0]))
+
+    names, distance = target.shortest_path("E", "A")
+    assert names == ["E", "D", "C", "B", "A"]
+    assert distance == pytest.approx(70, rel = 1e-3)
+
+    route = target.route("E", "A")
+    assert route.fix_points()[0].coords[0] == pytest.approx(i_element.fix_location("E"), abs = 1e-6)
+
+    with pytest.raises(ValueError):
+        target.shortest_path("E", "C")
+    with pytest.raises(ValueError):
+        target.index("NOWHERE")
+
+
+def test_composed_elements(i_element):
+
+    # A smaller X element centred on the I element's top exterior fix.
+    x_element = se.SectorElement(shape = ss.XShape(length_nm = 30), origin = i_element.fix_location("A"))
+    target = rn.RouteNetwork([i_element, x_element])
+
+    assert len(target) == len(i_element.shape.fixes) + len(x_element.shape.fixes) - 1
+
+    names, _ = target.shortest_path("E", "SATAN")
+    assert names == ["E", "D", "C", "B", "A", "DEMON", "SATAN"]
+    assert target.shortest_path("SATAN", "E") is not None
+    assert target.shortest_path("SATAN", "SATAN") is None
+
+
+def test_shortest_paths(grid):
+
+    target = rn.RouteNetwork(grid)
+
+    # Fixes shared by neighbouring elements are merged (and others with the same name are renamed).
+    assert len(target) <= 9 * len(grid) - 8
+    assert "GATES_1" in target.fix_names
+
+    # Brute force all pairs shortest paths over the element routes.
+    n = len(target)
+    index = {tuple(np.round(location, 4)): k for k, location in enumerate(target.fix_locations)}
+    expected = np.full((n, n), np.inf)
+    np.fill_diagonal(expected, 0)
+    for element in grid:
+        for route in element.routes():
+            points = [tuple(np.round(point.coords[0], 4)) for point in route.fix_points()]
+            for a, b in zip(points[:-1], points[1:]):
+                (lon1, lat1), (lon2, lat2) = target.fix_locations[[index[a], index[b]]]
+                expected[index[a], index[b]] = GeoHelper.distance(lat1, lon1, lat2, lon2) / C.METRES_PER_NM
+    for k in range(n):
+        expected = np.minimum(expected, expected[:, [k]] + expected[[k], :])
+
+    routes = target.routes()
+    assert len(routes) == sum(np.isfinite(expected[i, j]) for i in target.entries for j in target.exits if i != j)
+
+    for route in routes:
+        names = route.fix_names()
+        _, distance = target.shortest_path(names[0], names[-1])
+        assert distance == pytest.approx(expected[target.index(names[0]), target.index(names[-1])])
+
+    # Routes are cached.
+    assert all(a is b for a, b in zip(target.routes(), routes))
+    entry_index, exit_index = target.route_pairs()
+    assert target.route_at(3) is target.route(target.fix_names[entry_index[3]], target.fix_names[exit_index[3]])
+
+
+def test_scenario_generation(i_element):
+
+    x_element = se.SectorElement(shape = ss.XShape(length_nm = 30), origin = i_element.fix_location("A"))
+    network = rn.RouteNetwork([i_element, x_element])
+
+    algorithm = ps.PoissonScenario(sector_element = i_element, arrival_rate = 1 / 60, route_network = network, seed = 2)
+    scenario = sg.ScenarioGenerator(algorithm).generate_scenario(duration = 3600, seed = 2)
+
+    network_routes = {tuple(route.fix_names()) for route in network.routes()}
+    for aircraft in scenario[sg.AIRCRAFT_KEY]:
+        names = tuple(fix[rt.FIX_NAME_KEY] for fix in aircraft[sg.ROUTE_KEY])
+        assert any(route[-len(names):] == names for route in network_routes)
+
+    assert algorithm.content_hash() != ps.PoissonScenario(sector_element = i_element, arrival_rate = 1 / 60,
+                                                          seed = 2).content_hash()
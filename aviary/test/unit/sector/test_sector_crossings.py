@@ -0,0 +1,106 @@
+import pytest
+
+import numpy as np
+
+import aviary.sector.sector_crossings as sc
+
+
+def test_crossings(i_element):
+
+    target = sc.SectorCrossingDetector(i_element)
+
+    lon, lat = i_element.centre_point()
+    far = lon + 5
+    lower, upper = i_element.lower_limit, i_element.upper_limit
+
+    previous_lon = np.array([lon, far, lon, lon, far, lon, lon, np.nan])
+    previous_lat = np.full(8, lat)
+    previous_flight_level = np.array([300, 300, 300, upper + 10, upper + 10, 300, 300, 300])
+
+    current_lon = np.array([far, lon, lon, lon, lon, far, lon, lon])
+    current_lat = np.full(8, lat)
+    current_flight_level = np.array([300, 300, upper + 10, 300, 300, lower - 10, 310, 300])
+
+    result = target.crossings(previous_lon, previous_lat, previous_flight_level,
+                              current_lon, current_lat, current_flight_level)
+
+    assert result[sc.INSIDE_KEY].tolist() == [False, True, False, True, True, False, True, True]
+
+    # Lateral entry, vertical entry from above, and combined lateral and vertical entry.
+    assert result[sc.ENTRY_KEY].tolist() == [1, 3, 4]
+    assert result[sc.ENTRY_BOUNDARY_KEY].tolist() == [sc.LATERAL, sc.UPPER, sc.LATERAL | sc.UPPER]
+
+    # Lateral exit, vertical exit through the top, and combined lateral and vertical exit.
+    assert result[sc.EXIT_KEY].tolist() == [0, 2, 5]
+    assert result[sc.EXIT_BOUNDARY_KEY].tolist() == [sc.LATERAL, sc.UPPER, sc.LATERAL | sc.LOWER]
+
+
+def test_crossings_match_contains(x_element):
+
+    rng = np.random.default_rng(11)
+    n = 200
+
+    centre_lon, centre_lat = x_element.centre_point()
+    previous_lon = centre_lon + rng.normal(0, 0.4, n)
+    previous_lat = centre_lat + rng.normal(0, 0.4, n)
+    previous_flight_level = rng.uniform(100, 450, n)
+    lon = previous_lon + rng.normal(0, 0.1, n)
+    lat = previous_lat + rng.normal(0, 0.1, n)
+    flight_level = previous_flight_level + rng.normal(0, 30, n)
+
+    result = sc.SectorCrossingDetector(x_element).crossings(previous_lon, previous_lat, previous_flight_level,
+                                                            lon, lat, flight_level)
+
+    was_inside = [x_element.contains(*args) for args in zip(previous_lon, previous_lat, previous_flight_level)]
+    inside = [x_element.contains(*args) for args in zip(lon, lat, flight_level)]
+
+    assert result[sc.INSIDE_KEY].tolist() == inside
+    assert result[sc.ENTRY_KEY].tolist() == [k for k in range(n) if inside[k] and not was_inside[k]]
+    assert result[sc.EXIT_KEY].tolist() == [k for k in range(n) if was_inside[k] and not inside[k]]
+    assert len(result[sc.ENTRY_KEY]) > 0 and len(result[sc.EXIT_KEY]) > 0
+    assert all(result[sc.ENTRY_BOUNDARY_KEY] > 0) and all(result[sc.EXIT_BOUNDARY_KEY] > 0)
+
+
+def test_update(x_element):
+
+    rng = np.random.default_rng(5)
+    n, ticks = 50, 10
+
+    centre_lon, centre_lat = x_element.centre_point()
+    lons = centre_lon + np.cumsum(rng.normal(0, 0.1, (ticks, n)), axis = 0)
+    lats = centre_lat + np.cumsum(rng.normal(0, 0.1, (ticks, n)), axis = 0)
+    flight_levels = 300 + np.cumsum(rng.normal(0, 40, (ticks, n)), axis = 0)
+
+    target = sc.SectorCrossingDetector(x_element)
+    result = target.update(lons[0], lats[0], flight_levels[0])
+    assert len(result[sc.ENTRY_KEY]) == 0 and len(result[sc.EXIT_KEY]) == 0
+
+    # Streaming updates give the same events as pairwise crossings.
+    for t in range(1, ticks):
+        result = target.update(lons[t], lats[t], flight_levels[t])
+        expected = target.crossings(lons[t - 1], lats[t - 1], flight_levels[t - 1], lons[t], lats[t], flight_levels[t])
+        for key in [sc.INSIDE_KEY, sc.ENTRY_KEY, sc.ENTRY_BOUNDARY_KEY, sc.EXIT_KEY, sc.EXIT_BOUNDARY_KEY]:
+            assert result[key].tolist() == expected[key].tolist()
+
+    target.reset()
+    result = target.update(lons[0], lats[0], flight_levels[0])
+    assert len(result[sc.EXIT_KEY]) == 0
+
+
+def test_crossings_stacked_volumes(i_element):
+
+    i_element.volumes = [(100, 200), (300, 400)]
+    target = sc.SectorCrossingDetector(i_element)
+
+    lon, lat = i_element.centre_point()
+    previous_flight_level = np.array([150, 250, 250, 350, 150, 180])
+    flight_level = np.array([250, 150, 350, 250, 350, 190])
+
+    result = target.crossings(np.full(6, lon), np.full(6, lat), previous_flight_level,
+                              np.full(6, lon), np.full(6, lat), flight_level)
+
+    # Boundaries are those of the volume entered or left.
+    assert result[sc.ENTRY_KEY].tolist() == [1, 2]
+    assert result[sc.ENTRY_BOUNDARY_KEY].tolist() == [sc.UPPER, sc.LOWER]
+    assert result[sc.EXIT_KEY].tolist() == [0, 3]
+    assert result[sc.EXIT_BOUNDARY_KEY].tolist() == [sc.UPPER, sc.LOWER]
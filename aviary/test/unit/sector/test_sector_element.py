@@ -2,8 +2,12 @@
 import pytest
 
 import os
+import pickle
+import subprocess
+import sys
 import geojson
 import shapely
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 
 import aviary.constants as C
@@ -141,6 +145,25 @@ def test_routes(i_element):
     assert result[0].fix_points()[4].coords[0] == pytest.approx((-0.1275, 52.08), 0.0001)
 
 
+def test_routes_in_threads(x_element):
+
+    def truncated_routes(k):
+        ret = []
+        for route in x_element.routes():
+            lon, lat = route.fix_points()[k % route.length()].coords[0]
+            ret.append(route.truncated(initial_lat = lat, initial_lon = lon).serialize())
+        return ret
+
+    expected = [truncated_routes(k) for k in range(20)]
+
+    # The sector's route views are shared by concurrent threads, and are not modified.
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        result = list(executor.map(truncated_routes, range(20)))
+
+    assert result == expected
+    assert [route.length() for route in x_element.routes()] == [5, 5, 5, 5]
+
+
 def test_sector_geojson(i_element):
 
     result = i_element.sector_geojson()
@@ -261,6 +284,53 @@ def test_contains(i_element):
     assert not i_element.contains(centre[0], centre[1], flight_level=i_element.upper_limit+10)
 
 
+def test_stacked_volumes(i_element):
+
+    target = se.SectorElement(shape = i_element.shape, origin = i_element.origin,
+                              volumes = [(300, 400), (100, 200), (200, 250)])
+
+    assert target.volumes == [(100, 200), (200, 250), (300, 400)]
+    assert target.lower_limit == 100 and target.upper_limit == 400
+
+    flight_levels = [50, 100, 150, 200, 250, 275, 300, 400, 410]
+    expected = [-1, 0, 0, 1, 1, -1, 2, 2, -1]
+    assert [target.volume_index(fl) for fl in flight_levels] == expected
+    assert target.volume_index(flight_levels).tolist() == expected
+    assert target.volume_index(float("nan")) == -1
+
+    lon, lat = target.centre_point()
+    assert [target.contains(lon, lat, fl) for fl in flight_levels] == [k >= 0 for k in expected]
+    assert target.contains_points([lon] * len(flight_levels), [lat] * len(flight_levels), flight_levels).tolist() == \
+        [k >= 0 for k in expected]
+    assert not target.contains(lon + 1, lat, 150)
+
+    # Changing the outer limits changes the lowest and highest volumes.
+    target.upper_limit = 450
+    assert target.volumes == [(100, 200), (200, 250), (300, 450)]
+    assert target.content_hash() != se.SectorElement(shape = i_element.shape, origin = i_element.origin,
+                                                     volumes = [(100, 200), (300, 450)]).content_hash()
+
+    with pytest.raises(ValueError):
+        se.SectorElement(shape = i_element.shape, volumes = [(100, 300), (200, 400)])
+    with pytest.raises(ValueError):
+        se.SectorElement(shape = i_element.shape, volumes = [(300, 200)])
+    with pytest.raises(ValueError):
+        se.SectorElement(shape = i_element.shape, volumes = [])
+
+
+def test_stacked_volumes_round_trip(x_element):
+
+    x_element.volumes = [(100, 200), (300, 400)]
+    result = se.SectorElement.deserialise(StringIO(geojson.dumps(x_element)))
+
+    assert result.volumes == x_element.volumes
+    assert geojson.dumps(result) == geojson.dumps(x_element)
+
+    names = x_element.sector_geojson()[C.PROPERTIES_KEY][C.CHILDREN_KEY][C.SECTOR_VOLUME_VALUE][C.CHILDREN_NAMES_KEY]
+    assert names == [x_element.boundary_geojson(k)[C.PROPERTIES_KEY][C.NAME_KEY] for k in range(2)]
+    assert len(set(names)) == 2
+
+
 def test_serialisation(x_element):
     # Test JSON serialisation/deserialisation.
 
@@ -295,6 +365,54 @@ def test_hash_sector_coordinates(x_element):
     assert not result == different_result
 
 
+def test_hash_sector_coordinates_is_stable_across_processes():
+
+    code = """
+import aviary.sector.sector_shape as ss
+import aviary.sector.sector_element as se
+sector = se.SectorElement(shape = ss.YShape(), name = "HEAVEN", lower_limit = 140, upper_limit = 400)
+print(sector.hash_sector_coordinates(), [route.hash_route() for route in sector.routes()], sector.content_hash())
+"""
+
+    results = set()
+    for hash_seed in ["1", "2"]:
+        env = dict(os.environ, PYTHONHASHSEED = hash_seed)
+        results.add(subprocess.check_output([sys.executable, "-c", code], env = env).strip())
+
+    assert len(results) == 1
+
+
+def test_content_hash(x_element, y_element):
+
+    result = x_element.content_hash()
+    assert result == x_element.content_hash()
+    assert result != y_element.content_hash()
+
+    x_element.upper_limit = x_element.upper_limit + 10
+    assert result != x_element.content_hash()
+
+
+def test_hash_invalidation(x_element):
+
+    content_hash = x_element.content_hash()
+    coordinates_hash = x_element.hash_sector_coordinates()
+
+    # Hashes cached from the sector geometry are invalidated when the shape or projection is assigned.
+    x_element.shape = ss.XShape(length_nm = 60)
+    assert x_element.content_hash() != content_hash
+    assert x_element.hash_sector_coordinates() != coordinates_hash
+
+    x_element.shape = ss.XShape()
+    x_element.projection = se.SectorElement.stereographic_proj_string((0, 50))
+    assert x_element.content_hash() != content_hash
+    assert x_element.hash_sector_coordinates() != coordinates_hash
+
+    # Pickling does not retain stale hashes.
+    result = pickle.loads(pickle.dumps(x_element))
+    assert result.content_hash() == x_element.content_hash()
+    assert result.hash_sector_coordinates() == x_element.hash_sector_coordinates()
+
+
 def test_deserialise(i_sector_geojson):
 #
     result = se.SectorElement.deserialise(StringIO(i_sector_geojson))
@@ -314,6 +432,46 @@ def test_deserialise(i_sector_geojson):
 #     assert str(geojson.dumps(result)) == i_sector_geojson.strip()
 
 
+def test_deserialise_round_trip(x_element):
+
+    result = se.SectorElement.deserialise(StringIO(geojson.dumps(x_element)))
+
+    assert result.origin == x_element.origin
+    assert result.lower_limit == x_element.lower_limit
+    assert result.upper_limit == x_element.upper_limit
+    assert result.polygon().equals_exact(x_element.polygon(), tolerance = 1e-3)
+    assert [route.fix_names() for route in result.routes()] == [route.fix_names() for route in x_element.routes()]
+    assert result.fix_location("SIN") == pytest.approx(x_element.fix_location("SIN"), abs = 1e-3)
+
+    # Re-serialisation produces the original GeoJSON.
+    assert geojson.dumps(result) == geojson.dumps(x_element)
+
+def test_pickle(x_element):
+
+    x_element.volumes = [(100, 200), (300, 400)]
+    deserialised = se.SectorElement.deserialise(StringIO(geojson.dumps(x_element)))
+
+    for target in [x_element, deserialised]:
+        result = pickle.loads(pickle.dumps(target))
+
+        # The projection and shape are reconstructed when first used.
+        assert isinstance(result._projection, str)
+        assert result._shape is None
+
+        assert result.content_hash() == target.content_hash()
+        assert type(result.shape) == type(target.shape)
+        assert result.volumes == target.volumes
+        assert result.polygon().equals(target.polygon())
+        assert [route.serialize() for route in result.routes()] == [route.serialize() for route in target.routes()]
+        assert geojson.dumps(result) == geojson.dumps(target)
+
+        # Pickling again does not construct the projection or shape.
+        assert pickle.loads(pickle.dumps(pickle.loads(pickle.dumps(target)))).content_hash() == target.content_hash()
+
+    # The compact form is smaller than the GeoJSON.
+    assert len(pickle.dumps(x_element)) < len(geojson.dumps(x_element)) / 4
+
+
 def test_sector_is_valid_geojson(i_sector_geojson):
     loaded = geojson.loads(i_sector_geojson)
     # print(loaded.errors())
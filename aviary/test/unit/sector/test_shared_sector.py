@@ -0,0 +1,43 @@
+import pytest
+
+import multiprocessing
+import sys
+
+from aviary.sector.shared_sector import SharedSector
+
+# Shared memory requires Python 3.8 or later.
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 8), reason = "Requires multiprocessing.shared_memory")
+
+
+def content_hash(descriptor):
+    """Worker function: attaches to a shared sector and returns its content hash and object id"""
+
+    sector = SharedSector.attach(descriptor)
+    return sector.content_hash(), id(sector)
+
+
+def test_attach(x_element):
+
+    with SharedSector(x_element) as shared:
+        result = SharedSector.attach(shared.descriptor)
+
+        assert result.content_hash() == x_element.content_hash()
+        assert result.fix_location("SIN") == x_element.fix_location("SIN")
+
+        # The sector is unpickled once per process.
+        assert SharedSector.attach(shared.descriptor) is result
+
+    # The attached sector remains usable once the block is unlinked.
+    assert result.polygon().equals(x_element.polygon())
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason = "Requires the fork start method")
+def test_attach_in_pool(y_element):
+
+    with SharedSector(y_element) as shared:
+        ctx = multiprocessing.get_context("fork")
+        with ctx.Pool(processes = 1) as pool:
+            result = pool.map(content_hash, [shared.descriptor] * 3)
+
+    assert {h for h, _ in result} == {y_element.content_hash()}
+    assert len({sector_id for _, sector_id in result}) == 1
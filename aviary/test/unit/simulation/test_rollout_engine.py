@@ -0,0 +1,104 @@
+import pytest
+
+import numpy as np
+
+import aviary.constants as C
+import aviary.scenario.overflier_climber_scenario as ocs
+import aviary.scenario.scenario_generator as sg
+import aviary.simulation.rollout_engine as re
+import aviary.metrics.utils as utils
+
+
+@pytest.fixture(scope="function")
+def scenario(i_element, predictor):
+    """Test fixture: an overflier-climber scenario in an I-shaped sector"""
+
+    algorithm = ocs.OverflierClimberScenario(sector_element = i_element,
+                                             trajectory_predictor = predictor,
+                                             aircraft_types = ['B744', 'B743'],
+                                             flight_levels = [200, 400],
+                                             seed = 22)
+
+    return sg.ScenarioGenerator(algorithm).generate_scenario(duration = 1000, seed = 22)
+
+
+def test_run(scenario, i_element, predictor):
+
+    target = re.RolloutEngine(scenario, sector_element = i_element, trajectory_predictor = predictor)
+    result = target.run(duration = 100, dt = 10)
+
+    assert np.array_equal(result[re.TIMES_KEY], np.arange(0, 101, 10))
+    for key in [C.LONGITUDES_KEY, C.LATITUDES_KEY, re.FLIGHT_LEVELS_KEY]:
+        assert result[key].shape == (11, 2)
+
+    # Both aircraft start at their scenario start positions.
+    for i, ac in enumerate(scenario[sg.AIRCRAFT_KEY]):
+        lon, lat = ac[sg.START_POSITION_KEY]
+        assert result[C.LONGITUDES_KEY][0, i] == pytest.approx(lon)
+        assert result[C.LATITUDES_KEY][0, i] == pytest.approx(lat)
+        assert result[re.FLIGHT_LEVELS_KEY][0, i] == ac[sg.CURRENT_FLIGHT_LEVEL_KEY]
+
+
+def test_cruise(scenario, i_element, predictor):
+
+    target = re.RolloutEngine(scenario, sector_element = i_element, trajectory_predictor = predictor)
+    overflier = scenario[sg.AIRCRAFT_KEY][0]
+    flight_level = overflier[sg.CURRENT_FLIGHT_LEVEL_KEY]
+    speed = predictor.cruise_speed(flight_level, overflier[sg.AIRCRAFT_TYPE_KEY])
+
+    target.step(60)
+    assert target.distance[0] == pytest.approx(speed * 60 / C.METRES_PER_NM)
+    assert target.flight_levels()[0] == flight_level
+
+    lons, lats = target.positions()
+    start_lon, start_lat = overflier[sg.START_POSITION_KEY]
+    assert utils.horizontal_distance_m(start_lon, start_lat, lons[0], lats[0]) == pytest.approx(speed * 60, rel = 1e-3)
+
+
+def test_overflier_climber_conflict(scenario, i_element, predictor):
+
+    overflier, climber = scenario[sg.AIRCRAFT_KEY]
+    climb_time = predictor.climb_time_between_levels(lower_level = climber[sg.CURRENT_FLIGHT_LEVEL_KEY],
+                                                     upper_level = overflier[sg.CURRENT_FLIGHT_LEVEL_KEY],
+                                                     aircraft_type = climber[sg.AIRCRAFT_TYPE_KEY])
+
+    target = re.RolloutEngine(scenario, sector_element = i_element, trajectory_predictor = predictor)
+    result = target.run(duration = climb_time, dt = 1)
+
+    # The climber's level increases monotonically, reaching the overflier's level at the conflict point.
+    climber_levels = result[re.FLIGHT_LEVELS_KEY][:, 1]
+    assert np.all(np.diff(climber_levels) >= 0)
+    assert climber_levels[-1] == overflier[sg.CURRENT_FLIGHT_LEVEL_KEY]
+
+    lons, lats = result[C.LONGITUDES_KEY][-1], result[C.LATITUDES_KEY][-1]
+    assert utils.horizontal_distance_m(lons[0], lats[0], lons[1], lats[1]) < 0.1 * C.METRES_PER_NM
+
+    centre_lon, centre_lat = i_element.centre_point()
+    assert utils.horizontal_distance_m(lons[0], lats[0], centre_lon, centre_lat) < 0.1 * C.METRES_PER_NM
+
+
+def test_start_and_end_of_route(scenario, i_element, predictor):
+
+    # Delay the climber's start.
+    scenario[sg.AIRCRAFT_KEY][1][sg.START_TIME_KEY] = "00:01:00"
+
+    target = re.RolloutEngine(scenario, sector_element = i_element, trajectory_predictor = predictor)
+    assert target.callsigns == [ac[sg.CALLSIGN_KEY] for ac in scenario[sg.AIRCRAFT_KEY]]
+
+    target.step(30)
+    assert target.active().tolist() == [True, False]
+    lons, lats = target.positions()
+    assert np.isnan(lons[1]) and np.isnan(lats[1])
+    assert np.isnan(target.flight_levels()[1])
+
+    # Aircraft starting part way through a step travel only for the remainder of the step.
+    target.step(60)
+    assert target.active().tolist() == [True, True]
+    assert target.climb_clock[1] - target.initial_climb_clock[1] == pytest.approx(30)
+
+    # Aircraft are removed on reaching the final fix.
+    for _ in target.ticks(duration = 10 * 60 * 60, dt = 60):
+        pass
+    assert target.finished.all()
+    assert not target.active().any()
+    assert np.isnan(target.positions()[0]).all()
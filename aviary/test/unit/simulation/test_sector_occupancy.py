@@ -0,0 +1,94 @@
+import pytest
+
+import numpy as np
+
+import aviary.scenario.poisson_scenario as ps
+import aviary.scenario.scenario_generator as sg
+import aviary.simulation.sector_occupancy as so
+
+
+def cruise_scenario(sector_element, seed):
+    """Returns a Poisson scenario in which every aircraft cruises at its initial flight level"""
+
+    algorithm = ps.PoissonScenario(sector_element = sector_element, arrival_rate = 1 / 60,
+                                   aircraft_types = ["B743", "B744"], flight_levels = [200, 300, 450], seed = seed)
+    scenario = sg.ScenarioGenerator(algorithm).generate_scenario(duration = 600, seed = seed)
+    for aircraft in scenario[sg.AIRCRAFT_KEY]:
+        aircraft[sg.REQUESTED_FLIGHT_LEVEL_KEY] = aircraft[sg.CURRENT_FLIGHT_LEVEL_KEY]
+    return scenario
+
+
+def test_occupancy():
+
+    times, counts = so.occupancy([0, 5, 10, 10], [20, 7, np.inf, 20])
+
+    assert times.tolist() == [0, 5, 7, 10, 20]
+    assert counts.tolist() == [1, 2, 1, 3, 1]
+
+    assert so.occupancy_at(times, counts, [-1, 0, 6, 7, 15, 25]).tolist() == [0, 1, 2, 1, 3, 1]
+
+    times, counts = so.occupancy([], [])
+    assert len(times) == 0 and len(counts) == 0
+    assert so.occupancy_at(times, counts, [0, 1]).tolist() == [0, 0]
+
+
+def test_route_intervals_match_rollout(x_element, predictor):
+
+    scenario = cruise_scenario(x_element, seed = 3)
+    target = so.SectorOccupancy(x_element, predictor)
+
+    result = target.route_intervals(scenario)
+    expected = target.rollout_intervals(scenario, duration = 3000, dt = 5)
+
+    # Aircraft above the sector's upper limit never enter it.
+    assert 0 < len(result[so.AIRCRAFT_INDEX_KEY]) < len(scenario[sg.AIRCRAFT_KEY])
+    assert result[so.AIRCRAFT_INDEX_KEY].tolist() == expected[so.AIRCRAFT_INDEX_KEY].tolist()
+
+    # Rollout entry and exit times are those of the first time step inside and outside the sector.
+    for key in [so.ENTRY_TIME_KEY, so.EXIT_TIME_KEY]:
+        assert np.all(expected[key] >= result[key])
+        assert np.all(expected[key] - result[key] <= 5)
+
+
+def test_rollout_intervals_still_inside(x_element, predictor):
+
+    scenario = cruise_scenario(x_element, seed = 3)
+    target = so.SectorOccupancy(x_element, predictor)
+
+    result = target.rollout_intervals(scenario, duration = 300, dt = 5)
+    assert np.isinf(result[so.EXIT_TIME_KEY]).any()
+
+
+def test_occupancy_methods(x_element, predictor):
+
+    scenario = cruise_scenario(x_element, seed = 3)
+    target = so.SectorOccupancy(x_element, predictor)
+
+    times, counts = target.occupancy(scenario)
+    intervals = target.route_intervals(scenario)
+
+    # The sweep agrees with counting the intervals containing each sample time.
+    samples = np.arange(0, 2000, 7)
+    expected = [np.sum((intervals[so.ENTRY_TIME_KEY] <= t) & (t < intervals[so.EXIT_TIME_KEY])) for t in samples]
+    assert so.occupancy_at(times, counts, samples).tolist() == expected
+    assert counts[-1] == 0
+
+    with pytest.raises(ValueError):
+        target.occupancy(scenario, method = so.ROLLOUT_METHOD)
+    with pytest.raises(ValueError):
+        target.occupancy(scenario, method = "sampling")
+
+
+def test_batch_occupancy(x_element, predictor):
+
+    scenarios = [cruise_scenario(x_element, seed = seed) for seed in [3, 4, 5]]
+    target = so.SectorOccupancy(x_element, predictor)
+
+    samples = np.arange(0, 2000, 10)
+    result = target.batch_occupancy(iter(scenarios), samples)
+
+    assert result.shape == (3, len(samples))
+    for s, scenario in enumerate(scenarios):
+        assert result[s].tolist() == so.occupancy_at(*target.occupancy(scenario), samples).tolist()
+
+    assert target.batch_occupancy([], samples).shape == (0, len(samples))
@@ -0,0 +1,70 @@
+import pytest
+
+import os
+import numpy as np
+import pandas
+from pathlib import Path
+
+import aviary.trajectory.lookup_table_cache as ltc
+from aviary.trajectory.lookup_trajectory_predictor import LookupTrajectoryPredictor
+
+
+@pytest.fixture(scope="function")
+def csv_files(cruise_speed_dataframe, climb_time_dataframe, downtrack_distance_dataframe, tmp_path):
+    """Test fixture: the lookup table test fixtures written to CSV files, as load() arguments"""
+
+    args = {}
+    for name, df in zip(ltc.TABLE_NAMES, [cruise_speed_dataframe, climb_time_dataframe, downtrack_distance_dataframe]):
+        file = Path(tmp_path, name + ".csv")
+        df.to_csv(file)
+        args[name] = str(file)
+        args[name + "_index"] = df.index.name
+    return args
+
+
+@pytest.mark.parametrize("validate", [ltc.VALIDATE_MTIME, ltc.VALIDATE_HASH])
+def test_load(csv_files, cruise_speed_dataframe, climb_time_dataframe, downtrack_distance_dataframe,
+              tmp_path, validate):
+
+    target = ltc.LookupTableCache(path = str(Path(tmp_path, "cache")), validate = validate)
+    result = target.load(**csv_files)
+
+    for df, expected in zip(result, [cruise_speed_dataframe, climb_time_dataframe, downtrack_distance_dataframe]):
+        assert list(df.columns) == list(expected.columns)
+        assert list(df.index) == list(expected.index)
+        assert df.index.name == expected.index.name
+        assert np.array_equal(df.values, np.asarray(expected, dtype = float))
+
+
+def test_load_uses_compiled_artefact(csv_files, tmp_path, monkeypatch):
+
+    target = ltc.LookupTableCache(path = str(Path(tmp_path, "cache")))
+    target.load(**csv_files)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("CSV parsed despite valid compiled artefact")
+
+    with monkeypatch.context() as m:
+        m.setattr(pandas, "read_csv", fail)
+        predictor = target.load_trajectory_predictor(**csv_files)
+
+    assert isinstance(predictor, LookupTrajectoryPredictor)
+    assert predictor.cruise_speed(flight_level = 200, aircraft_type = 'B744') == 210.7354179
+    assert predictor.climb_time_to_level(flight_level = 200, aircraft_type = 'B743') == 500
+    assert predictor.downtrack_distance_to_level(flight_level = 400, aircraft_type = 'B744') == 350000.8483
+
+
+def test_load_recompiles_modified_source(csv_files, tmp_path):
+
+    target = ltc.LookupTableCache(path = str(Path(tmp_path, "cache")))
+    target.load(**csv_files)
+
+    # Modify the climb time table.
+    df = pandas.read_csv(csv_files["climb_time"], index_col = csv_files["climb_time_index"])
+    df.loc[200, "B743"] = 555
+    df.to_csv(csv_files["climb_time"])
+    stat = os.stat(csv_files["climb_time"])
+    os.utime(csv_files["climb_time"], ns = (stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    _, climb_time_lookup, _ = target.load(**csv_files)
+    assert climb_time_lookup.at[200, "B743"] == 555
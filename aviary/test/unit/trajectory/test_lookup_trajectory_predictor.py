@@ -38,6 +38,11 @@ def test_downtrack_distance_to_level(target):
     assert target.downtrack_distance_to_level(flight_level = 400, aircraft_type = 'B744') == 350000.8483
 
 
+def test_flight_levels(target):
+
+    assert target.flight_levels() == [0, 10, 100, 200, 300, 360, 400]
+
+
 def test_load_trajectory_lookups(cruise_speed_dataframe, climb_time_dataframe, downtrack_distance_dataframe):
 
     assert tp.global_trajectory_predictor is None
@@ -0,0 +1,54 @@
+import pytest
+
+import multiprocessing
+import sys
+import numpy as np
+
+import aviary.trajectory.trajectory_predictor as tp
+from aviary.trajectory.shared_lookup_tables import SharedLookupTables
+
+# Shared memory requires Python 3.8 or later.
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 8), reason = "Requires multiprocessing.shared_memory")
+
+
+def lookups(flight_level, predictor = None):
+    """Worker function: queries a trajectory predictor (by default, the global trajectory predictor)"""
+
+    if predictor is None:
+        predictor = tp.global_trajectory_predictor
+    return (predictor.cruise_speed(flight_level, 'B744'),
+            predictor.climb_time_to_level(flight_level, 'B743'),
+            predictor.downtrack_distance_to_level(flight_level, 'B744'))
+
+
+def test_attach(predictor):
+
+    with SharedLookupTables(predictor) as shared:
+        result = SharedLookupTables.attach(shared.descriptor)
+
+        assert result.cruise_speed(flight_level = 200, aircraft_type = 'B744') == 210.7354179
+        assert result.climb_time_to_level(flight_level = 360, aircraft_type = 'B744') == 900
+        assert result.downtrack_distance_to_level(flight_level = 400, aircraft_type = 'B744') == 350000.8483
+        assert result.content_hash() == predictor.content_hash()
+
+        # The shared tables are read-only.
+        with pytest.raises(ValueError):
+            result.cruise_speed_lookup.values[0, 0] = 0
+
+        del result
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason = "Requires the fork start method")
+def test_attach_global(predictor):
+
+    flight_levels = [0, 200, 360, 400]
+    expected = [lookups(fl, predictor) for fl in flight_levels]
+
+    with SharedLookupTables(predictor) as shared:
+        ctx = multiprocessing.get_context("fork")
+        with ctx.Pool(processes = 2, initializer = SharedLookupTables.attach_global,
+                      initargs = (shared.descriptor, )) as pool:
+            result = pool.map(lookups, flight_levels)
+
+    assert np.allclose(result, expected)
+
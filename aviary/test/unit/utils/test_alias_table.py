@@ -0,0 +1,62 @@
+import pytest
+
+import random
+from io import StringIO
+
+import numpy as np
+
+from aviary.utils.alias_table import AliasTable
+
+
+def test_draw():
+
+    weights = {"B744": 1, "A320": 6, "B77W": 3, "A346": 0}
+    target = AliasTable(weights)
+
+    assert len(target) == 4
+    assert target.probabilities.tolist() == [0.1, 0.6, 0.3, 0]
+
+    random.seed(3)
+    draws = [target.draw() for _ in range(20000)]
+    assert "A346" not in draws
+    for value, weight in weights.items():
+        assert draws.count(value) / len(draws) == pytest.approx(weight / 10, abs = 0.01)
+
+    # Draws are reproducible via the global random seed.
+    random.seed(3)
+    assert [target.draw() for _ in range(100)] == draws[:100]
+
+
+def test_sample():
+
+    target = AliasTable({200: 2, 300: 1, 400: 1})
+
+    random.seed(5)
+    result = target.sample(20000)
+    assert np.bincount(result // 100 - 2) / len(result) == pytest.approx([0.5, 0.25, 0.25], abs = 0.01)
+
+    random.seed(5)
+    assert target.sample(100).tolist() == result[:100].tolist()
+    assert target.sample_indices(10, rng = np.random.default_rng(1)).tolist() == \
+        target.sample_indices(10, rng = np.random.default_rng(1)).tolist()
+
+
+def test_read_weights():
+
+    result = AliasTable.read_weights(StringIO("flight_level,weight\n200,1\n240,3\n"))
+    assert result == {200: 1, 240: 3}
+
+    result = AliasTable.read_weights(StringIO("entry, exit, share\nA, E, 2\nE, A, 1\n"), weight_column = "share")
+    assert result == {("A", "E"): 2, ("E", "A"): 1}
+
+    with pytest.raises(ValueError):
+        AliasTable.read_weights(StringIO("level,share\n200,1\n"))
+    with pytest.raises(ValueError):
+        AliasTable.read_weights(StringIO("weight\n1\n"))
+
+
+@pytest.mark.parametrize("weights", [{}, {"a": 0, "b": 0}, {"a": 1, "b": -1}, {"a": 1, "b": np.nan}])
+def test_invalid_weights(weights):
+
+    with pytest.raises(ValueError):
+        AliasTable(weights)
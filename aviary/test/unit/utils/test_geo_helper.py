@@ -2,6 +2,8 @@
 import pytest
 from io import StringIO
 import geojson
+import numpy as np
+from shapely.geometry import Polygon
 
 import aviary.constants as C
 from aviary.utils.geo_helper import GeoHelper
@@ -48,3 +50,11 @@ def test_format_coordinates(i_sector_geojson):
     expected = [tuple(round(num, float_precision) for num in longlat) for longlat in result]
     assert result == expected
 
+
+
+def test_contains_xy():
+
+    square = Polygon([(0, 0), (0, 1), (1, 1), (1, 0)])
+
+    result = GeoHelper.contains_xy(square, [0.5, 1.5, 0.5, np.nan], [0.5, 0.5, -0.1, 0.5])
+    assert result.tolist() == [True, False, False, False]
@@ -0,0 +1,45 @@
+import pytest
+
+import numpy as np
+
+from aviary.utils.interval_index import IntervalIndex
+
+
+def test_query():
+
+    target = IntervalIndex([0, 100, 200, 150, 300], [200, 300, 400, 150, 300])
+
+    assert len(target) == 5
+    assert target.query(-1).tolist() == []
+    assert target.query(0).tolist() == [0]
+    assert target.query(120).tolist() == [0, 1]
+    assert target.query(150).tolist() == [0, 1, 3]
+    assert target.query(200).tolist() == [0, 1, 2]
+    assert target.query(250).tolist() == [1, 2]
+    assert target.query(300).tolist() == [1, 2, 4]
+    assert target.query(400).tolist() == [2]
+    assert target.query(401).tolist() == []
+    assert target.query(np.nan).tolist() == []
+
+    with pytest.raises(ValueError):
+        IntervalIndex([0, 10], [5, 5])
+    with pytest.raises(ValueError):
+        IntervalIndex([0], [np.inf])
+
+
+def test_query_many():
+
+    rng = np.random.default_rng(7)
+    lower = rng.integers(0, 40, 50) * 10
+    upper = lower + rng.integers(0, 10, 50) * 10
+    values = np.append(rng.integers(-5, 50, 300) * 10 + rng.choice([0, 5], 300), np.nan)
+
+    target = IntervalIndex(lower, upper)
+    value_index, interval_index = target.query_many(values)
+
+    expected = [(v, k) for v in range(len(values)) for k in range(len(lower)) if lower[k] <= values[v] <= upper[k]]
+    assert list(zip(value_index.tolist(), interval_index.tolist())) == expected
+    assert target.contains(interval_index, values[value_index]).all()
+
+    value_index, interval_index = IntervalIndex([], []).query_many(values)
+    assert len(value_index) == 0 and len(interval_index) == 0
@@ -0,0 +1,39 @@
+import pytest
+
+import numpy as np
+
+from aviary.utils.kd_tree import KDTree
+
+
+def test_query_radius():
+
+    rng = np.random.default_rng(1)
+    points = rng.random((1000, 3))
+    target = KDTree(points, leaf_size = 8)
+
+    assert len(target) == 1000
+    for point, radius in zip(rng.random((20, 3)), rng.random(20) * 0.3):
+        expected = np.flatnonzero(np.linalg.norm(points - point, axis = 1) <= radius)
+        assert target.query_radius(point, radius).tolist() == expected.tolist()
+
+    assert target.query_radius([10, 10, 10], 1).tolist() == []
+
+    with pytest.raises(ValueError):
+        KDTree(np.zeros((0, 3)))
+    with pytest.raises(ValueError):
+        KDTree([[0, np.nan]])
+
+
+def test_nearest():
+
+    rng = np.random.default_rng(2)
+    points = rng.random((500, 2))
+    target = KDTree(points)
+
+    for point in rng.random((20, 2)):
+        distances = np.linalg.norm(points - point, axis = 1)
+        assert target.nearest(point) == (np.argmin(distances), pytest.approx(distances.min()))
+
+    # Ties are broken by the lowest index.
+    target = KDTree([[1, 0], [0, 0], [0, 0]])
+    assert target.nearest([0, 0]) == (1, 0)
@@ -0,0 +1,254 @@
+"""
+Binary cache for trajectory lookup tables.
+
+On first use, the cruise speed, climb time and downtrack distance CSV files
+are parsed and compiled into a single .npy artefact (holding all three value
+tables) with a JSON manifest recording the table shapes, index and column
+labels and the signatures of the source files. Later loads memory-map the
+artefact and so skip CSV parsing entirely. An artefact is rebuilt whenever
+any of its source files has changed.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas
+
+import aviary.constants as C
+from aviary.trajectory.lookup_trajectory_predictor import LookupTrajectoryPredictor
+from aviary.utils.filename_helper import FilenameHelper
+from aviary.utils.hash_helper import HashHelper
+
+# CONSTANTS
+ARTEFACT_EXTENSION = "npy"
+MANIFEST_EXTENSION = "json"
+MANIFEST_VERSION = 1
+TABLE_NAMES = ["cruise_speed", "climb_time", "downtrack_distance"]
+
+# Validation modes
+VALIDATE_MTIME = "mtime"
+VALIDATE_HASH = "hash"
+
+# Manifest keys
+VERSION_KEY = "version"
+SOURCES_KEY = "sources"
+TABLES_KEY = "tables"
+PATH_KEY = "path"
+INDEX_COL_KEY = "index_col"
+MTIME_KEY = "mtime_ns"
+SIZE_KEY = "size"
+DIGEST_KEY = "digest"
+OFFSET_KEY = "offset"
+SHAPE_KEY = "shape"
+INDEX_KEY = "index"
+INDEX_NAME_KEY = "index_name"
+COLUMNS_KEY = "columns"
+
+class LookupTableCache():
+    """A cache of compiled trajectory lookup tables.
+
+    Args:
+        path (str): Cache directory (created if it does not exist).
+        validate (str): How to detect changes to the source CSV files: "mtime" (modification time & size) or "hash" (file content).
+
+    Attributes:
+        path (str): Cache directory.
+        validate (str): How to detect changes to the source CSV files.
+    """
+
+    def __init__(self, path = None, validate = VALIDATE_MTIME):
+
+        if path is None:
+            path = os.path.join(C.DEFAULT_CACHE_DIR, "lookup_tables")
+
+        if validate not in [VALIDATE_MTIME, VALIDATE_HASH]:
+            raise ValueError(f'Invalid validate argument: {validate}')
+
+        os.makedirs(path, exist_ok = True)
+        self.path = path
+        self.validate = validate
+
+
+    def load(self, cruise_speed, cruise_speed_index, climb_time, climb_time_index,
+             downtrack_distance, downtrack_distance_index):
+        """
+        Loads the cruise speed, climb time and downtrack distance lookup tables, compiling them on first use.
+
+        :param cruise_speed: Path to the cruise speed lookup table CSV file
+        :param cruise_speed_index: The name of the index column in the cruise speed CSV file
+        :param climb_time: Path to the climb time lookup table CSV file
+        :param climb_time_index: The name of the index column in the climb time CSV file
+        :param downtrack_distance: Path to the downtrack distance lookup table CSV file
+        :param downtrack_distance_index: The name of the index column in the downtrack distance CSV file
+        :return: A list of three pandas data frames, backed by a read-only memory map of the cached artefact.
+        """
+
+        sources = [(os.path.abspath(cruise_speed), cruise_speed_index),
+                   (os.path.abspath(climb_time), climb_time_index),
+                   (os.path.abspath(downtrack_distance), downtrack_distance_index)]
+
+        key = HashHelper.content_hash(sources)
+        manifest = self.read_manifest(key)
+        if manifest is None or not self.is_valid(manifest, sources):
+            manifest = self.compile(key, sources)
+
+        values = np.load(self.artefact_filename(key), mmap_mode = 'r')
+        return [LookupTableCache.table(values, spec) for spec in manifest[TABLES_KEY]]
+
+
+    def load_trajectory_predictor(self, *args, **kwargs):
+        """Loads the lookup tables (see load) and returns a LookupTrajectoryPredictor instance"""
+
+        cruise_speed_lookup, climb_time_lookup, downtrack_distance_lookup = self.load(*args, **kwargs)
+        return LookupTrajectoryPredictor(cruise_speed_lookup = cruise_speed_lookup,
+                                         climb_time_lookup = climb_time_lookup,
+                                         downtrack_distance_lookup = downtrack_distance_lookup)
+
+
+    def artefact_filename(self, key):
+        """Returns the full path of the compiled artefact for a given key"""
+
+        return FilenameHelper.construct_filename(filename = key, desired_extension = ARTEFACT_EXTENSION, path = self.path)
+
+
+    def manifest_filename(self, key):
+        """Returns the full path of the artefact manifest for a given key"""
+
+        return FilenameHelper.construct_filename(filename = key, desired_extension = MANIFEST_EXTENSION, path = self.path)
+
+
+    def read_manifest(self, key):
+        """Returns the manifest for the given key, or None if there is no (readable) compiled artefact"""
+
+        try:
+            with open(self.manifest_filename(key), 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if manifest.get(VERSION_KEY) != MANIFEST_VERSION or not os.path.exists(self.artefact_filename(key)):
+            return None
+        return manifest
+
+
+    def signature(self, file):
+        """Returns a dictionary identifying the current content of a source file"""
+
+        stat = os.stat(file)
+        ret = {MTIME_KEY: stat.st_mtime_ns, SIZE_KEY: stat.st_size}
+        if self.validate == VALIDATE_HASH:
+            with open(file, 'rb') as f:
+                ret[DIGEST_KEY] = hashlib.blake2b(f.read()).hexdigest()
+        return ret
+
+
+    def is_valid(self, manifest, sources):
+        """Checks whether a manifest's recorded source signatures match the current source files"""
+
+        recorded = manifest[SOURCES_KEY]
+        if len(recorded) != len(sources):
+            return False
+
+        for source, (file, index_col) in zip(recorded, sources):
+            if source[PATH_KEY] != file or source[INDEX_COL_KEY] != index_col:
+                return False
+            try:
+                current = self.signature(file)
+            except FileNotFoundError:
+                return False
+
+            if self.validate == VALIDATE_HASH:
+                if source.get(DIGEST_KEY) != current[DIGEST_KEY]:
+                    return False
+            elif source[MTIME_KEY] != current[MTIME_KEY] or source[SIZE_KEY] != current[SIZE_KEY]:
+                return False
+
+        return True
+
+
+    def compile(self, key, sources):
+        """Parses the source CSV files and writes the compiled artefact and its manifest. Returns the manifest."""
+
+        # Record the signatures before parsing, so a file modified meanwhile is recompiled on the next load.
+        signatures = [self.signature(file) for file, _ in sources]
+
+        dataframes = [pandas.read_csv(file, index_col = index_col) for file, index_col in sources]
+        values, specs = LookupTableCache.flatten(dataframes, names = [file for file, _ in sources])
+
+        manifest = {
+            VERSION_KEY: MANIFEST_VERSION,
+            SOURCES_KEY: [dict(signature, **{PATH_KEY: file, INDEX_COL_KEY: index_col})
+                          for signature, (file, index_col) in zip(signatures, sources)],
+            TABLES_KEY: specs
+        }
+
+        # Write the artefact before the manifest, so that a manifest always refers to a complete artefact.
+        LookupTableCache.write_atomic(self.artefact_filename(key),
+                                      lambda f: np.save(f, values))
+        LookupTableCache.write_atomic(self.manifest_filename(key),
+                                      lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+        return manifest
+
+
+    @staticmethod
+    def write_atomic(file, write):
+        """Writes a file via a temporary file in the same directory, which is then renamed"""
+
+        fd, tmp = tempfile.mkstemp(dir = os.path.dirname(file), suffix = ".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp, file)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+    @staticmethod
+    def flatten(dataframes, names = None):
+        """
+        Packs the values of a list of numeric data frames into a single flat float64 array.
+
+        :param dataframes: A list of pandas data frames
+        :param names: (optional) A list of names used in error messages
+        :return: A (values, specs) pair, where specs is a list of dictionaries from which the data frames may be reconstructed (see table).
+        """
+
+        if names is None:
+            names = TABLE_NAMES
+
+        tables = []
+        specs = []
+        offset = 0
+        for name, df in zip(names, dataframes):
+            try:
+                values = np.asarray(df, dtype = np.float64)
+            except ValueError:
+                raise ValueError(f'Non-numeric values found in lookup table {name}.')
+
+            tables.append(values.ravel())
+            specs.append({
+                OFFSET_KEY: offset,
+                SHAPE_KEY: list(values.shape),
+                INDEX_KEY: df.index.tolist(),
+                INDEX_NAME_KEY: df.index.name,
+                COLUMNS_KEY: [str(col) for col in df.columns]
+            })
+            offset += values.size
+
+        return np.concatenate(tables), specs
+
+
+    @staticmethod
+    def table(values, spec):
+        """Constructs a data frame from a slice of the (memory-mapped) artefact values without copying"""
+
+        rows, cols = spec[SHAPE_KEY]
+        offset = spec[OFFSET_KEY]
+        data = values[offset:offset + rows * cols].reshape(rows, cols)
+        index = pandas.Index(spec[INDEX_KEY], name = spec[INDEX_NAME_KEY])
+        return pandas.DataFrame(data, index = index, columns = spec[COLUMNS_KEY], copy = False)
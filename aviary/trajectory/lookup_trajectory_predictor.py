@@ -5,7 +5,10 @@ Provides simple trajectory prediction estimates via lookup tables.
 # email: thobson@turing.ac.uk
 
 
+import numpy as np
+
 import aviary.trajectory.trajectory_predictor as tp
+from aviary.utils.hash_helper import HashHelper
 
 class LookupTrajectoryPredictor(tp.TrajectoryPredictor):
     """A class providing simple trajectory prediction via lookup tables for cruise speed, climb time & downtrack distance.
@@ -52,6 +55,28 @@ class LookupTrajectoryPredictor(tp.TrajectoryPredictor):
         return self.downtrack_distance_lookup.at[flight_level, aircraft_type]
 
 
+    def flight_levels(self):
+        """Returns a sorted list of the flight levels appearing in any of the lookup tables"""
+
+        levels = set()
+        for df in [self.cruise_speed_lookup, self.climb_time_lookup, self.downtrack_distance_lookup]:
+            levels.update(df.index.tolist())
+        return sorted(levels)
+
+
+    def content_hash(self):
+        """
+        Returns a stable hash of the lookup table contents, independent of how the tables are stored
+        (e.g. parsed from CSV, memory-mapped or in shared memory).
+        """
+
+        def table(df):
+            return (df.index.tolist(), [str(col) for col in df.columns], np.asarray(df, dtype = float))
+
+        return HashHelper.content_hash(type(self).__qualname__, table(self.cruise_speed_lookup),
+                                       table(self.climb_time_lookup), table(self.downtrack_distance_lookup))
+
+
     @staticmethod
     def load_trajectory_lookups(cruise_speed_lookup, climb_time_lookup, downtrack_distance_lookup):
         """
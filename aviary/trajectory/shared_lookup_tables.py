@@ -0,0 +1,105 @@
+"""
+Sharing of trajectory lookup tables between processes.
+
+A LookupTrajectoryPredictor's tables are published once into a single
+multiprocessing.shared_memory block. Worker processes attach read-only views
+onto that block, so parallel scenario generators and evaluators share one
+copy of the tables instead of each holding its own data frames.
+
+Example (with a process pool):
+
+    with SharedLookupTables(trajectory_predictor) as shared:
+        with Pool(initializer = SharedLookupTables.attach_global, initargs = (shared.descriptor, )) as pool:
+            ...
+"""
+
+import numpy as np
+
+import aviary.trajectory.trajectory_predictor as tp
+import aviary.trajectory.lookup_table_cache as ltc
+from aviary.trajectory.lookup_trajectory_predictor import LookupTrajectoryPredictor
+from aviary.utils.shared_memory_helper import SharedMemoryHelper
+
+# Descriptor keys
+NAME_KEY = "name"
+SIZE_KEY = "size"
+
+class SharedLookupTables():
+    """Lookup trajectory predictor tables published in shared memory.
+
+    Args:
+        trajectory_predictor (LookupTrajectoryPredictor): The predictor whose tables are to be shared.
+
+    Attributes:
+        descriptor (dict): A small, picklable description of the shared tables, from which
+            worker processes may attach to them (see attach and attach_global).
+    """
+
+    def __init__(self, trajectory_predictor):
+
+        dataframes = [trajectory_predictor.cruise_speed_lookup,
+                      trajectory_predictor.climb_time_lookup,
+                      trajectory_predictor.downtrack_distance_lookup]
+
+        values, specs = ltc.LookupTableCache.flatten(dataframes)
+
+        self.shm = SharedMemoryHelper.publish(values)
+        self.descriptor = {
+            NAME_KEY: self.shm.name,
+            SIZE_KEY: int(values.size),
+            ltc.TABLES_KEY: specs
+        }
+
+
+    def close(self):
+        """Closes and unlinks the shared memory block. Attached processes retain access until they close it."""
+
+        if self.shm is None:
+            return
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        Attaches to shared lookup tables.
+
+        :param descriptor: The descriptor attribute of a SharedLookupTables instance.
+        :return: A LookupTrajectoryPredictor whose tables are read-only views onto the shared memory block.
+        """
+
+        shm = SharedMemoryHelper.attach(descriptor[NAME_KEY])
+        values = SharedMemoryHelper.array(shm, dtype = np.float64, shape = (descriptor[SIZE_KEY], ))
+
+        cruise_speed_lookup, climb_time_lookup, downtrack_distance_lookup = \
+            [ltc.LookupTableCache.table(values, spec) for spec in descriptor[ltc.TABLES_KEY]]
+
+        ret = LookupTrajectoryPredictor(cruise_speed_lookup = cruise_speed_lookup,
+                                        climb_time_lookup = climb_time_lookup,
+                                        downtrack_distance_lookup = downtrack_distance_lookup)
+
+        # Keep a reference to the shared memory block for as long as the predictor is in use.
+        ret.shared_memory = shm
+        return ret
+
+
+    @staticmethod
+    def attach_global(descriptor):
+        """
+        Attaches to shared lookup tables and assigns the resulting predictor to the global_trajectory_predictor
+        variable. Suitable for use as a process pool initializer.
+
+        :param descriptor: The descriptor attribute of a SharedLookupTables instance.
+        """
+
+        tp.global_trajectory_predictor = SharedLookupTables.attach(descriptor)
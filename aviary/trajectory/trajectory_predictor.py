@@ -36,6 +36,15 @@ class TrajectoryPredictor(ABC):
         pass
 
 
+    def flight_levels(self):
+        """
+        Returns a sorted list of the flight levels at which predictions are available,
+        or None if predictions are available at any flight level.
+        """
+
+        return None
+
+
     def climb_time_between_levels(self, lower_level, upper_level, aircraft_type):
         """Computes the time taken to climb between two levels"""
 
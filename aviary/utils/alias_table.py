@@ -0,0 +1,143 @@
+"""
+Walker alias tables, for sampling from a weighted discrete distribution in
+constant time per draw.
+
+The table is built once, in time linear in the number of values (Vose's
+method). Each draw then takes a single uniform random number: its integer
+part selects a column of the table, and its fractional part decides between
+the column's own value and its alias.
+
+Single draws use the global random state (like random.choice), so they are
+reproducible given the scenario seed. Batched draws use a numpy Generator,
+which by default is itself seeded from the global random state.
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+
+# Default CSV column holding the weights
+WEIGHT_COLUMN = "weight"
+
+class AliasTable():
+    """
+    A weighted discrete distribution over a list of values.
+
+    Args:
+        weights (dict): Non-negative weights (not necessarily normalised), keyed by value.
+
+    Attributes:
+        values (list): The values, in the order of the weights dictionary.
+        probabilities (np.ndarray): The normalised weights.
+    """
+
+    def __init__(self, weights):
+
+        if len(weights) == 0:
+            raise ValueError('An alias table requires at least one value.')
+
+        w = np.array(list(weights.values()), dtype = float)
+        if np.any(~np.isfinite(w)) or np.any(w < 0) or w.sum() <= 0:
+            raise ValueError(f'Weights must be finite, non-negative and not all zero: {weights}')
+
+        self.values = list(weights.keys())
+        self.probabilities = w / w.sum()
+        self._acceptance, self._alias = AliasTable.__build__(self.probabilities)
+
+
+    def __len__(self):
+
+        return len(self.values)
+
+
+    @staticmethod
+    def __build__(probabilities):
+        """Returns the acceptance probability and alias of each column of the table, by Vose's method"""
+
+        n = len(probabilities)
+        scaled = probabilities * n
+        acceptance = np.ones(n)
+        alias = np.arange(n)
+
+        small = [k for k in range(n) if scaled[k] < 1]
+        large = [k for k in range(n) if scaled[k] >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            acceptance[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1
+            (small if scaled[l] < 1 else large).append(l)
+
+        # Any remaining columns are full, up to rounding error.
+        return acceptance, alias
+
+
+    def draw_index(self):
+        """Returns the index of a random value"""
+
+        u = random.random() * len(self.values)
+        k = int(u)
+        return k if u - k < self._acceptance[k] else int(self._alias[k])
+
+
+    def draw(self):
+        """Returns a random value"""
+
+        return self.values[self.draw_index()]
+
+
+    def sample_indices(self, size, rng = None):
+        """
+        Vectorised form of draw_index: returns the indices of a batch of random values.
+
+        :param size: The number of draws.
+        :param rng: (optional) A numpy Generator. By default, one is seeded from the global random state.
+        :return: An integer numpy array.
+        """
+
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+
+        u = rng.random(size) * len(self.values)
+        k = u.astype(int)
+        return np.where(u - k < self._acceptance[k], k, self._alias[k])
+
+
+    def sample(self, size, rng = None):
+        """
+        Vectorised form of draw: returns a batch of random values.
+
+        :param size: The number of draws.
+        :param rng: (optional) A numpy Generator. By default, one is seeded from the global random state.
+        :return: A numpy array.
+        """
+
+        return np.asarray(self.values)[self.sample_indices(size, rng = rng)]
+
+
+    @staticmethod
+    def read_weights(filename, weight_column = WEIGHT_COLUMN):
+        """
+        Reads a dictionary of weights from a CSV file with a header row.
+
+        The weights are in the weight column and the values in the other columns. Values spanning several
+        columns (e.g. the entry and exit fixes of a route) are keyed by tuples.
+
+        :param filename: The CSV file name (or a file-like object).
+        :param weight_column: The name of the weight column.
+        :return: A dictionary of weights, keyed by value.
+        """
+
+        df = pd.read_csv(filename, skipinitialspace = True)
+        if weight_column not in df.columns:
+            raise ValueError(f'No column named {weight_column} in weights file {filename}')
+
+        value_columns = [column for column in df.columns if column != weight_column]
+        if len(value_columns) == 0:
+            raise ValueError(f'No value columns in weights file {filename}')
+
+        # Note: tolist converts numpy scalars to Python types (e.g. int flight levels).
+        values = df[value_columns].values.tolist()
+        keys = [tuple(v) if len(v) > 1 else v[0] for v in values]
+        return dict(zip(keys, df[weight_column].astype(float).tolist()))
@@ -4,8 +4,13 @@ Helper class for computing geometric and geographic quantities.
 # author: Tim Hobson
 # email: thobson@turing.ac.uk
 
+import numpy as np
+
 from shapely.ops import transform
-from functools import partial
+from shapely.geometry import Point
+from functools import lru_cache, partial
+
+from pyproj import Proj
 
 from geographiclib.geodesic import Geodesic
 
@@ -15,6 +20,13 @@ import aviary.constants as C
 class GeoHelper():
     """Helper class containing geometric and geographic functions"""
 
+    @staticmethod
+    def __project__(projection, geom):
+        """Helper for doing a geometric projection"""
+
+        return transform(projection, geom)
+
+
     @staticmethod
     def __inv_project__(projection, geom):
         """Helper for doing an inverse geometric projection"""
@@ -22,6 +34,19 @@ class GeoHelper():
         return transform(partial(projection, inverse=True), geom)
 
 
+    @staticmethod
+    @lru_cache(maxsize = None)
+    def projection(proj_string):
+        """
+        Returns the projection defined by a proj-string, constructed once per process.
+
+        :param proj_string: A proj-string (see https://proj.org/usage/quickstart.html)
+        :return: a pyproj Proj instance (shared by all callers, so it must not be modified)
+        """
+
+        return Proj(proj_string)
+
+
     @staticmethod
     def format_coordinates(geojson, key, float_precision, as_geojson = True):
         """
@@ -88,3 +113,33 @@ class GeoHelper():
 
         g = geod.Inverse(lat1, lon1, lat2, lon2)
         return g['s12']
+
+
+    @staticmethod
+    def contains_xy(geom, x, y):
+        """
+        Tests whether each of an array of points (x, y) lies inside a geometry, in a single vectorised call.
+
+        :param geom: A shapely geometry (e.g. a Polygon)
+        :param x: Array of x coordinates
+        :param y: Array of y coordinates
+        :return: A boolean numpy array, which is False for non-finite coordinates.
+        """
+
+        x = np.asarray(x, dtype = float)
+        y = np.asarray(y, dtype = float)
+        finite = np.isfinite(x) & np.isfinite(y)
+
+        try:
+            # Shapely 2.x
+            from shapely import contains_xy
+        except ImportError:
+            try:
+                # Shapely 1.x
+                from shapely.vectorized import contains as contains_xy
+            except ImportError:
+                contains_xy = np.vectorize(lambda g, px, py: g.contains(Point(px, py)), excluded = [0], otypes = [bool])
+
+        ret = np.zeros(x.shape, dtype = bool)
+        ret[finite] = contains_xy(geom, x[finite], y[finite])
+        return ret
@@ -0,0 +1,129 @@
+"""
+Helper class for computing stable content hashes.
+
+Unlike the built-in hash(), which is salted per process for strings, these
+hashes depend only on the content of the hashed objects and so may be used
+as keys for caches shared between processes and across runs.
+"""
+
+import hashlib
+import struct
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+DIGEST_SIZE = 16 # Bytes.
+
+class HashHelper():
+    """Helper class containing content hashing functions"""
+
+    @staticmethod
+    def content_hash(*objs, digest_size = DIGEST_SIZE) -> str:
+        """
+        Returns a hexadecimal blake2b digest of the canonical encoding of the given objects.
+
+        Supported objects are None, booleans, numbers, strings, bytes, lists, tuples, sets, dictionaries,
+        datetimes, numpy arrays, pandas data frames, shapely geometries and pyproj projections. Objects
+        with a content_hash() method contribute that hash; any other object contributes its class name
+        and instance attributes.
+        """
+
+        h = hashlib.blake2b(digest_size = digest_size)
+        for obj in objs:
+            HashHelper.__update__(h, obj)
+        return h.hexdigest()
+
+
+    @staticmethod
+    def canonical_bytes(obj) -> bytes:
+        """Returns the canonical byte encoding of an object"""
+
+        chunks = []
+        HashHelper.__update__(_Collector(chunks), obj)
+        return b"".join(chunks)
+
+
+    @staticmethod
+    def __update__(h, obj):
+        """Feeds a tagged, canonical encoding of obj to the hash object h"""
+
+        def tagged(tag, payload):
+            h.update(tag)
+            h.update(struct.pack("<Q", len(payload)))
+            h.update(payload)
+
+        if obj is None:
+            h.update(b"N")
+        elif isinstance(obj, (bool, np.bool_)):
+            h.update(b"T" if obj else b"F")
+        elif isinstance(obj, (int, np.integer)):
+            tagged(b"i", str(int(obj)).encode())
+        elif isinstance(obj, (float, np.floating)):
+            tagged(b"f", repr(float(obj)).encode())
+        elif isinstance(obj, str):
+            tagged(b"s", obj.encode("utf-8"))
+        elif isinstance(obj, (bytes, bytearray)):
+            tagged(b"b", bytes(obj))
+        elif isinstance(obj, (datetime, timedelta)):
+            tagged(b"d", str(obj).encode())
+        elif isinstance(obj, (list, tuple)):
+            h.update(b"[")
+            for item in obj:
+                HashHelper.__update__(h, item)
+            h.update(b"]")
+        elif isinstance(obj, (set, frozenset)):
+            HashHelper.__update_sorted__(h, b"{", [(item, ) for item in obj])
+        elif isinstance(obj, dict):
+            HashHelper.__update_sorted__(h, b"<", list(obj.items()))
+        elif isinstance(obj, np.ndarray):
+            if obj.dtype == object:
+                h.update(b"O")
+                HashHelper.__update__(h, list(obj.shape))
+                HashHelper.__update__(h, obj.ravel().tolist())
+            else:
+                h.update(b"A")
+                HashHelper.__update__(h, obj.dtype.str)
+                HashHelper.__update__(h, list(obj.shape))
+                tagged(b"b", np.ascontiguousarray(obj).tobytes())
+        elif hasattr(obj, "content_hash") and callable(obj.content_hash):
+            tagged(b"h", obj.content_hash().encode())
+        elif hasattr(obj, "columns") and hasattr(obj, "index") and hasattr(obj, "values"):
+            # A pandas data frame.
+            h.update(b"D")
+            HashHelper.__update__(h, np.asarray(obj.index))
+            HashHelper.__update__(h, np.asarray(obj.columns))
+            HashHelper.__update__(h, np.asarray(obj))
+        elif hasattr(obj, "wkb") and hasattr(obj, "geom_type"):
+            # A shapely geometry.
+            tagged(b"g", obj.wkb)
+        elif hasattr(obj, "srs") and hasattr(obj, "crs"):
+            # A pyproj projection.
+            tagged(b"p", obj.srs.encode())
+        elif hasattr(obj, "__dict__"):
+            tagged(b"c", type(obj).__qualname__.encode())
+            HashHelper.__update__(h, vars(obj))
+        else:
+            raise TypeError(f'Unable to compute a content hash for object of type {type(obj)}')
+
+
+    @staticmethod
+    def __update_sorted__(h, tag, items):
+        """Feeds a collection of tuples to the hash object h in order of their canonical encodings"""
+
+        encoded = sorted(b"".join(HashHelper.canonical_bytes(x) for x in item) for item in items)
+        h.update(tag)
+        h.update(struct.pack("<Q", len(encoded)))
+        for chunk in encoded:
+            h.update(struct.pack("<Q", len(chunk)))
+            h.update(chunk)
+
+
+class _Collector():
+    """Minimal stand-in for a hash object which collects the bytes passed to update()"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def update(self, data):
+        self.chunks.append(bytes(data))
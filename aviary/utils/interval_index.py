@@ -0,0 +1,122 @@
+"""
+Static index of closed intervals, for stabbing queries (which intervals contain a value?).
+
+The distinct interval bounds partition the real line into elementary slots:
+each bound is a slot, as is each open gap between consecutive bounds (and
+below the first and above the last). The intervals covering each slot are
+precomputed, so a query is a binary search for the slot followed by a lookup,
+independent of the number of intervals not containing the value.
+
+Intervals are closed, consistent with the vertical limits of a sector element
+(lower_limit <= flight_level <= upper_limit).
+"""
+
+import numpy as np
+
+class IntervalIndex():
+    """
+    An index of the closed intervals [lower[k], upper[k]].
+
+    Args:
+        lower (array): Array of lower bounds.
+        upper (array): Array of upper bounds, with the same length as lower.
+
+    Attributes:
+        lower (np.ndarray): As Args.
+        upper (np.ndarray): As Args.
+        bounds (np.ndarray): The sorted distinct bounds.
+    """
+
+    def __init__(self, lower, upper):
+
+        self.lower = np.asarray(lower, dtype = float).ravel()
+        self.upper = np.asarray(upper, dtype = float).ravel()
+
+        if self.lower.shape != self.upper.shape:
+            raise ValueError('Lower and upper bounds must have the same length.')
+        if np.any(~np.isfinite(self.lower) | ~np.isfinite(self.upper)):
+            raise ValueError('Interval bounds must be finite.')
+        if np.any(self.lower > self.upper):
+            raise ValueError('Lower bounds must not exceed upper bounds.')
+
+        self.bounds = np.unique(np.concatenate([self.lower, self.upper]))
+
+        # Interval k covers slots 2 * rank(lower[k]) + 1 to 2 * rank(upper[k]) + 1 inclusive.
+        first = 2 * np.searchsorted(self.bounds, self.lower) + 1
+        n_slots = 2 * np.searchsorted(self.bounds, self.upper) + 2 - first
+
+        # Enumerate the (slot, interval) pairs, ordered by slot and then by interval.
+        interval = np.repeat(np.arange(len(self.lower)), n_slots)
+        offset = np.arange(len(interval)) - np.repeat(np.cumsum(n_slots) - n_slots, n_slots)
+        slot = np.repeat(first, n_slots) + offset
+        order = np.lexsort((interval, slot))
+
+        self._intervals = interval[order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(slot, minlength = 2 * len(self.bounds) + 1))])
+
+
+    def __len__(self):
+
+        return len(self.lower)
+
+
+    def slots(self, values):
+        """
+        Returns the slot of each of an array of values.
+
+        :param values: Array of values.
+        :return: An integer array with the same shape as values. Non-finite values have slot -1.
+        """
+
+        values = np.asarray(values, dtype = float)
+        rank = np.searchsorted(self.bounds, values)
+        on_bound = self.bounds[np.minimum(rank, len(self.bounds) - 1)] == values \
+            if len(self.bounds) > 0 else np.zeros(values.shape, dtype = bool)
+
+        return np.where(np.isfinite(values), 2 * rank + on_bound, -1)
+
+
+    def query(self, value):
+        """
+        Returns the indices of the intervals containing a value.
+
+        :param value: A number.
+        :return: A sorted integer array.
+        """
+
+        slot = int(self.slots(value))
+        if slot < 0:
+            return np.zeros(0, dtype = int)
+        return self._intervals[self._offsets[slot]:self._offsets[slot + 1]]
+
+
+    def query_many(self, values):
+        """
+        Vectorised form of query: returns all (value, interval) containment pairs for an array of values.
+
+        :param values: Array of values.
+        :return: A pair (value_index, interval_index) of integer arrays, ordered by value index.
+        """
+
+        slots = self.slots(np.asarray(values, dtype = float).ravel())
+        valid = np.flatnonzero(slots >= 0)
+        start, end = self._offsets[slots[valid]], self._offsets[slots[valid] + 1]
+        counts = end - start
+
+        value_index = np.repeat(valid, counts)
+        position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(start, counts)
+        return value_index, self._intervals[position]
+
+
+    def contains(self, index, values):
+        """
+        Tests whether each of an array of values lies in the corresponding interval.
+
+        :param index: Array of interval indices.
+        :param values: Array of values, with the same shape as index.
+        :return: A boolean numpy array.
+        """
+
+        index = np.asarray(index, dtype = int)
+        values = np.asarray(values, dtype = float)
+        return (self.lower[index] <= values) & (values <= self.upper[index])
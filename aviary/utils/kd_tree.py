@@ -0,0 +1,138 @@
+"""
+Static k-d tree, for radius and nearest neighbour queries over a fixed set of points.
+
+The tree is built once by recursive median splits along the widest axis of
+each node, and stored in flat arrays: each node holds a contiguous range of
+the permuted points and its bounding box. Leaves hold at most leaf_size
+points, which are tested by brute force, so a query visits only the nodes
+whose bounding boxes are within range of the query point.
+"""
+
+import heapq
+
+import numpy as np
+
+# Default maximum number of points in a leaf node
+LEAF_SIZE = 16
+
+class KDTree():
+    """
+    A k-d tree over an array of points.
+
+    Args:
+        points (array): An (n, k) array of point coordinates.
+        leaf_size (int): The maximum number of points in a leaf node.
+
+    Attributes:
+        points (np.ndarray): As Args.
+    """
+
+    def __init__(self, points, leaf_size = LEAF_SIZE):
+
+        self.points = np.asarray(points, dtype = float)
+        if self.points.ndim != 2 or len(self.points) == 0:
+            raise ValueError('A k-d tree requires a non-empty (n, k) array of points.')
+        if np.any(~np.isfinite(self.points)):
+            raise ValueError('Point coordinates must be finite.')
+
+        self._index = np.arange(len(self.points))
+        # Per node: the range of permuted points, the children (-1 for leaves) and the bounding box.
+        self._start, self._end, self._left, self._right = [], [], [], []
+        lower, upper = [], []
+
+        stack = [(0, len(self.points), self.__node__(0, len(self.points), lower, upper))]
+        while stack:
+            start, end, node = stack.pop()
+            if end - start <= leaf_size:
+                continue
+
+            # Split at the median of the widest axis.
+            axis = int(np.argmax(upper[node] - lower[node]))
+            middle = (start + end) // 2
+            index = self._index[start:end]
+            self._index[start:end] = index[np.argpartition(self.points[index, axis], middle - start)]
+
+            self._left[node] = self.__node__(start, middle, lower, upper)
+            self._right[node] = self.__node__(middle, end, lower, upper)
+            stack.extend([(start, middle, self._left[node]), (middle, end, self._right[node])])
+
+        self._lower, self._upper = np.array(lower), np.array(upper)
+
+
+    def __len__(self):
+
+        return len(self.points)
+
+
+    def __node__(self, start, end, lower, upper):
+        """Appends a leaf node holding a range of the permuted points, and returns its index"""
+
+        points = self.points[self._index[start:end]]
+        self._start.append(start)
+        self._end.append(end)
+        self._left.append(-1)
+        self._right.append(-1)
+        lower.append(points.min(axis = 0))
+        upper.append(points.max(axis = 0))
+        return len(self._start) - 1
+
+
+    def __box_distance__(self, node, point):
+        """Returns the distance from a point to a node's bounding box"""
+
+        return float(np.linalg.norm(np.maximum(0, np.maximum(self._lower[node] - point, point - self._upper[node]))))
+
+
+    def query_radius(self, point, radius):
+        """
+        Returns the indices of the points within a distance of a point.
+
+        :param point: The query point, with k coordinates.
+        :param radius: The distance.
+        :return: A sorted integer array.
+        """
+
+        point = np.asarray(point, dtype = float)
+
+        ret = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self.__box_distance__(node, point) > radius:
+                continue
+            if self._left[node] < 0:
+                index = self._index[self._start[node]:self._end[node]]
+                ret.append(index[np.linalg.norm(self.points[index] - point, axis = 1) <= radius])
+            else:
+                stack.extend([self._left[node], self._right[node]])
+
+        return np.sort(np.concatenate(ret)) if ret else np.zeros(0, dtype = int)
+
+
+    def nearest(self, point):
+        """
+        Returns the nearest point to a point.
+
+        :param point: The query point, with k coordinates.
+        :return: A pair (index, distance) of the nearest point (the lowest index, if several are equidistant).
+        """
+
+        point = np.asarray(point, dtype = float)
+
+        best, best_distance = -1, np.inf
+        heap = [(0.0, 0)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > best_distance:
+                break
+            if self._left[node] < 0:
+                index = self._index[self._start[node]:self._end[node]]
+                distances = np.linalg.norm(self.points[index] - point, axis = 1)
+                k = np.lexsort((index, distances))[0]
+                if distances[k] < best_distance or (distances[k] == best_distance and index[k] < best):
+                    best, best_distance = int(index[k]), float(distances[k])
+            else:
+                for child in [self._left[node], self._right[node]]:
+                    heapq.heappush(heap, (self.__box_distance__(child, point), child))
+
+        return best, best_distance
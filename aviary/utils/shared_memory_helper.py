@@ -0,0 +1,89 @@
+"""
+Helper class for sharing data between processes via multiprocessing.shared_memory.
+
+Shared memory requires Python 3.8 or later. On earlier versions, publishing or
+attaching raises an ImportError explaining the requirement.
+"""
+
+import numpy as np
+
+class SharedMemoryHelper():
+    """Helper class containing shared memory functions"""
+
+    @staticmethod
+    def shared_memory():
+        """
+        Returns the multiprocessing.shared_memory module.
+
+        Raises an ImportError if it is unavailable (before Python 3.8).
+        """
+
+        try:
+            from multiprocessing import shared_memory
+        except ImportError as ex:
+            raise ImportError('Sharing data between processes requires Python 3.8 or later '
+                              '(multiprocessing.shared_memory).') from ex
+        return shared_memory
+
+
+    @staticmethod
+    def publish(data):
+        """
+        Copies bytes or a numpy array into a new shared memory block.
+
+        The caller owns the returned block: it must call close() and, once no process
+        needs the data any longer, unlink().
+
+        :param data: A bytes-like object or numpy array.
+        :return: A multiprocessing.shared_memory.SharedMemory instance.
+        """
+
+        shared_memory = SharedMemoryHelper.shared_memory()
+
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data).tobytes()
+        data = memoryview(data).cast("B")
+
+        # Shared memory blocks must have a positive size.
+        shm = shared_memory.SharedMemory(create = True, size = max(1, data.nbytes))
+        shm.buf[:data.nbytes] = data
+        return shm
+
+
+    @staticmethod
+    def attach(name):
+        """
+        Attaches to an existing shared memory block by name, without taking ownership of it.
+
+        Before Python 3.13, attaching registers the block with the multiprocessing resource tracker,
+        which unlinks it when the tracker exits. Attaching is therefore only supported in child
+        processes (forked or spawned) of the publishing process, which share its resource tracker,
+        so that the block remains owned by the publisher.
+
+        :param name: The name of the shared memory block.
+        :return: A multiprocessing.shared_memory.SharedMemory instance.
+        """
+
+        shared_memory = SharedMemoryHelper.shared_memory()
+
+        try:
+            return shared_memory.SharedMemory(name = name, track = False)
+        except TypeError:
+            # Python < 3.13: the block is registered with the (shared) resource tracker.
+            return shared_memory.SharedMemory(name = name)
+
+
+    @staticmethod
+    def array(shm, dtype, shape, offset = 0):
+        """
+        Returns a read-only numpy view onto (part of) a shared memory block.
+
+        :param shm: A multiprocessing.shared_memory.SharedMemory instance.
+        :param dtype: The array data type.
+        :param shape: The array shape.
+        :param offset: The offset in bytes of the array within the block.
+        """
+
+        ret = np.ndarray(shape, dtype = dtype, buffer = shm.buf, offset = offset)
+        ret.flags.writeable = False
+        return ret